@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import Group, Permission
 from django.contrib.contenttypes.models import ContentType
-from .models import User, MenuItem, Category, Cart, CartItem, Order, OrderItem, Table, TableBooking
+from .models import User, MenuItem, Category, Cart, CartItem, Order, OrderItem, Table, TableBooking, PaymentVerification, OutboundEmail, OrderStatusEvent
 
 class CustomUserAdmin(UserAdmin):
     list_display = ('email', 'first_name', 'last_name', 'is_staff', 'get_groups')
@@ -67,7 +67,7 @@ class OrderItemInline(admin.TabularInline):
     extra = 1
 
 class OrderAdmin(admin.ModelAdmin):
-    list_display = ['id', 'customer', 'paid', 'status', 'total', 'created']
+    list_display = ['id', 'customer', 'paid', 'status', 'total', 'delivery_crew', 'created']
     list_filter = ['status', 'delivery_type', 'created']
     search_fields = ['customer__email', 'delivery_crew__email']
     inlines = [OrderItemInline]
@@ -82,6 +82,28 @@ class TableBookingAdmin(admin.ModelAdmin):
     list_filter = ['status', 'booking_date']
     search_fields = ['customer__email', 'table__table_number']
 
+class PaymentVerificationAdmin(admin.ModelAdmin):
+    list_display = ['reference', 'status', 'attempts', 'available_at', 'updated']
+    list_filter = ['status']
+    search_fields = ['reference']
+
+class OrderStatusEventAdmin(admin.ModelAdmin):
+    list_display = ['order', 'from_status', 'to_status', 'actor', 'created']
+    list_filter = ['to_status', 'created']
+    search_fields = ['order__reference']
+
+    # Append-only history
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'status', 'attempts', 'created', 'sent_at']
+    list_filter = ['status']
+    search_fields = ['subject', 'to']
+
 
 # Register models
 admin.site.register(User, CustomUserAdmin)
@@ -91,4 +113,7 @@ admin.site.register(Cart, CartAdmin)
 admin.site.register(Order, OrderAdmin)
 admin.site.register(Table, TableAdmin)
 admin.site.register(TableBooking, TableBookingAdmin)
+admin.site.register(PaymentVerification, PaymentVerificationAdmin)
+admin.site.register(OrderStatusEvent, OrderStatusEventAdmin)
+admin.site.register(OutboundEmail, OutboundEmailAdmin)
 
@@ -0,0 +1,182 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.db import router
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, CSRFCheck
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .denylist import is_revoked
+from .roles import get_group_names, get_role, remember_group_names
+
+User = get_user_model()
+
+ACCESS_COOKIE = getattr(settings, "AUTH_ACCESS_COOKIE", "access_token")
+REFRESH_COOKIE = getattr(settings, "AUTH_REFRESH_COOKIE", "refresh_token")
+
+EVENT_TICKET_SALT = "api.order-events"
+EVENT_TICKET_MAX_AGE = getattr(settings, "ORDER_EVENTS_TICKET_MAX_AGE", 60)
+
+# User fields copied into access tokens, next to the user id and groups
+CLAIM_FIELDS = ("email", "is_staff", "is_superuser")
+
+
+def issue_event_ticket(user):
+    """A short-lived credential for opening the order event stream"""
+    return signing.dumps({"user": user.pk}, salt=EVENT_TICKET_SALT)
+
+
+def add_user_claims(token, user):
+    """Embed what authentication and permission checks need in ``token``"""
+    for field in CLAIM_FIELDS:
+        token[field] = getattr(user, field)
+    token["groups"] = sorted(get_group_names(user))
+    token["role"] = get_role(user)
+    return token
+
+
+def user_from_claims(token):
+    """
+    A ``User`` built from token claims without a query, or ``None`` for
+    tokens minted before the claims existed.
+
+    Fields not in the token are deferred, so reading one loads it from the
+    database like any ``only()`` queryset would; ``save()`` writes only
+    loaded and assigned fields.
+    """
+    if "groups" not in token or any(field not in token for field in CLAIM_FIELDS):
+        return None
+    claims = {field: token[field] for field in CLAIM_FIELDS}
+    claims[api_settings.USER_ID_FIELD] = token[api_settings.USER_ID_CLAIM]
+    # Tokens are only minted for active users
+    claims["is_active"] = True
+
+    loaded = [field.attname for field in User._meta.concrete_fields if field.attname in claims]
+    user = User.from_db(router.db_for_read(User), loaded, [claims[name] for name in loaded])
+    remember_group_names(user, token["groups"])
+    return user
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    Trust the signed claims in the access token instead of loading the user.
+
+    Reads resolve ``request.user`` and its roles with no queries. Writes,
+    which may save the user or hand it to serializers that read its
+    profile, still load the full row, as do tokens without the claims.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return self.get_request_user(request, validated_token), validated_token
+
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+        if is_revoked(validated_token):
+            raise InvalidToken("Token has been revoked")
+        return validated_token
+
+    def get_request_user(self, request, validated_token):
+        if request.method in SAFE_METHODS:
+            user = user_from_claims(validated_token)
+            if user is not None:
+                return user
+        return self.get_user(validated_token)
+
+
+class EventTicketAuthentication(BaseAuthentication):
+    """
+    Accept a ``?ticket=`` from ``issue_event_ticket`` on the order event stream.
+
+    ``EventSource`` cannot send an Authorization header, and putting the
+    access token in the URL would leak it into access logs. A ticket only
+    opens the event stream and expires after ``EVENT_TICKET_MAX_AGE``
+    seconds.
+    """
+
+    def authenticate(self, request):
+        ticket = request.query_params.get("ticket")
+        if not ticket:
+            return None
+        try:
+            payload = signing.loads(ticket, salt=EVENT_TICKET_SALT, max_age=EVENT_TICKET_MAX_AGE)
+        except signing.BadSignature:
+            raise exceptions.AuthenticationFailed("Invalid or expired event ticket")
+        user = User.objects.filter(pk=payload.get("user"), is_active=True).first()
+        if user is None:
+            raise exceptions.AuthenticationFailed("Invalid or expired event ticket")
+        return user, None
+
+    def authenticate_header(self, request):
+        return 'Ticket realm="api"'
+
+
+class CookieJWTAuthentication(StatelessJWTAuthentication):
+    """
+    Read the access token from the HTTP-only cookie set at cookie login.
+
+    Browsers send cookies on their own, so unsafe requests must pass the
+    CSRF check, as with session authentication.
+    """
+
+    def authenticate(self, request):
+        raw_token = request.COOKIES.get(ACCESS_COOKIE)
+        if not raw_token:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        if request.method not in SAFE_METHODS:
+            self.enforce_csrf(request)
+        return self.get_request_user(request, validated_token), validated_token
+
+    def enforce_csrf(self, request):
+        def dummy_get_response(request):
+            return None
+
+        check = CSRFCheck(dummy_get_response)
+        check.process_request(request)
+        reason = check.process_view(request, None, (), {})
+        if reason:
+            raise exceptions.PermissionDenied(f"CSRF Failed: {reason}")
+
+
+AUTH_COOKIE_SECURE = getattr(settings, "AUTH_COOKIE_SECURE", True)
+# The refresh token is only sent to the auth endpoints that use it
+REFRESH_COOKIE_PATH = getattr(settings, "AUTH_REFRESH_COOKIE_PATH", "/api/v1/auth/")
+
+
+def set_auth_cookies(response, access, refresh=None):
+    """Store tokens in HTTP-only cookies that expire with the tokens"""
+    response.set_cookie(
+        ACCESS_COOKIE,
+        access,
+        max_age=int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()),
+        httponly=True,
+        secure=AUTH_COOKIE_SECURE,
+        samesite="Lax",
+    )
+    if refresh is not None:
+        response.set_cookie(
+            REFRESH_COOKIE,
+            refresh,
+            max_age=int(api_settings.REFRESH_TOKEN_LIFETIME.total_seconds()),
+            path=REFRESH_COOKIE_PATH,
+            httponly=True,
+            secure=AUTH_COOKIE_SECURE,
+            samesite="Lax",
+        )
+    return response
+
+
+def delete_auth_cookies(response):
+    response.delete_cookie(ACCESS_COOKIE, samesite="Lax")
+    response.delete_cookie(REFRESH_COOKIE, path=REFRESH_COOKIE_PATH, samesite="Lax")
+    return response
@@ -0,0 +1,95 @@
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import time
+
+from django.conf import settings
+
+from .models import Table, TableBooking
+
+SEATING_MINUTES = getattr(settings, "TABLE_SEATING_MINUTES", 60)
+SLOT_MINUTES = getattr(settings, "TABLE_SLOT_MINUTES", 15)
+OPENING_TIME = getattr(settings, "RESTAURANT_OPENING_TIME", time(11, 0))
+CLOSING_TIME = getattr(settings, "RESTAURANT_CLOSING_TIME", time(22, 0))
+
+# Bookings in these states hold their table
+BLOCKING_STATUSES = ("pending", "confirmed")
+
+
+def to_minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def from_minutes(minutes):
+    return time(minutes // 60, minutes % 60)
+
+
+class DayAvailability:
+    """
+    Table availability for one day, answered from memory.
+
+    All blocking bookings of the day are loaded in a single query and kept
+    as a sorted list of start minutes per table. Every booking occupies its
+    table for ``seating_minutes``, so a slot starting at ``s`` is free on a
+    table when no booking starts in the open interval
+    ``(s - seating_minutes, s + seating_minutes)``; that is one bisect per
+    table and slot.
+    """
+
+    def __init__(self, date, seating_minutes=SEATING_MINUTES):
+        self.date = date
+        self.seating_minutes = seating_minutes
+        self.tables = list(Table.objects.filter(is_active=True).order_by("table_number"))
+
+        bookings = TableBooking.objects.filter(
+            booking_date=date, status__in=BLOCKING_STATUSES
+        )
+        starts = defaultdict(list)
+        for table_id, booking_time in bookings.values_list("table_id", "booking_time"):
+            starts[table_id].append(to_minutes(booking_time))
+        for table_starts in starts.values():
+            table_starts.sort()
+        self._starts = starts
+
+    def is_free(self, table_id, start):
+        """Whether ``table_id`` can seat a party arriving at minute ``start``"""
+        starts = self._starts.get(table_id)
+        if not starts:
+            return True
+        index = bisect_right(starts, start - self.seating_minutes)
+        return index == len(starts) or starts[index] >= start + self.seating_minutes
+
+    def free_tables(self, at, guests=1):
+        """Active tables seating ``guests`` that are free at time ``at``"""
+        start = to_minutes(at)
+        return [
+            table
+            for table in self.tables
+            if table.capacity >= guests and self.is_free(table.id, start)
+        ]
+
+    def slots(self, opening=OPENING_TIME, closing=CLOSING_TIME, interval=SLOT_MINUTES):
+        """Seating times from ``opening`` up to the last one ending by ``closing``"""
+        last = to_minutes(closing) - self.seating_minutes
+        return range(to_minutes(opening), last + 1, interval)
+
+    def grid(self, guests=1, **slot_options):
+        """Map every slot of the day to the ids of the tables free at that slot"""
+        tables = [table.id for table in self.tables if table.capacity >= guests]
+        return [
+            (from_minutes(start), [table_id for table_id in tables if self.is_free(table_id, start)])
+            for start in self.slots(**slot_options)
+        ]
+
+
+def table_is_free(table, date, at, seating_minutes=SEATING_MINUTES, exclude_booking=None):
+    """Whether a single table can take a new booking at ``at`` on ``date``"""
+    bookings = TableBooking.objects.filter(
+        table=table, booking_date=date, status__in=BLOCKING_STATUSES
+    )
+    if exclude_booking is not None:
+        bookings = bookings.exclude(pk=exclude_booking)
+    start = to_minutes(at)
+    return not any(
+        abs(to_minutes(booking_time) - start) < seating_minutes
+        for booking_time in bookings.values_list("booking_time", flat=True)
+    )
@@ -0,0 +1,107 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache, caches
+
+from .catalog import get_catalog_version
+from .models import CartItem
+from .pricing import calculate_totals, price_order
+from .serializers import CartItemSerializer
+
+CART_SNAPSHOT_TIMEOUT = getattr(settings, "CART_SNAPSHOT_TIMEOUT", 60 * 5)
+CART_VERSION_TIMEOUT = getattr(settings, "CART_VERSION_TIMEOUT", 60 * 60 * 24)
+# Cache alias holding cart versions. A mutation on one worker has to retire
+# the ETags every worker hands out, so it is shared; snapshots stay in each
+# worker's default cache
+CART_VERSION_CACHE = getattr(settings, "CART_VERSION_CACHE", "shared")
+
+
+def _version_key(user_id):
+    return f"cart-version:{user_id}"
+
+
+def _snapshot_key(user_id, version):
+    return f"cart-snapshot:{user_id}:{version}"
+
+
+def _new_version():
+    return uuid.uuid4().hex[:16]
+
+
+def get_cart_version(user_id):
+    """
+    Return the current version token of a user's cart.
+
+    The token changes on every cart mutation and, since carts are priced
+    from the menu, on every catalog change; a missing token (first use or
+    cache eviction) is simply re-issued, which only costs one full response.
+    """
+    shared = caches[CART_VERSION_CACHE]
+    key = _version_key(user_id)
+    version = shared.get(key)
+    if version is None:
+        version = _new_version()
+        if not shared.add(key, version, CART_VERSION_TIMEOUT):
+            version = shared.get(key) or version
+    return f"{version}.{get_catalog_version()}"
+
+
+def bump_cart_version(user_id):
+    """Mark a user's cart as changed, retiring its snapshot and ETag"""
+    caches[CART_VERSION_CACHE].set(_version_key(user_id), _new_version(), CART_VERSION_TIMEOUT)
+
+
+def cart_etag(user_id, version, delivery_type=None):
+    return f'"cart-{user_id}-{version}-{delivery_type or ""}"'
+
+
+def build_cart_snapshot(user):
+    """
+    Price a user's cart from the menu price map, as checkout will.
+
+    The price stored on a cart item is the one it was added at; showing it
+    would let the cart disagree with the order once the menu changes.
+    """
+    items = list(
+        CartItem.objects.filter(cart__customer=user).select_related("menuitem").order_by("id")
+    )
+    lines, totals = price_order(
+        [{"menuitem_id": item.menuitem_id, "quantity": item.quantity} for item in items]
+    )
+    for item, line in zip(items, lines):
+        item.price = line["price"]
+        item.line_total = line["price"] * item.quantity
+    return {
+        "customer": user.pk,
+        "items": CartItemSerializer(items, many=True).data,
+        "subtotal": str(totals["subtotal"]),
+        "tax": str(totals["tax"]),
+    }
+
+
+def get_cart_snapshot(user, version=None):
+    """
+    Return the user's cart with server-computed line totals, subtotal and
+    tax, reading from the cache when possible.
+
+    Snapshots are kept in this worker's cache under the cart version, which
+    is shared, so a bump on any worker makes the old one unreachable here.
+    """
+    if version is None:
+        version = get_cart_version(user.pk)
+    key = _snapshot_key(user.pk, version)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build_cart_snapshot(user)
+        cache.set(key, snapshot, CART_SNAPSHOT_TIMEOUT)
+    return snapshot
+
+
+def priced_cart_snapshot(user, delivery_type=None, version=None):
+    """The cart snapshot with the delivery fee and total for a delivery type"""
+    snapshot = dict(get_cart_snapshot(user, version))
+    totals = calculate_totals(snapshot["subtotal"], delivery_type)
+    snapshot["deliveryFee"] = str(totals["deliveryFee"])
+    snapshot["total"] = str(totals["total"])
+    return snapshot
+
@@ -0,0 +1,69 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.http import HttpResponse
+from django.utils.http import urlencode
+from rest_framework.renderers import JSONRenderer
+
+CATALOG_VERSION_KEY = "catalog-version"
+# Cache alias holding the version. Every worker has to see a bump, so it is
+# shared; the renderings keyed by it stay in each worker's default cache
+CATALOG_VERSION_CACHE = getattr(settings, "CATALOG_VERSION_CACHE", "shared")
+CATALOG_CACHE_TIMEOUT = getattr(settings, "CATALOG_CACHE_TIMEOUT", 60 * 60)
+
+
+def get_catalog_version():
+    """Return the current menu catalog version token"""
+    shared = caches[CATALOG_VERSION_CACHE]
+    version = shared.get(CATALOG_VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex[:16]
+        if not shared.add(CATALOG_VERSION_KEY, version, None):
+            version = shared.get(CATALOG_VERSION_KEY) or version
+    return version
+
+
+def bump_catalog_version():
+    """Retire every cached menu/category rendering"""
+    caches[CATALOG_VERSION_CACHE].set(CATALOG_VERSION_KEY, uuid.uuid4().hex[:16], None)
+
+
+class CatalogCacheMixin:
+    """
+    Serve ``list`` responses from pre-encoded JSON cached per catalog
+    version and filter combination.
+
+    Only JSON responses are cached; the browsable API renders as usual.
+    ``catalog_cache_params`` lists the query parameters that take part in
+    the cache key, anything else is ignored for caching purposes. So do
+    the scheme and host, which end up in image URLs and page links.
+    """
+
+    catalog_cache_params = ()
+
+    def _catalog_cache_key(self, request):
+        params = sorted(
+            (name, request.query_params.get(name))
+            for name in self.catalog_cache_params
+            if name in request.query_params
+        )
+        origin = f"{request.scheme}://{request.get_host()}"
+        return (
+            f"catalog:{self.basename}:{get_catalog_version()}:{origin}:{urlencode(params)}"
+        )
+
+    def list(self, request, *args, **kwargs):
+        if not isinstance(request.accepted_renderer, JSONRenderer):
+            return super().list(request, *args, **kwargs)
+
+        key = self._catalog_cache_key(request)
+        content = cache.get(key)
+        if content is None:
+            response = super().list(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            content = JSONRenderer().render(response.data)
+            cache.set(key, content, CATALOG_CACHE_TIMEOUT)
+
+        return HttpResponse(content, content_type="application/json")
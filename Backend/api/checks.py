@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+from django.utils.module_loading import import_string
+
+from .denylist import DENYLIST_CACHE
+from .events import DEFAULT_BROKER
+from .idempotency import IDEMPOTENCY_CACHE
+
+# Backends whose entries only the process that wrote them can see
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def _process_local(alias):
+    backend = settings.CACHES.get(alias, {}).get("BACKEND")
+    return backend if backend in PROCESS_LOCAL_CACHES else None
+
+
+@register(Tags.security, deploy=True)
+def check_denylist_cache(app_configs, **kwargs):
+    backend = _process_local(DENYLIST_CACHE)
+    if backend is None:
+        return []
+    return [
+        Warning(
+            f"TOKEN_DENYLIST_CACHE ({DENYLIST_CACHE!r}) uses {backend}, so a token "
+            "revoked on one worker stays valid on the others.",
+            hint="Set REDIS_URL, or point TOKEN_DENYLIST_CACHE at a shared cache.",
+            id="api.W001",
+        )
+    ]
+
+
+@register(deploy=True)
+def check_idempotency_cache(app_configs, **kwargs):
+    backend = _process_local(IDEMPOTENCY_CACHE)
+    if backend is None:
+        return []
+    return [
+        Warning(
+            f"IDEMPOTENCY_CACHE ({IDEMPOTENCY_CACHE!r}) uses {backend}, so retries "
+            "reaching another worker run again and can place duplicate orders.",
+            hint="Set REDIS_URL, or point IDEMPOTENCY_CACHE at a shared cache.",
+            id="api.W002",
+        )
+    ]
+
+
+@register(deploy=True)
+def check_order_events_broker(app_configs, **kwargs):
+    path = getattr(settings, "ORDER_EVENTS_BROKER", DEFAULT_BROKER)
+    if import_string(path).shared_between_processes:
+        return []
+    return [
+        Warning(
+            f"ORDER_EVENTS_BROKER ({path!r}) only reaches streams held by the process "
+            "that publishes, so status changes from run_payment_worker or another "
+            "worker never reach clients.",
+            hint="Set REDIS_URL, or point ORDER_EVENTS_BROKER at api.events.RedisBroker.",
+            id="api.W003",
+        )
+    ]
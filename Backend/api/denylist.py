@@ -0,0 +1,39 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+# Cache alias holding revoked token ids. Every worker must see the same
+# entries, so this has to be a shared (e.g. Redis) cache once more than
+# one process serves the API; see the api.W001 deploy check.
+DENYLIST_CACHE = getattr(settings, "TOKEN_DENYLIST_CACHE", "default")
+
+
+def _key(jti):
+    return f"jwt-denylist:{jti}"
+
+
+def _ttl(token):
+    """Seconds until ``token`` expires on its own"""
+    return int(token["exp"] - time.time()) + 1
+
+
+def revoke(token):
+    """
+    Deny ``token`` until it expires; returns ``False`` if it already was.
+
+    Entries expire with the token, so the denylist never holds more than
+    the tokens revoked within one token lifetime. ``cache.add`` makes
+    revoking atomic, which lets refresh rotation use it as a claim on a
+    refresh token.
+    """
+    ttl = _ttl(token)
+    if ttl <= 0:
+        return False
+    return caches[DENYLIST_CACHE].add(_key(token[jwt_settings.JTI_CLAIM]), 1, ttl)
+
+
+def is_revoked(token):
+    jti = token.get(jwt_settings.JTI_CLAIM)
+    return jti is not None and _key(jti) in caches[DENYLIST_CACHE]
@@ -0,0 +1,70 @@
+import heapq
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .events import publish_order_status
+from .models import Order
+
+User = get_user_model()
+
+CREW_GROUP = "Crew"
+# Orders a crew member is still working on
+OPEN_DELIVERY_STATUSES = ("confirmed", "preparing", "ready", "in_transit")
+MAX_OPEN_DELIVERIES = getattr(settings, "DISPATCH_MAX_OPEN_DELIVERIES", 3)
+BATCH_SIZE = getattr(settings, "DISPATCH_BATCH_SIZE", 50)
+
+
+def crew_loads():
+    """``(open deliveries, user id)`` for every active crew member, in one query"""
+    return list(
+        User.objects.filter(groups__name=CREW_GROUP, is_active=True)
+        .annotate(
+            load=Count("deliveries", filter=Q(deliveries__status__in=OPEN_DELIVERY_STATUSES))
+        )
+        .values_list("load", "id")
+    )
+
+
+def dispatch_ready_orders(batch_size=BATCH_SIZE, max_open=MAX_OPEN_DELIVERIES):
+    """
+    Assign unassigned ready delivery orders to the least loaded crew.
+
+    Orders are claimed with ``SELECT ... FOR UPDATE SKIP LOCKED``, so
+    concurrent dispatchers work on disjoint orders instead of waiting on
+    each other. Crew loads are read once per batch and kept in a heap;
+    nobody gets more than ``max_open`` open deliveries. Two dispatchers may
+    read the same loads, which can briefly unbalance crew by an order, but
+    never double-assigns an order. Returns the assigned orders.
+    """
+    with transaction.atomic():
+        orders = list(
+            Order.objects.select_for_update(skip_locked=True)
+            .filter(delivery_type="delivery", status="ready", delivery_crew__isnull=True)
+            .order_by("updated", "id")[:batch_size]
+        )
+        if not orders:
+            return []
+
+        heap = [(load, crew_id) for load, crew_id in crew_loads() if load < max_open]
+        heapq.heapify(heap)
+        now = timezone.now()
+        assigned = []
+        for order in orders:
+            if not heap:
+                break
+            load, crew_id = heapq.heappop(heap)
+            order.delivery_crew_id = crew_id
+            order.updated = now
+            assigned.append(order)
+            if load + 1 < max_open:
+                heapq.heappush(heap, (load + 1, crew_id))
+
+        if assigned:
+            Order.objects.bulk_update(assigned, ["delivery_crew", "updated"])
+            for order in assigned:
+                publish_order_status(order)
+    return assigned
@@ -0,0 +1,249 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.dispatch import receiver
+from django.http import StreamingHttpResponse
+from django.utils.module_loading import import_string
+from rest_framework.renderers import BaseRenderer
+
+from .roles import in_group
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBER_QUEUE_SIZE = getattr(settings, "ORDER_EVENTS_QUEUE_SIZE", 100)
+HEARTBEAT_SECONDS = getattr(settings, "ORDER_EVENTS_HEARTBEAT", 15)
+DEFAULT_BROKER = "api.events.InProcessBroker"
+REDIS_CHANNEL = getattr(settings, "ORDER_EVENTS_CHANNEL", "order-events")
+REDIS_RECONNECT_SECONDS = 1
+
+
+class Subscription:
+    """
+    One connected client: a bounded queue fed by the broker.
+
+    The queue belongs to the event loop that created the subscription;
+    the broker hands events over with ``call_soon_threadsafe`` so sync
+    views running in worker threads can publish. A client too slow to
+    keep up loses its oldest events rather than growing without bound.
+    """
+
+    def __init__(self, broker, topics, maxsize=SUBSCRIBER_QUEUE_SIZE):
+        self.broker = broker
+        self.topics = frozenset(topics)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def deliver(self, event):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout=None):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """
+    Topic fan-out to the subscribers connected to this worker process.
+
+    Events published by any other process, such as the payment worker or
+    another web worker, never reach these subscribers; use ``RedisBroker``
+    when there is more than one.
+    """
+
+    shared_between_processes = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, topics):
+        subscription = Subscription(self, topics)
+        with self._lock:
+            for topic in subscription.topics:
+                self._subscribers[topic].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for topic in subscription.topics:
+                subscribers = self._subscribers.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[topic]
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(set().union(*self._subscribers.values()))
+
+    def publish(self, topics, event):
+        with self._lock:
+            targets = set()
+            for topic in topics:
+                targets.update(self._subscribers.get(topic, ()))
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # The client's event loop is gone; it unsubscribes on exit
+                pass
+        return len(targets)
+
+
+class RedisBroker(InProcessBroker):
+    """
+    Topic fan-out across processes through Redis pub/sub.
+
+    ``publish`` only sends the event to Redis. A process that has
+    subscribers listens on the channel in a background thread and hands
+    what arrives to them, so status changes made by the payment worker or
+    any web worker reach every stream. Needs the ``redis`` package and
+    ``ORDER_EVENTS_REDIS_URL``, which defaults to ``REDIS_URL``.
+    """
+
+    shared_between_processes = True
+
+    def __init__(self, client=None):
+        super().__init__()
+        if client is None:
+            import redis
+
+            url = getattr(settings, "ORDER_EVENTS_REDIS_URL", None) or settings.REDIS_URL
+            client = redis.Redis.from_url(url)
+        self._redis = client
+        self._listener = None
+
+    def subscribe(self, topics):
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(
+                    target=self._listen, name="order-events", daemon=True
+                )
+                self._listener.start()
+        return super().subscribe(topics)
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(REDIS_CHANNEL)
+                for message in pubsub.listen():
+                    payload = json.loads(message["data"])
+                    super().publish(payload["topics"], payload["event"])
+            except Exception:
+                logger.exception("Order event listener lost Redis, reconnecting")
+                time.sleep(REDIS_RECONNECT_SECONDS)
+
+    def publish(self, topics, event):
+        try:
+            return self._redis.publish(
+                REDIS_CHANNEL, json.dumps({"topics": list(topics), "event": event})
+            )
+        except Exception:
+            # Publishing runs after commit; a lost event must not fail the request
+            logger.exception("Could not publish order event")
+            return 0
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """The process-wide broker named by ``ORDER_EVENTS_BROKER``"""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                path = getattr(settings, "ORDER_EVENTS_BROKER", DEFAULT_BROKER)
+                _broker = import_string(path)()
+    return _broker
+
+
+@receiver(setting_changed)
+def _reset_broker_on_settings_change(setting, **kwargs):
+    global _broker
+    if setting == "ORDER_EVENTS_BROKER":
+        _broker = None
+
+
+def topics_for_user(user):
+    """Topics a user may subscribe to: their own orders, plus staff feeds"""
+    topics = {f"customer:{user.pk}"}
+    if user.is_staff or user.is_superuser or in_group(user, "Managers"):
+        topics.add("staff")
+    if in_group(user, "Crew"):
+        topics.add(f"crew:{user.pk}")
+    return topics
+
+
+def order_topics(order):
+    topics = [f"customer:{order.customer_id}", "staff"]
+    if order.delivery_crew_id:
+        topics.append(f"crew:{order.delivery_crew_id}")
+    return topics
+
+
+def publish_order_status(order):
+    """Publish an order's current status once the surrounding transaction commits"""
+    topics = order_topics(order)
+    event = {
+        "type": "order.status",
+        "order": order.pk,
+        "reference": order.reference,
+        "status": order.status,
+        "paid": order.paid,
+    }
+    transaction.on_commit(lambda: get_broker().publish(topics, event))
+
+
+async def event_stream(topics, broker=None, heartbeat=HEARTBEAT_SECONDS):
+    """
+    Server-Sent Events for ``topics``, with keep-alive comments.
+
+    Subscribes on first iteration so the subscription is bound to the
+    event loop serving the response; unsubscribes when the client goes away.
+    """
+    subscription = (broker or get_broker()).subscribe(topics)
+    try:
+        yield ": connected\n\n"
+        while True:
+            try:
+                event = await subscription.get(timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    finally:
+        subscription.close()
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Lets ``Accept: text/event-stream`` through content negotiation"""
+
+    media_type = "text/event-stream"
+    format = "event-stream"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Only error responses are rendered here; streams bypass renderers
+        return json.dumps(data).encode()
+
+
+def event_stream_response(topics):
+    response = StreamingHttpResponse(event_stream(topics), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
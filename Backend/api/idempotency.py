@@ -0,0 +1,105 @@
+import functools
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+# Cache alias holding stored responses and in-flight locks. Retries of one
+# checkout can reach different workers, so this must be shared between
+# them; see the api.W002 deploy check.
+IDEMPOTENCY_CACHE = getattr(settings, "IDEMPOTENCY_CACHE", "shared")
+IDEMPOTENCY_KEY_TTL = getattr(settings, "IDEMPOTENCY_KEY_TTL", 60 * 60 * 24)
+IDEMPOTENCY_LOCK_TIMEOUT = getattr(settings, "IDEMPOTENCY_LOCK_TIMEOUT", 30)
+MAX_KEY_LENGTH = 255
+# Client errors that reject the request itself, so replaying them is right;
+# anything else besides a success may go away on retry
+STORED_CLIENT_ERRORS = (400, 404, 422)
+
+
+def _cache_key(scope, user_id, key):
+    digest = hashlib.sha256(key.encode()).hexdigest()[:32]
+    return f"idempotency:{scope}:{user_id}:{digest}"
+
+
+def _fingerprint(request):
+    """Hash of what the request asks for, to catch a key reused for another body"""
+    payload = json.dumps(
+        [request.method, request.path, request.data],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+def _is_final(status_code):
+    return 200 <= status_code < 300 or status_code in STORED_CLIENT_ERRORS
+
+
+def idempotent(scope):
+    """
+    Honour an ``Idempotency-Key`` header on a view or viewset action.
+
+    The first final response for a key, a success or a rejection of the
+    request itself (``STORED_CLIENT_ERRORS``), is stored in the
+    ``IDEMPOTENCY_CACHE`` cache for ``IDEMPOTENCY_KEY_TTL`` seconds together
+    with a fingerprint of the request; other failures just release the key
+    so the client can retry. Replays with the same body get the stored
+    response back without running the view; a replay while the first
+    request is still running gets 409, and reusing a key for a different
+    body gets 422. Requests without the header are unaffected.
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            # Viewset methods get (self, request), function views (request,)
+            request = args[0] if isinstance(args[0], Request) else args[1]
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            if not key:
+                return view(*args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return Response(
+                    {"error": f"{IDEMPOTENCY_HEADER} is too long"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            cache = caches[IDEMPOTENCY_CACHE]
+            cache_key = _cache_key(scope, request.user.pk or "anon", key)
+            fingerprint = _fingerprint(request)
+            stored = cache.get(cache_key)
+            if stored is None:
+                if not cache.add(f"{cache_key}:lock", fingerprint, IDEMPOTENCY_LOCK_TIMEOUT):
+                    return Response(
+                        {"error": "A request with this idempotency key is in progress"},
+                        status=status.HTTP_409_CONFLICT,
+                    )
+                try:
+                    response = view(*args, **kwargs)
+                    if _is_final(response.status_code):
+                        cache.set(
+                            cache_key,
+                            (fingerprint, response.status_code, response.data),
+                            IDEMPOTENCY_KEY_TTL,
+                        )
+                finally:
+                    cache.delete(f"{cache_key}:lock")
+                return response
+
+            stored_fingerprint, status_code, data = stored
+            if stored_fingerprint != fingerprint:
+                return Response(
+                    {"error": "Idempotency key was already used for a different request"},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                )
+            response = Response(data, status=status_code)
+            response["Idempotent-Replayed"] = "true"
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,203 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import threading
+from collections import defaultdict
+from contextlib import nullcontext
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger("api.requests")
+
+_current = ContextVar("request_trace", default=None)
+_NO_SPAN = nullcontext()
+
+
+class RequestTrace:
+    __slots__ = ("spans", "queries", "_open")
+
+    def __init__(self):
+        self.spans = defaultdict(float)
+        self.queries = 0
+        self._open = set()
+
+    def __call__(self, execute, sql, params, many, context):
+        # Database execute wrapper
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.spans["db"] += perf_counter() - start
+            self.queries += 1
+
+
+class _Span:
+    __slots__ = ("trace", "name", "start")
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        if self.name in self.trace._open:
+            # Nested spans of one kind count once, at the outermost level
+            self.start = None
+            return
+        self.trace._open.add(self.name)
+        self.start = perf_counter()
+
+    def __exit__(self, *exc_info):
+        if self.start is not None:
+            self.trace.spans[self.name] += perf_counter() - self.start
+            self.trace._open.discard(self.name)
+
+
+def span(name):
+    """Time a block as phase ``name`` of the current trace, if any"""
+    trace = _current.get()
+    if trace is None:
+        return _NO_SPAN
+    return _Span(trace, name)
+
+
+class TimedSerializerMixin:
+    """Count validation, saving and rendering as the ``serializer`` phase"""
+
+    def is_valid(self, *args, **kwargs):
+        with span("serializer"):
+            return super().is_valid(*args, **kwargs)
+
+    def save(self, **kwargs):
+        with span("serializer"):
+            return super().save(**kwargs)
+
+    def to_representation(self, instance):
+        with span("serializer"):
+            return super().to_representation(instance)
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+class RequestTraceMiddleware:
+    """
+    Trace a ``REQUEST_TRACE_SAMPLE_RATE`` share of requests.
+
+    A sampled request adds up time spent in the database, in serializers
+    and in the rest of the view, and is logged as one structured record
+    on ``api.requests``. Other requests only take two clock readings and
+    are logged when slower than ``REQUEST_TRACE_SLOW_MS``. Keep it last in
+    ``MIDDLEWARE`` so the trace covers the view only.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, "REQUEST_TRACE_SAMPLE_RATE", 0.0)
+        self.slow_ms = getattr(settings, "REQUEST_TRACE_SLOW_MS", 1000)
+
+    def __call__(self, request):
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            start = perf_counter()
+            response = self.get_response(request)
+            duration = perf_counter() - start
+            if _ms(duration) >= self.slow_ms:
+                self._log(request, response, duration)
+            return response
+
+        trace = RequestTrace()
+        token = _current.set(trace)
+        start = perf_counter()
+        try:
+            with connection.execute_wrapper(trace):
+                response = self.get_response(request)
+        finally:
+            duration = perf_counter() - start
+            _current.reset(token)
+        self._log(request, response, duration, trace)
+        return response
+
+    def _log(self, request, response, duration, trace=None):
+        # The path only: query strings may carry tokens
+        fields = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "duration_ms": _ms(duration),
+            "sampled": trace is not None,
+        }
+        if trace is not None:
+            db = trace.spans["db"]
+            serializer = trace.spans["serializer"]
+            fields.update(
+                db_ms=_ms(db),
+                db_queries=trace.queries,
+                serializer_ms=_ms(serializer),
+                view_ms=_ms(max(duration - db - serializer, 0)),
+            )
+        logger.info("request", extra={"fields": fields})
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including ``extra={"fields": {...}}``"""
+
+    def format(self, record):
+        payload = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        payload.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class QueueLogHandler(QueueHandler):
+    """
+    Format records on the caller's thread and write them on a background one.
+
+    When the queue is full, records are dropped and counted rather than
+    making the request wait. The writer thread is started lazily in each
+    process, so it survives servers that fork after loading settings.
+    """
+
+    def __init__(self, target=None, maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        self.target = target or logging.StreamHandler()
+        self.dropped = 0
+        self._listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def _start(self):
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._listener = QueueListener(self.queue, self.target, respect_handler_level=True)
+            self._listener.start()
+            self._pid = os.getpid()
+        atexit.register(self.close)
+
+    def enqueue(self, record):
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()
+            self._listener = None
+            self._pid = None
+        super().close()
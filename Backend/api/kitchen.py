@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import OrderItem
+
+KITCHEN_STATUSES = ("confirmed", "preparing", "ready")
+
+# Re-send changes this close to the cursor, so a transaction that commits
+# with a slightly older ``updated`` than the cursor is not missed. Clients
+# upsert orders by id, so the overlap only costs a few repeated rows.
+SYNC_OVERLAP = timedelta(seconds=getattr(settings, "KITCHEN_SYNC_OVERLAP", 2))
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+_ITEM_FIELDS = (
+    "order_id",
+    "order__reference",
+    "order__status",
+    "order__delivery_type",
+    "order__preferred_time",
+    "order__created",
+    "order__updated",
+    "menuitem__name",
+    "quantity",
+    "specialInstructions",
+)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(moment):
+    return str((moment - _EPOCH) // timedelta(microseconds=1))
+
+
+def decode_cursor(cursor):
+    try:
+        return _EPOCH + timedelta(microseconds=int(cursor))
+    except (TypeError, ValueError, OverflowError):
+        raise InvalidCursor(cursor)
+
+
+def kitchen_queue(since=None):
+    """
+    Active kitchen orders with their items, read in a single query.
+
+    Without ``since`` this is every confirmed/preparing/ready order. With a
+    cursor from a previous call it is only orders updated since then,
+    whatever their status, so screens can drop orders that left the queue.
+    Returns ``(orders, cursor)``; pass ``cursor`` as ``since`` next time.
+    """
+    items = OrderItem.objects.all()
+    if since is None:
+        items = items.filter(order__status__in=KITCHEN_STATUSES)
+        cursor = timezone.now()
+    else:
+        cursor = decode_cursor(since)
+        items = items.filter(order__updated__gte=cursor - SYNC_OVERLAP)
+
+    orders = {}
+    for row in items.order_by("order__created", "order_id", "id").values(*_ITEM_FIELDS):
+        order = orders.get(row["order_id"])
+        if order is None:
+            order = orders[row["order_id"]] = {
+                "id": row["order_id"],
+                "reference": row["order__reference"],
+                "status": row["order__status"],
+                "delivery_type": row["order__delivery_type"],
+                "preferred_time": row["order__preferred_time"],
+                "created": row["order__created"],
+                "updated": row["order__updated"],
+                "items": [],
+            }
+            cursor = max(cursor, row["order__updated"])
+        order["items"].append({
+            "name": row["menuitem__name"],
+            "quantity": row["quantity"],
+            "instructions": row["specialInstructions"] or "",
+        })
+    return list(orders.values()), encode_cursor(cursor)
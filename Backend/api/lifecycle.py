@@ -0,0 +1,135 @@
+from django.db import transaction
+from django.utils import timezone
+
+from .events import publish_order_status
+from .models import Order, OrderStatusEvent
+from .roles import is_staff_member
+
+# Where an order may go from each status
+TRANSITIONS = {
+    "pending": ("confirmed", "cancelled"),
+    "confirmed": ("preparing", "cancelled"),
+    "preparing": ("ready", "cancelled"),
+    # Pickup and dine-in orders are handed over straight from the pass
+    "ready": ("in_transit", "delivered"),
+    "in_transit": ("delivered",),
+    "delivered": (),
+    "cancelled": (),
+}
+
+# Statuses each target can be reached from
+SOURCES = {
+    target: tuple(source for source, targets in TRANSITIONS.items() if target in targets)
+    for target in TRANSITIONS
+}
+
+
+# Statuses a customer may still cancel their own order from
+CUSTOMER_CANCELLABLE = ("pending", "confirmed")
+# Moves the crew assigned to a delivery may make
+CREW_TARGETS = ("in_transit", "delivered")
+
+
+class InvalidTransition(ValueError):
+    def __init__(self, current, target):
+        self.current = current
+        self.target = target
+        super().__init__(f"Cannot move an order from {current} to {target}")
+
+
+class TransitionConflict(InvalidTransition):
+    """The order's status changed after the caller read it"""
+
+
+class TransitionNotAllowed(InvalidTransition):
+    """The actor may not make this transition"""
+
+
+def can_transition(current, target):
+    return target in TRANSITIONS.get(current, ())
+
+
+def actor_may_transition(order, target, actor):
+    """
+    Whether ``actor`` may move ``order`` to ``target``.
+
+    ``None`` is the system (payment worker, dispatcher) and may make any
+    legal move. Staff run the kitchen; assigned crew move their deliveries
+    along; customers may only cancel their own order before it is being
+    prepared. Payment confirms orders, so customers can never do that.
+    """
+    if actor is None or is_staff_member(actor):
+        return True
+    if target in CREW_TARGETS and order.delivery_crew_id == actor.pk:
+        return True
+    return (
+        target == "cancelled"
+        and order.customer_id == actor.pk
+        and order.status in CUSTOMER_CANCELLABLE
+    )
+
+
+def transition(order, target, actor=None):
+    """
+    Move ``order`` from the status it was read with to ``target``.
+
+    The change is a single ``UPDATE ... WHERE status = <expected>``, so of
+    two concurrent transitions from the same status exactly one applies;
+    the other raises ``TransitionConflict`` instead of overwriting it.
+    Raises ``TransitionNotAllowed`` if ``actor`` may not make the move.
+    Only ``status`` and ``updated`` are written. The event is appended in
+    the same transaction and published once it commits.
+    """
+    expected = order.status
+    if not can_transition(expected, target):
+        raise InvalidTransition(expected, target)
+    if not actor_may_transition(order, target, actor):
+        raise TransitionNotAllowed(expected, target)
+
+    now = timezone.now()
+    with transaction.atomic():
+        if not Order.objects.filter(pk=order.pk, status=expected).update(status=target, updated=now):
+            current = Order.objects.filter(pk=order.pk).values_list("status", flat=True).first()
+            raise TransitionConflict(current, target)
+        OrderStatusEvent.objects.create(
+            order_id=order.pk, from_status=expected, to_status=target, actor=actor, created=now
+        )
+        order.status, order.updated = target, now
+        publish_order_status(order)
+    return order
+
+
+def bulk_transition(queryset, target, actor=None, **changes):
+    """
+    Move every order in ``queryset`` that may reach ``target`` there.
+
+    Matching rows are locked, moved by one ``UPDATE`` (with any extra
+    field ``changes``) and their events written by one ``INSERT``, however
+    many orders match. Returns the ids of the orders moved; publishing
+    their events is left to the caller.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        rows = list(
+            queryset.select_for_update()
+            .filter(status__in=SOURCES[target])
+            .values_list("id", "status")
+        )
+        if not rows:
+            return []
+        ids = [order_id for order_id, _ in rows]
+        Order.objects.filter(id__in=ids).update(status=target, updated=now, **changes)
+        OrderStatusEvent.objects.bulk_create([
+            OrderStatusEvent(
+                order_id=order_id, from_status=status, to_status=target, actor=actor, created=now
+            )
+            for order_id, status in rows
+        ])
+    return ids
+
+
+def record_creation(order, actor=None):
+    """Append the event for a newly created order"""
+    OrderStatusEvent.objects.create(
+        order_id=order.pk, from_status="", to_status=order.status, actor=actor, created=order.created
+    )
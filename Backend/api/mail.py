@@ -0,0 +1,148 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+MAX_ATTEMPTS = getattr(settings, "OUTBOX_MAX_ATTEMPTS", 5)
+RETRY_DELAY = getattr(settings, "OUTBOX_RETRY_DELAY", 30)
+MAX_RETRY_DELAY = getattr(settings, "OUTBOX_MAX_RETRY_DELAY", 60 * 60)
+CLAIM_LEASE = getattr(settings, "OUTBOX_CLAIM_LEASE", 60 * 5)
+BATCH_SIZE = getattr(settings, "OUTBOX_BATCH_SIZE", 50)
+
+
+def _delivery_backend():
+    return getattr(
+        settings, "OUTBOX_DELIVERY_BACKEND", "django.core.mail.backends.smtp.EmailBackend"
+    )
+
+
+class OutboxEmailBackend(BaseEmailBackend):
+    """
+    Email backend that writes messages to the outbox instead of sending them.
+
+    Set as ``EMAIL_BACKEND`` so ``send_mail`` and djoser emails return as
+    soon as the row is written; ``send_queued_mail`` delivers them through
+    ``OUTBOX_DELIVERY_BACKEND``. Attachments are not supported.
+    """
+
+    def send_messages(self, email_messages):
+        rows = []
+        for message in email_messages:
+            if not message.recipients():
+                continue
+            html_body = next(
+                (content for content, mimetype in getattr(message, "alternatives", ())
+                 if mimetype == "text/html"),
+                "",
+            )
+            rows.append(OutboundEmail(
+                subject=message.subject[:255],
+                body=message.body,
+                html_body=html_body,
+                from_email=message.from_email or settings.DEFAULT_FROM_EMAIL,
+                to=list(message.to),
+                cc=list(message.cc),
+                bcc=list(message.bcc),
+                reply_to=list(message.reply_to),
+                headers=dict(message.extra_headers),
+            ))
+        OutboundEmail.objects.bulk_create(rows)
+        return len(rows)
+
+
+def build_message(row, connection=None):
+    message = EmailMultiAlternatives(
+        subject=row.subject,
+        body=row.body,
+        from_email=row.from_email,
+        to=row.to,
+        cc=row.cc,
+        bcc=row.bcc,
+        reply_to=row.reply_to,
+        headers=row.headers,
+        connection=connection,
+    )
+    if row.html_body:
+        message.attach_alternative(row.html_body, "text/html")
+    return message
+
+
+def claim_batch(batch_size=BATCH_SIZE):
+    """Claim due outbox rows, taking over rows of workers that died mid-send"""
+    now = timezone.now()
+    due = Q(status="queued", available_at__lte=now) | Q(
+        status="sending", claimed_at__lt=now - timedelta(seconds=CLAIM_LEASE)
+    )
+    with transaction.atomic():
+        ids = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(due)
+            .order_by("available_at")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        OutboundEmail.objects.filter(id__in=ids).update(
+            status="sending", claimed_at=now, attempts=F("attempts") + 1
+        )
+    return list(OutboundEmail.objects.filter(id__in=ids).order_by("id"))
+
+
+def _defer(row, exc, now, counts):
+    row.error = f"{type(exc).__name__}: {exc}"
+    if row.attempts >= MAX_ATTEMPTS:
+        row.status = "failed"
+        counts["failed"] += 1
+    else:
+        row.status = "queued"
+        row.available_at = now + timedelta(
+            seconds=min(RETRY_DELAY * 2 ** (row.attempts - 1), MAX_RETRY_DELAY)
+        )
+        counts["retried"] += 1
+
+
+def process_outbox_batch(batch_size=BATCH_SIZE):
+    """
+    Deliver one batch of queued messages over a single connection.
+
+    A failed message is retried with exponential backoff up to
+    ``OUTBOX_MAX_ATTEMPTS`` times; the connection is reopened after a
+    failure so one bad message does not sink the rest of the batch.
+    Returns a count of messages per outcome.
+    """
+    counts = {"sent": 0, "failed": 0, "retried": 0}
+    rows = claim_batch(batch_size)
+    if not rows:
+        return counts
+
+    now = timezone.now()
+    connection = get_connection(_delivery_backend())
+    try:
+        try:
+            connection.open()
+        except Exception as exc:
+            for row in rows:
+                _defer(row, exc, now, counts)
+            return counts
+
+        for row in rows:
+            try:
+                connection.send_messages([build_message(row, connection)])
+            except Exception as exc:
+                _defer(row, exc, now, counts)
+                connection.close()
+                try:
+                    connection.open()
+                except Exception:
+                    pass
+                continue
+            row.status, row.error, row.sent_at = "sent", "", now
+            counts["sent"] += 1
+    finally:
+        connection.close()
+        OutboundEmail.objects.bulk_update(rows, ["status", "error", "available_at", "sent_at"])
+    return counts
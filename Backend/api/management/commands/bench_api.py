@@ -0,0 +1,456 @@
+import json
+import logging
+import math
+import platform
+import random
+import statistics
+import subprocess
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.availability import CLOSING_TIME, OPENING_TIME, SEATING_MINUTES, from_minutes, to_minutes
+from api.catalog import bump_catalog_version
+from api.models import Cart, CartItem, Category, MenuItem, Order, OrderItem, Table, TableBooking
+from api.pagination import MenuPagination
+from api.profiling import QueryRecorder
+from api.serializers import ClaimsTokenObtainPairSerializer
+
+User = get_user_model()
+
+FLOWS = (
+    'menu_browse',
+    'cart_poll',
+    'add_to_cart',
+    'checkout',
+    'available_tables',
+    'delivery_queue',
+)
+FIRST_DAY = date(2030, 1, 15)
+ORDER_STATUSES = ('pending', 'confirmed', 'preparing', 'ready', 'in_transit', 'delivered', 'cancelled')
+CREW_STATUSES = ('ready', 'in_transit', 'delivered')
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[max(math.ceil(len(ordered) * fraction) - 1, 0)]
+
+
+def _ok(status_code):
+    """Whether a flow got the answer it expects; anything else is a failure"""
+    return 200 <= status_code < 300 or status_code == 304
+
+
+def _git(*args):
+    try:
+        result = subprocess.run(
+            ['git', *args], cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=10
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the hot API flows through the real URLconf on a synthetic '
+        'restaurant and save p50/p99 latency, throughput and query counts as '
+        'JSON. Data is created inside a transaction that is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--menu-items', type=int, default=500)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--crew', type=int, default=10)
+        parser.add_argument('--cart-items', type=int, default=3,
+                            help='Items already in each customer cart')
+        parser.add_argument('--orders', type=int, default=5000,
+                            help='Historical orders')
+        parser.add_argument('--tables', type=int, default=40)
+        parser.add_argument('--bookings', type=int, default=2000)
+        parser.add_argument('--days', type=int, default=14,
+                            help='Days the bookings are spread over')
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Measured requests per flow')
+        parser.add_argument('--warmup', type=int, default=20,
+                            help='Unmeasured requests per flow run first')
+        parser.add_argument('--flows', nargs='+', choices=FLOWS, default=list(FLOWS))
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', help='JSON results file (default: bench-api-<commit>.json)')
+        parser.add_argument('--compare', help='Earlier JSON results to print changes against')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            try:
+                baseline = json.loads(Path(options['compare']).read_text())
+            except (OSError, ValueError) as exc:
+                raise CommandError(f'Cannot read {options["compare"]}: {exc}')
+
+        # Per-request INFO logs would drown the report
+        api_logger = logging.getLogger('api')
+        level = api_logger.level
+        api_logger.setLevel(logging.WARNING)
+        try:
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                with transaction.atomic():
+                    results = self._run(options)
+                    raise _Rollback
+        except _Rollback:
+            pass
+        finally:
+            api_logger.setLevel(level)
+            # Cached menu pages and price maps may hold the rolled back items
+            bump_catalog_version()
+
+        commit = _git('rev-parse', '--short', 'HEAD')
+        report = {
+            'commit': commit,
+            'dirty': bool(_git('status', '--porcelain')),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'debug': settings.DEBUG,
+            'options': {
+                name: options[name]
+                for name in (
+                    'menu_items', 'categories', 'users', 'crew', 'cart_items', 'orders',
+                    'tables', 'bookings', 'days', 'requests', 'warmup', 'seed',
+                )
+            },
+            'flows': results,
+        }
+        output = Path(options['output'] or f'bench-api-{commit or "local"}.json')
+        output.write_text(json.dumps(report, indent=2, sort_keys=True) + '\n')
+        self.stdout.write(f'Results written to {output}')
+
+        if baseline is not None:
+            self._compare(baseline, report)
+
+        # Timings of requests that failed measure the error path, not the flow
+        failed = [flow for flow, result in results.items() if result.get('errors')]
+        if failed:
+            raise CommandError(
+                f'Unexpected responses in {", ".join(failed)}; the numbers for '
+                f'{"these flows" if len(failed) > 1 else "this flow"} are not comparable'
+            )
+
+    def _run(self, options):
+        rng = random.Random(options['seed'])
+        started = time.perf_counter()
+        world = self._seed(options, rng)
+        self.stdout.write(
+            f'Seeded {len(world["menu"])} menu items, {len(world["customers"])} customers, '
+            f'{len(world["crew"])} crew, {options["orders"]} orders and '
+            f'{world["bookings"]} bookings in {time.perf_counter() - started:.2f}s'
+        )
+
+        results = {}
+        for flow in options['flows']:
+            results[flow] = self._measure(getattr(self, f'_{flow}'), world, rng, options)
+            self._print(flow, results[flow])
+        return results
+
+    def _seed(self, options, rng):
+        categories = Category.objects.bulk_create([
+            Category(name=f'Bench category {i}', slug=f'bench-category-{i}')
+            for i in range(options['categories'])
+        ])
+        menu = MenuItem.objects.bulk_create(
+            [
+                MenuItem(
+                    name=f'Bench dish {i}',
+                    slug=f'bench-dish-{i}',
+                    price=Decimal(rng.randint(300, 4000)) / 100,
+                    category=rng.choice(categories),
+                    featured=rng.random() < 0.2,
+                )
+                for i in range(options['menu_items'])
+            ],
+            batch_size=1000,
+        )
+
+        # One unusable hash for everyone; tokens are minted directly
+        password = make_password(None)
+        users = User.objects.bulk_create(
+            [
+                User(
+                    email=f'bench-{kind}-{i}@example.com',
+                    username=f'bench-{kind}-{i}@example.com',
+                    first_name='Bench',
+                    last_name=f'{kind} {i}',
+                    password=password,
+                )
+                for kind, count in (('customer', options['users']), ('crew', options['crew']))
+                for i in range(count)
+            ],
+            batch_size=1000,
+        )
+        customers, crew = users[:options['users']], users[options['users']:]
+        crew_group, _ = Group.objects.get_or_create(name='Crew')
+        User.groups.through.objects.bulk_create(
+            [User.groups.through(user_id=user.id, group_id=crew_group.id) for user in crew]
+        )
+
+        carts = Cart.objects.bulk_create([Cart(customer=customer) for customer in customers])
+        CartItem.objects.bulk_create(
+            [
+                CartItem(cart=cart, menuitem=item, quantity=rng.randint(1, 3), price=item.price)
+                for cart in carts
+                for item in rng.sample(menu, min(options['cart_items'], len(menu)))
+            ],
+            batch_size=1000,
+        )
+
+        orders, lines = [], []
+        for i in range(options['orders']):
+            basket = [(item, rng.randint(1, 3)) for item in rng.sample(menu, min(rng.randint(1, 4), len(menu)))]
+            subtotal = sum(item.price * quantity for item, quantity in basket)
+            delivery_type = rng.choice(('delivery', 'pickup', 'dine-in'))
+            status = rng.choice(ORDER_STATUSES)
+            orders.append(Order(
+                customer=rng.choice(customers),
+                reference=f'BENCH-{options["seed"]}-{i}',
+                status=status,
+                subtotal=subtotal,
+                tax=Decimal('0.00'),
+                deliveryFee=Decimal('0.00'),
+                total=subtotal,
+                paymentMethod='card',
+                delivery_type=delivery_type,
+                contact_number='0200000000',
+                paid=status != 'pending',
+                delivery_crew=(
+                    rng.choice(crew)
+                    if crew and delivery_type == 'delivery' and status in CREW_STATUSES else None
+                ),
+            ))
+            lines.append(basket)
+        orders = Order.objects.bulk_create(orders, batch_size=1000)
+        OrderItem.objects.bulk_create(
+            [
+                OrderItem(order=order, menuitem=item, quantity=quantity, price=item.price)
+                for order, basket in zip(orders, lines)
+                for item, quantity in basket
+            ],
+            batch_size=1000,
+        )
+
+        offset = (Table.objects.order_by('-table_number').values_list(
+            'table_number', flat=True).first() or 0) + 1
+        tables = Table.objects.bulk_create(
+            [Table(table_number=offset + i, capacity=rng.choice((2, 4, 6, 8)))
+             for i in range(options['tables'])]
+        )
+        starts = range(to_minutes(OPENING_TIME), to_minutes(CLOSING_TIME) - SEATING_MINUTES + 1, 15)
+        days = [FIRST_DAY + timedelta(days=n) for n in range(max(options['days'], 1))]
+        seen = set()
+        bookings = []
+        capacity = len(tables) * len(starts) * len(days)
+        while tables and len(bookings) < options['bookings'] and len(seen) < capacity:
+            slot = (rng.choice(tables), rng.choice(days), rng.choice(starts))
+            if (slot[0].id, slot[1], slot[2]) in seen:
+                continue
+            seen.add((slot[0].id, slot[1], slot[2]))
+            table, day, start = slot
+            bookings.append(TableBooking(
+                customer=rng.choice(customers), table=table, booking_date=day,
+                booking_time=from_minutes(start), number_of_guests=min(2, table.capacity),
+                status=rng.choice(('pending', 'confirmed', 'cancelled')),
+            ))
+        TableBooking.objects.bulk_create(bookings, batch_size=1000)
+
+        # Menu pages and the price map are cached per catalog version
+        bump_catalog_version()
+
+        # Pages that exist for the whole menu (None) and for each category,
+        # counting items that were there before the benchmark
+        page_size = MenuPagination.page_size
+        menu_pages = {None: max(math.ceil(MenuItem.objects.count() / page_size), 1)}
+        for category_id, items in (
+            MenuItem.objects.filter(category_id__in=[category.id for category in categories])
+            .values_list('category').annotate(items=Count('id')).order_by()
+        ):
+            menu_pages[category_id] = math.ceil(items / page_size)
+
+        return {
+            'categories': [category.id for category in categories],
+            'menu_pages': menu_pages,
+            'menu': [item.id for item in menu],
+            'customers': [self._client(user) for user in customers],
+            'crew': [self._client(user) for user in crew],
+            'days': days,
+            'starts': list(starts),
+            'etags': {},
+            'bookings': len(bookings),
+        }
+
+    def _client(self, user):
+        """An API client sending a bearer token, as the frontend does"""
+        client = APIClient()
+        token = ClaimsTokenObtainPairSerializer.get_token(user).access_token
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        client.user_id = user.id
+        return client
+
+    # Each flow returns (client, method, path, request kwargs, response hook)
+
+    def _menu_browse(self, world, rng):
+        category = None
+        if rng.random() < 0.5 and len(world['menu_pages']) > 1:
+            category = rng.choice([key for key in world['menu_pages'] if key is not None])
+        params = {'page': rng.randint(1, world['menu_pages'][category])}
+        if category is not None:
+            params['category'] = category
+        return rng.choice(world['customers']), 'get', reverse('menuitem-list'), {'data': params}, None
+
+    def _cart_poll(self, world, rng):
+        client = rng.choice(world['customers'])
+        kwargs = {}
+        if client.user_id in world['etags']:
+            kwargs['HTTP_IF_NONE_MATCH'] = world['etags'][client.user_id]
+
+        def remember(response):
+            world['etags'][client.user_id] = response['ETag']
+
+        return client, 'get', reverse('cart-list'), kwargs, remember
+
+    def _add_to_cart(self, world, rng):
+        payload = {'menuitem': rng.choice(world['menu']), 'quantity': rng.randint(1, 3)}
+        return (
+            rng.choice(world['customers']), 'post', reverse('cart-list'),
+            {'data': payload, 'format': 'json'}, None,
+        )
+
+    def _checkout(self, world, rng):
+        delivery_type = rng.choice(('delivery', 'pickup', 'dine-in'))
+        delivery = {'type': delivery_type, 'contactNumber': '0200000000'}
+        if delivery_type == 'delivery':
+            delivery['address'] = '1 Bench Street'
+        else:
+            delivery['preferredTime'] = '18:30'
+        payload = {
+            'items': [
+                {'menuitem': item, 'quantity': rng.randint(1, 3)}
+                for item in rng.sample(world['menu'], min(rng.randint(1, 4), len(world['menu'])))
+            ],
+            'paymentMethod': 'card',
+            'delivery': delivery,
+        }
+        return (
+            rng.choice(world['customers']), 'post', reverse('order-list'),
+            {'data': payload, 'format': 'json'}, None,
+        )
+
+    def _available_tables(self, world, rng):
+        params = {
+            'date': rng.choice(world['days']).isoformat(),
+            'time': from_minutes(rng.choice(world['starts'])).strftime('%H:%M'),
+            'guests': rng.randint(1, 6),
+        }
+        return (
+            rng.choice(world['customers']), 'get', reverse('table-booking-available-tables'),
+            {'data': params}, None,
+        )
+
+    def _delivery_queue(self, world, rng):
+        if not world['crew']:
+            raise CommandError('The delivery_queue flow needs --crew of at least 1')
+        return rng.choice(world['crew']), 'get', reverse('delivery-orders-list'), {}, None
+
+    def _measure(self, flow, world, rng, options):
+        timings, queries, statuses, failure = [], [], {}, None
+        for _ in range(options['warmup']):
+            client, method, path, kwargs, hook = flow(world, rng)
+            response = getattr(client, method)(path, **kwargs)
+            if hook is not None:
+                hook(response)
+
+        started = time.perf_counter()
+        for _ in range(options['requests']):
+            client, method, path, kwargs, hook = flow(world, rng)
+            recorder = QueryRecorder()
+            request_started = time.perf_counter()
+            with connection.execute_wrapper(recorder):
+                response = getattr(client, method)(path, **kwargs)
+            timings.append((time.perf_counter() - request_started) * 1000)
+            queries.append(len(recorder.statements))
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+            if failure is None and not _ok(response.status_code):
+                failure = {
+                    'status': response.status_code,
+                    'method': method.upper(),
+                    'path': response.wsgi_request.get_full_path(),
+                    'body': response.content[:500].decode(errors='replace'),
+                }
+            if hook is not None:
+                hook(response)
+        elapsed = time.perf_counter() - started
+
+        if not timings:
+            return {'requests': 0}
+        return {
+            'requests': len(timings),
+            'errors': sum(count for code, count in statuses.items() if not _ok(int(code))),
+            'first_error': failure,
+            'statuses': statuses,
+            'p50_ms': round(statistics.median(timings), 3),
+            'p99_ms': round(_percentile(timings, 0.99), 3),
+            'mean_ms': round(statistics.fmean(timings), 3),
+            'max_ms': round(max(timings), 3),
+            # One request at a time, so this is what a single worker sustains
+            'throughput_rps': round(len(timings) / elapsed, 1),
+            'queries_mean': round(statistics.fmean(queries), 2),
+            'queries_max': max(queries),
+        }
+
+    def _print(self, flow, result):
+        if not result['requests']:
+            self.stdout.write(f'{flow:<17} no requests')
+            return
+        line = (
+            f'{flow:<17} p50={result["p50_ms"]:8.2f}ms p99={result["p99_ms"]:8.2f}ms '
+            f'{result["throughput_rps"]:8.1f} req/s '
+            f'queries={result["queries_mean"]:.1f} (max {result["queries_max"]})'
+        )
+        if result['errors']:
+            failure = result['first_error']
+            self.stdout.write(self.style.ERROR(
+                f'{line} FAILED errors={result["errors"]} {result["statuses"]}\n'
+                f'{"":<17} first: {failure["status"]} {failure["method"]} {failure["path"]} '
+                f'{failure["body"]}'
+            ))
+        else:
+            self.stdout.write(line)
+
+    def _compare(self, baseline, report):
+        self.stdout.write(f'Changes against {baseline.get("commit") or "baseline"}:')
+        for flow, result in report['flows'].items():
+            before = baseline.get('flows', {}).get(flow)
+            if not before or not before.get('requests') or not result['requests']:
+                continue
+            changes = []
+            for key in ('p50_ms', 'p99_ms', 'throughput_rps'):
+                change = (result[key] - before[key]) / before[key] * 100 if before[key] else 0
+                changes.append(f'{key} {before[key]} -> {result[key]} ({change:+.1f}%)')
+            changes.append(f'queries {before["queries_mean"]} -> {result["queries_mean"]}')
+            self.stdout.write(f'{flow:<17} ' + ', '.join(changes))
@@ -0,0 +1,100 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.models import Category, MenuItem
+from api.search import rebuild_menu_search_index, search_menu_items
+
+SYLLABLES = (
+    'ba be bi bo bu ka ke ki ko ku la le li lo lu ma me mi mo mu na ne ni no '
+    'nu ra re ri ro ru sa se si so su ta te ti to tu ya yo za zo'
+).split()
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark menu search on a synthetic menu. Data is created inside a '
+        'transaction that is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=50000)
+        parser.add_argument('--categories', type=int, default=40)
+        parser.add_argument('--vocabulary', type=int, default=5000)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _timed(self, queryset_factory, queries):
+        timings = []
+        for query in queries:
+            started = time.perf_counter()
+            list(queryset_factory(query).values_list('pk', flat=True)[:20])
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        return statistics.median(timings), timings[int(len(timings) * 0.99) - 1]
+
+    def _run(self, options):
+        rng = random.Random(options['seed'])
+        words = sorted({
+            ''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4)))
+            for _ in range(options['vocabulary'])
+        })
+        categories = Category.objects.bulk_create(
+            [Category(name=f'Bench category {i}', slug=f'bench-category-{i}')
+             for i in range(options['categories'])]
+        )
+        started = time.perf_counter()
+        MenuItem.objects.bulk_create(
+            [
+                MenuItem(
+                    name=f'{" ".join(rng.sample(words, 3))} {i}',
+                    slug=f'bench-item-{i}',
+                    price=rng.randint(100, 5000) / 100,
+                    category=rng.choice(categories),
+                    description=' '.join(rng.choices(words, k=8)),
+                )
+                for i in range(options['items'])
+            ],
+            batch_size=1000,
+        )
+        indexed = rebuild_menu_search_index()
+        self.stdout.write(
+            f'Seeded and indexed {indexed} items in {time.perf_counter() - started:.2f}s'
+        )
+
+        # Half typeahead prefixes, half "complete word + partial word"
+        queries = [
+            rng.choice(words)[:rng.randint(3, 5)] if rng.random() < 0.5
+            else f'{rng.choice(words)} {rng.choice(words)[:3]}'
+            for _ in range(options['queries'])
+        ]
+        base = MenuItem.objects.all()
+
+        p50, p99 = self._timed(lambda q: search_menu_items(base, q), queries)
+        self.stdout.write(f'token index: p50={p50:.2f}ms p99={p99:.2f}ms')
+
+        def icontains(query):
+            queryset = base
+            for word in query.split():
+                queryset = queryset.filter(name__icontains=word) | queryset.filter(
+                    description__icontains=word
+                )
+            return queryset
+
+        p50, p99 = self._timed(icontains, queries)
+        self.stdout.write(f'icontains scan: p50={p50:.2f}ms p99={p99:.2f}ms')
@@ -0,0 +1,97 @@
+import asyncio
+import json
+import statistics
+import threading
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from api.events import InProcessBroker, event_stream
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure how many Server-Sent Events clients one worker process can '
+        'hold and how quickly order events fan out to them.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=5000)
+        parser.add_argument('--staff', type=int, default=50,
+                            help='Clients also subscribed to the staff feed')
+        parser.add_argument('--events', type=int, default=200)
+        parser.add_argument('--rate', type=float, default=200.0,
+                            help='Events published per second from a worker thread')
+
+    def handle(self, *args, **options):
+        asyncio.run(self._run(options))
+
+    async def _client(self, index, options, broker, latencies, ready):
+        topics = {f'customer:{index}'}
+        if index < options['staff']:
+            topics.add('staff')
+        stream = event_stream(topics, broker=broker, heartbeat=3600)
+        await stream.__anext__()  # ": connected", subscription is live
+        ready.release()
+        try:
+            async for chunk in stream:
+                if chunk.startswith('event:'):
+                    payload = json.loads(chunk.split('data: ', 1)[1])
+                    latencies.append(time.perf_counter() - payload['sent'])
+        finally:
+            await stream.aclose()
+
+    def _publish(self, broker, options):
+        interval = 1 / options['rate']
+        for i in range(options['events']):
+            # Alternate single-customer events with staff-wide broadcasts
+            topics = ['staff'] if i % 10 == 0 else [f'customer:{i % options["clients"]}']
+            broker.publish(topics, {'type': 'order.status', 'order': i, 'sent': time.perf_counter()})
+            time.sleep(interval)
+
+    async def _run(self, options):
+        broker = InProcessBroker()
+        latencies = []
+        ready = asyncio.Semaphore(0)
+
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        tasks = [
+            asyncio.create_task(self._client(i, options, broker, latencies, ready))
+            for i in range(options['clients'])
+        ]
+        for _ in tasks:
+            await ready.acquire()
+        connect_time = time.perf_counter() - started
+        per_client = (tracemalloc.get_traced_memory()[0] - baseline) / options['clients']
+        tracemalloc.stop()
+
+        self.stdout.write(
+            f'{broker.subscriber_count()} clients connected in {connect_time:.2f}s, '
+            f'~{per_client / 1024:.1f} KiB each'
+        )
+
+        publisher = threading.Thread(target=self._publish, args=(broker, options))
+        started = time.perf_counter()
+        publisher.start()
+        await asyncio.to_thread(publisher.join)
+        await asyncio.sleep(0.5)
+        elapsed = time.perf_counter() - started
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        if not latencies:
+            self.stdout.write('No events delivered')
+            return
+        latencies.sort()
+        p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)]
+        self.stdout.write(
+            f'{options["events"]} events -> {len(latencies)} deliveries in {elapsed:.2f}s; '
+            f'latency p50={statistics.median(latencies) * 1000:.2f}ms '
+            f'p99={p99 * 1000:.2f}ms max={latencies[-1] * 1000:.2f}ms'
+        )
+        self.stdout.write(f'{broker.subscriber_count()} subscribers left after disconnect')
@@ -0,0 +1,49 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.utils import OrderReferenceAllocator
+
+
+class Command(BaseCommand):
+    help = 'Measure order reference allocation throughput under concurrent threads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--count', type=int, default=50000,
+                            help='References allocated per thread')
+
+    def handle(self, *args, **options):
+        threads = options['threads']
+        count = options['count']
+        allocator = OrderReferenceAllocator()
+        results = [None] * threads
+        barrier = threading.Barrier(threads + 1)
+
+        def worker(index):
+            barrier.wait()
+            results[index] = [allocator.allocate() for _ in range(count)]
+
+        workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+        for thread in workers:
+            thread.start()
+
+        barrier.wait()
+        started = time.perf_counter()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        references = [ref for chunk in results for ref in chunk]
+        duplicates = len(references) - len(set(references))
+        rate = len(references) / elapsed if elapsed else float('inf')
+
+        self.stdout.write(
+            f'{len(references)} references on {threads} threads in {elapsed:.3f}s '
+            f'({rate:,.0f}/s), {duplicates} duplicates'
+        )
+        if duplicates:
+            self.stderr.write(self.style.ERROR('Duplicate references allocated'))
+        else:
+            self.stdout.write(self.style.SUCCESS('All references unique'))
@@ -0,0 +1,127 @@
+import random
+import statistics
+import time
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.availability import (
+    CLOSING_TIME,
+    OPENING_TIME,
+    SEATING_MINUTES,
+    DayAvailability,
+    from_minutes,
+    to_minutes,
+)
+from api.models import Table, TableBooking
+
+User = get_user_model()
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark table availability on a synthetic floor plan. Data is created '
+        'inside a transaction that is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tables', type=int, default=300)
+        parser.add_argument('--bookings', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _timed(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = func()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings), max(timings), result
+
+    def _run(self, options):
+        rng = random.Random(options['seed'])
+        day = date(2030, 1, 15)
+        customer = User.objects.create_user(
+            email='bench-availability@example.com', password=None
+        )
+        offset = (Table.objects.order_by('-table_number').values_list(
+            'table_number', flat=True).first() or 0) + 1
+        tables = Table.objects.bulk_create(
+            [Table(table_number=offset + i, capacity=rng.choice((2, 4, 6, 8)))
+             for i in range(options['tables'])]
+        )
+
+        # Quarter-hour start times; keep bookings unique per table and time
+        starts = range(to_minutes(OPENING_TIME), to_minutes(CLOSING_TIME) - SEATING_MINUTES + 1, 15)
+        seen = set()
+        bookings = []
+        while len(bookings) < options['bookings'] and len(seen) < len(tables) * len(starts):
+            table = rng.choice(tables)
+            start = rng.choice(starts)
+            if (table.id, start) in seen:
+                continue
+            seen.add((table.id, start))
+            bookings.append(TableBooking(
+                customer=customer, table=table, booking_date=day,
+                booking_time=from_minutes(start), number_of_guests=min(2, table.capacity),
+                status=rng.choice(('pending', 'confirmed', 'cancelled')),
+            ))
+        TableBooking.objects.bulk_create(bookings, batch_size=1000)
+        self.stdout.write(f'Seeded {len(tables)} tables and {len(bookings)} bookings')
+
+        p50, worst, grid = self._timed(
+            lambda: DayAvailability(day).grid(guests=2), options['repeat']
+        )
+        cells = len(grid) * len(tables)
+        self.stdout.write(
+            f'day grid ({len(grid)} slots x {len(tables)} tables = {cells} cells): '
+            f'p50={p50:.2f}ms max={worst:.2f}ms'
+        )
+
+        availability = DayAvailability(day)
+        p50, worst, _ = self._timed(
+            lambda: [availability.free_tables(slot, 2) for slot, _ in grid],
+            options['repeat'],
+        )
+        self.stdout.write(
+            f'single slots from a loaded day ({len(grid)} lookups): '
+            f'p50={p50:.2f}ms max={worst:.2f}ms'
+        )
+
+        def per_slot_queries():
+            # The naive approach: one query per slot for overlapping bookings
+            result = []
+            for slot, _ in grid:
+                start = to_minutes(slot)
+                window = (
+                    from_minutes(max(start - SEATING_MINUTES + 1, 0)),
+                    from_minutes(min(start + SEATING_MINUTES - 1, 24 * 60 - 1)),
+                )
+                busy = TableBooking.objects.filter(
+                    booking_date=day, booking_time__range=window,
+                    status__in=('pending', 'confirmed'),
+                ).values('table_id')
+                result.append(list(
+                    Table.objects.filter(is_active=True, capacity__gte=2)
+                    .exclude(id__in=busy).values_list('id', flat=True)
+                ))
+            return result
+
+        p50, worst, _ = self._timed(per_slot_queries, max(1, options['repeat'] // 4))
+        self.stdout.write(
+            f'one query per slot: p50={p50:.2f}ms max={worst:.2f}ms'
+        )
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.dispatch import BATCH_SIZE, dispatch_ready_orders
+
+
+class Command(BaseCommand):
+    help = 'Assign ready delivery orders to delivery crew by load'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help='Seconds to sleep when nothing was assigned')
+        parser.add_argument('--once', action='store_true',
+                            help='Run a single dispatch round and exit')
+
+    def handle(self, *args, **options):
+        while True:
+            assigned = dispatch_ready_orders(options['batch_size'])
+            if assigned:
+                self.stdout.write(f'assigned={len(assigned)}')
+            if options['once']:
+                return
+            if not assigned:
+                time.sleep(options['interval'])
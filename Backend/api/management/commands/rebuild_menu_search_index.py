@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.search import rebuild_menu_search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the menu item search token index'
+
+    def handle(self, *args, **options):
+        indexed = rebuild_menu_search_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} menu items'))
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.events import get_broker
+from api.payments import BATCH_SIZE, process_verification_batch
+
+
+class Command(BaseCommand):
+    help = 'Drain the Paystack payment verification queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--once', action='store_true',
+                            help='Process a single batch and exit')
+
+    def handle(self, *args, **options):
+        if not get_broker().shared_between_processes:
+            self.stderr.write(
+                'ORDER_EVENTS_BROKER is process-local: payment confirmations '
+                'will not reach order streams. Set REDIS_URL to relay them.'
+            )
+        while True:
+            counts = process_verification_batch(options['batch_size'])
+            if any(counts.values()):
+                self.stdout.write(
+                    f"verified={counts['verified']} failed={counts['failed']} "
+                    f"retried={counts['retried']}"
+                )
+            if options['once']:
+                return
+            if not any(counts.values()):
+                time.sleep(options['interval'])
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.mail import BATCH_SIZE, process_outbox_batch
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued outbox emails'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help='Seconds to sleep when the outbox is empty')
+        parser.add_argument('--once', action='store_true',
+                            help='Process a single batch and exit')
+
+    def handle(self, *args, **options):
+        while True:
+            counts = process_outbox_batch(options['batch_size'])
+            if any(counts.values()):
+                self.stdout.write(
+                    f"sent={counts['sent']} failed={counts['failed']} "
+                    f"retried={counts['retried']}"
+                )
+            if options['once']:
+                return
+            if not any(counts.values()):
+                time.sleep(options['interval'])
@@ -0,0 +1,238 @@
+import threading
+from bisect import bisect_left
+from time import perf_counter
+
+# Seconds; suits both API requests and Paystack calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """
+    A metric whose samples are kept in one shard per thread.
+
+    A thread only ever writes its own shard, so recording takes no lock;
+    the lock is held when a thread records for the first time and while
+    the shards are collected. Label values are passed positionally, in
+    the order of ``labelnames``.
+    """
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append(shard)
+            return shard
+
+    def _check(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {labels}")
+
+    def _collect(self):
+        with self._lock:
+            # dict.copy() is atomic, so writers need not stop
+            return [shard.copy() for shard in self._shards]
+
+    def reset(self):
+        with self._lock:
+            for shard in self._shards:
+                shard.clear()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        self._check(labels)
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def values(self):
+        totals = {}
+        for shard in self._collect():
+            for labels, value in shard.items():
+                totals[labels] = totals.get(labels, 0) + value
+        return totals
+
+    def _samples(self):
+        for labels, value in sorted(self.values().items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class Histogram(Metric):
+    """Observations counted into fixed ``buckets``, plus their sum"""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        self._check(labels)
+        shard = self._shard()
+        # One slot per bucket, one for +Inf, then the sum
+        slots = shard.get(labels)
+        if slots is None:
+            slots = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        slots[bisect_left(self.buckets, value)] += 1
+        slots[-1] += value
+
+    def time(self, *labels):
+        return _Timer(self, labels)
+
+    def values(self):
+        totals = {}
+        for shard in self._collect():
+            for labels, slots in shard.items():
+                total = totals.setdefault(labels, [0] * len(slots))
+                for i, value in enumerate(slots):
+                    total[i] += value
+        return totals
+
+    def _samples(self):
+        bounds = [_number(float(bound)) for bound in self.buckets] + ["+Inf"]
+        for labels, slots in sorted(self.values().items()):
+            cumulative = 0
+            for bound, count in zip(bounds, slots):
+                cumulative += count
+                yield (
+                    f"{self.name}_bucket{_labels(self.labelnames, labels, [('le', bound)])} "
+                    f"{cumulative}"
+                )
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(slots[-1])}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(perf_counter() - self.start, *self.labels)
+
+
+class Registry:
+    """
+    The metrics of this process, rendered in the Prometheus text format.
+
+    Every worker process has its own numbers; scrape each one, or label
+    them by instance, as with any multi-process Prometheus target.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+    def reset(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.reset()
+
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.histogram(
+    "api_request_duration_seconds",
+    "Time to answer an API request, by resolved route.",
+    ("method", "route", "status"),
+)
+CART_MUTATIONS = registry.counter(
+    "api_cart_mutations_total",
+    "Cart items added, updated or removed.",
+    ("action",),
+)
+ORDERS_CREATED = registry.counter(
+    "api_orders_created_total",
+    "Orders placed, by delivery type.",
+    ("delivery_type",),
+)
+PAYSTACK_VERIFICATION = registry.histogram(
+    "api_paystack_verification_seconds",
+    "Time to verify a transaction with Paystack, by outcome.",
+    ("outcome",),
+)
+BOOKING_CONFLICTS = registry.counter(
+    "api_booking_conflicts_total",
+    "Table bookings that passed validation but lost their slot to a concurrent booking.",
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class RequestMetricsMiddleware:
+    """
+    Observe every request's latency in ``REQUEST_LATENCY``.
+
+    Routes are URL names rather than paths, so ids in URLs do not add
+    series. Keep it first in ``MIDDLEWARE`` to time the whole stack.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = perf_counter()
+        response = self.get_response(request)
+        match = getattr(request, "resolver_match", None)
+        route = match.view_name if match is not None else "unmatched"
+        REQUEST_LATENCY.observe(
+            perf_counter() - start, request.method, route, f"{response.status_code // 100}xx"
+        )
+        return response
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.6 on 2026-10-17 16:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_remove_cartitem_unit_price'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['-created', '-id'], name='api_order_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tablebooking',
+            index=models.Index(fields=['-created', '-id'], name='api_booking_created_id_idx'),
+        ),
+    ]
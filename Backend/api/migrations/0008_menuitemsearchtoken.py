@@ -0,0 +1,45 @@
+# Generated by Django 5.0.6 on 2026-10-17 16:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_search_index(apps, schema_editor):
+    from api.search import tokenize
+
+    MenuItem = apps.get_model('api', 'MenuItem')
+    MenuItemSearchToken = apps.get_model('api', 'MenuItemSearchToken')
+    tokens = []
+    for menu_item in MenuItem.objects.select_related('category').iterator():
+        words = set(
+            tokenize(menu_item.name)
+            + tokenize(menu_item.description)
+            + tokenize(menu_item.category.name)
+        )
+        tokens.extend(
+            MenuItemSearchToken(menuitem_id=menu_item.pk, token=word) for word in words
+        )
+    MenuItemSearchToken.objects.bulk_create(tokens, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_order_booking_created_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MenuItemSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=64)),
+                ('menuitem', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='api.menuitem')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['token'], name='api_search_token_prefix_idx', opclasses=['varchar_pattern_ops'])],
+                'unique_together': {('token', 'menuitem')},
+            },
+        ),
+        migrations.RunPython(build_search_index, migrations.RunPython.noop),
+    ]
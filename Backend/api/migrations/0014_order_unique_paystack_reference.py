@@ -0,0 +1,38 @@
+from django.db import migrations, models
+
+
+def release_shared_references(apps, schema_editor):
+    """Keep each reference on one order (a paid one first), clear it elsewhere"""
+    Order = apps.get_model('api', 'Order')
+    seen = set()
+    duplicates = []
+    orders = (
+        Order.objects.exclude(paystack_reference__isnull=True)
+        .exclude(paystack_reference='')
+        .order_by('paystack_reference', '-paid', 'id')
+        .values_list('id', 'paystack_reference')
+    )
+    for order_id, reference in orders.iterator():
+        if reference in seen:
+            duplicates.append(order_id)
+        seen.add(reference)
+    Order.objects.filter(id__in=duplicates).update(paystack_reference=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_order_status_events'),
+    ]
+
+    operations = [
+        migrations.RunPython(release_shared_references, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='order',
+            constraint=models.UniqueConstraint(
+                condition=models.Q(('paystack_reference__isnull', False), models.Q(('paystack_reference', ''), _negated=True)),
+                fields=('paystack_reference',),
+                name='unique_paystack_reference',
+            ),
+        ),
+    ]
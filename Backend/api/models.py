@@ -5,6 +5,7 @@ from django.core.validators import MinValueValidator, MaxValueValidator
 from decimal import Decimal
 from django.core.exceptions import ValidationError
 from django.conf import settings
+from django.utils import timezone
 
 class CustomUserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
@@ -40,12 +41,9 @@ class User(AbstractUser):
     @property
     def role(self):
         """Return the user's role based on their group"""
+        from .roles import get_role
 
-        if self.groups.filter(name='Managers').exists():
-            return 'manager'
-        if self.groups.filter(name='Crew').exists():
-            return 'delivery'
-        return 'customer'
+        return get_role(self)
 
 class Category(models.Model):
     name = models.CharField(max_length=255, unique=True)
@@ -94,6 +92,29 @@ class MenuItem(models.Model):
         return self.name
 
 
+class MenuItemSearchToken(models.Model):
+    """Inverted index entry: one normalised token of a menu item's text"""
+
+    menuitem = models.ForeignKey(
+        MenuItem, on_delete=models.CASCADE, related_name="search_tokens"
+    )
+    token = models.CharField(max_length=64)
+
+    class Meta:
+        unique_together = ("token", "menuitem")
+        indexes = [
+            # Prefix lookups (token LIKE 'abc%') for typeahead
+            models.Index(
+                fields=["token"],
+                name="api_search_token_prefix_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.token} -> {self.menuitem_id}"
+
+
 class Cart(models.Model):
     customer = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     created = models.DateTimeField(auto_now_add=True)
@@ -159,6 +180,7 @@ class TableBooking(models.Model):
         indexes = [
             models.Index(fields=['booking_date', 'booking_time']),
             models.Index(fields=['status']),
+            models.Index(fields=['-created', '-id'], name='api_booking_created_id_idx'),
         ]
         # Prevent double booking
         constraints = [
@@ -181,6 +203,16 @@ class TableBooking(models.Model):
         self.clean()
         super().save(*args, **kwargs)
 
+class OrderQuerySet(models.QuerySet):
+    def with_details(self):
+        """Load the customer and items with their menu items up front"""
+        return self.select_related('customer').prefetch_related(
+            models.Prefetch(
+                'items', queryset=OrderItem.objects.select_related('menuitem')
+            )
+        )
+
+
 class Order(models.Model):
     customer = models.ForeignKey(User, on_delete=models.CASCADE)
     reference = models.CharField(max_length=100, unique=True)
@@ -189,6 +221,7 @@ class Order(models.Model):
         ('confirmed', 'Confirmed'),
         ('preparing', 'Preparing'),
         ('ready', 'Ready'),
+        ('in_transit', 'In transit'),
         ('delivered', 'Delivered'),
         ('cancelled', 'Cancelled')
     ], default='pending')
@@ -205,17 +238,141 @@ class Order(models.Model):
     contact_number = models.CharField(max_length=20)
     preferred_time = models.CharField(max_length=20, null=True, blank=True)
     
+    # Assigned by the dispatcher, see api/dispatch.py
+    delivery_crew = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='deliveries'
+    )
+
     # Payment fields
-    paystack_reference = models.CharField(max_length=100, null=True, blank=True)
+    paystack_reference = models.CharField(max_length=100, null=True, blank=True, db_index=True)
     paid = models.BooleanField(default=False)
     
     # Timestamps
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
 
+    objects = OrderQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination and "latest orders" listings
+            models.Index(fields=['-created', '-id'], name='api_order_created_id_idx'),
+            # Kitchen queue: active orders and "changed since" sync
+            models.Index(fields=['status'], name='api_order_status_idx'),
+            models.Index(fields=['updated'], name='api_order_updated_idx'),
+            # Crew load counts and "my deliveries"
+            models.Index(fields=['delivery_crew', 'status'], name='api_order_crew_status_idx'),
+        ]
+        constraints = [
+            # One payment can only ever pay for one order
+            models.UniqueConstraint(
+                fields=['paystack_reference'],
+                condition=models.Q(paystack_reference__isnull=False) & ~models.Q(paystack_reference=''),
+                name='unique_paystack_reference',
+            ),
+        ]
+
     def __str__(self):
         return f"Order {self.reference}"
 
+class OrderStatusEvent(models.Model):
+    """
+    One order status transition, appended by api/lifecycle.py.
+
+    Rows are never updated; ``from_status`` is blank for the event
+    recording an order's creation.
+    """
+
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='status_events')
+    from_status = models.CharField(max_length=20, blank=True)
+    to_status = models.CharField(max_length=20)
+    actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['order', 'created'], name='api_statusevent_order_idx'),
+            # Funnel and time-in-status reports
+            models.Index(fields=['to_status', 'created'], name='api_statusevent_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"Order {self.order_id}: {self.from_status or '-'} -> {self.to_status}"
+
+class PaymentVerification(models.Model):
+    """
+    A queued Paystack verification, one per transaction reference.
+
+    Rows are written by the webhook and verify endpoints and drained by the
+    ``run_payment_worker`` command, see api/payments.py.
+    """
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('verified', 'Verified'),
+        ('failed', 'Failed'),
+    ]
+
+    reference = models.CharField(max_length=100, unique=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='api_payverify_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"Verification {self.reference} ({self.status})"
+
+
+class OutboundEmail(models.Model):
+    """
+    A message waiting in the outbox.
+
+    Written by ``api.mail.OutboxEmailBackend`` and delivered by the
+    ``send_queued_mail`` command.
+    """
+
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=255)
+    to = models.JSONField(default=list)
+    cc = models.JSONField(default=list)
+    bcc = models.JSONField(default=list)
+    reply_to = models.JSONField(default=list)
+    headers = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='api_outbox_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
+
+
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, related_name='items', on_delete=models.CASCADE)
     menuitem = models.ForeignKey(MenuItem, on_delete=models.CASCADE)
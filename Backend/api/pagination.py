@@ -0,0 +1,31 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+# Upper bound on ?page_size= for every paginated endpoint
+MAX_PAGE_SIZE = getattr(settings, "API_MAX_PAGE_SIZE", 100)
+
+
+class StandardPageNumberPagination(PageNumberPagination):
+    page_size = getattr(settings, "API_PAGE_SIZE", 50)
+    page_size_query_param = "page_size"
+    max_page_size = MAX_PAGE_SIZE
+
+
+class MenuPagination(StandardPageNumberPagination):
+    # The whole menu normally fits on one page
+    page_size = getattr(settings, "MENU_PAGE_SIZE", 100)
+    max_page_size = max(MAX_PAGE_SIZE, page_size)
+
+
+class CreatedCursorPagination(CursorPagination):
+    """
+    Keyset pagination on (created, id), newest first.
+
+    Each page is an index range scan, so the cost does not grow with the
+    size of the table the way OFFSET does.
+    """
+
+    page_size = getattr(settings, "API_CURSOR_PAGE_SIZE", 20)
+    page_size_query_param = "page_size"
+    max_page_size = MAX_PAGE_SIZE
+    ordering = ("-created", "-id")
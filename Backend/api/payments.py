@@ -0,0 +1,189 @@
+import hashlib
+import hmac
+from datetime import timedelta
+from decimal import Decimal
+from time import perf_counter
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import paystack
+from .events import publish_order_status
+from .lifecycle import bulk_transition
+from .metrics import PAYSTACK_VERIFICATION
+from .models import Order, PaymentVerification
+from .paystack import PaystackError, PaystackUnavailable
+
+MAX_ATTEMPTS = getattr(settings, "PAYMENT_VERIFY_MAX_ATTEMPTS", 8)
+RETRY_DELAY = getattr(settings, "PAYMENT_VERIFY_RETRY_DELAY", 15)
+MAX_RETRY_DELAY = getattr(settings, "PAYMENT_VERIFY_MAX_RETRY_DELAY", 60 * 30)
+CLAIM_LEASE = getattr(settings, "PAYMENT_VERIFY_CLAIM_LEASE", 60 * 5)
+BATCH_SIZE = getattr(settings, "PAYMENT_VERIFY_BATCH_SIZE", 50)
+
+# Paystack transaction states that may still turn into a success
+IN_FLIGHT_STATUSES = {"ongoing", "pending", "processing", "queued"}
+
+
+def valid_webhook_signature(body, signature):
+    """Check the ``X-Paystack-Signature`` HMAC-SHA512 of a webhook body"""
+    if not signature:
+        return False
+    expected = hmac.new(
+        settings.PAYSTACK_SECRET_KEY.encode(), body, hashlib.sha512
+    ).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def order_id_from_metadata(metadata):
+    """The order id the checkout page put in a transaction's metadata"""
+    if not isinstance(metadata, dict):
+        return None
+    order_id = metadata.get("order_id")
+    for field in metadata.get("custom_fields") or ():
+        if isinstance(field, dict) and field.get("variable_name") == "order_id":
+            order_id = field.get("value")
+    try:
+        return int(order_id)
+    except (TypeError, ValueError):
+        return None
+
+
+class ReferenceInUse(ValueError):
+    """The Paystack reference already belongs to another order"""
+
+
+def attach_reference(order_id, reference):
+    """
+    Record the Paystack reference on an unpaid order in a single UPDATE.
+
+    A reference pays for one order only: raises ``ReferenceInUse`` if
+    another order holds it, which the ``unique_paystack_reference``
+    constraint also enforces against concurrent requests.
+    """
+    if Order.objects.filter(paystack_reference=reference).exclude(pk=order_id).exists():
+        raise ReferenceInUse(reference)
+    try:
+        with transaction.atomic():
+            return Order.objects.filter(pk=order_id, paid=False).update(
+                paystack_reference=reference, updated=timezone.now()
+            )
+    except IntegrityError:
+        raise ReferenceInUse(reference)
+
+
+def enqueue_verification(reference):
+    """Queue a verification; repeated calls for a reference are no-ops"""
+    PaymentVerification.objects.bulk_create(
+        [PaymentVerification(reference=reference)], ignore_conflicts=True
+    )
+
+
+def claim_batch(batch_size=BATCH_SIZE):
+    """
+    Claim up to ``batch_size`` due verifications for this worker.
+
+    Rows locked by another worker are skipped. Claims older than
+    ``CLAIM_LEASE`` seconds belong to a worker that died and are taken over.
+    """
+    now = timezone.now()
+    due = Q(status="pending", available_at__lte=now) | Q(
+        status="processing", claimed_at__lt=now - timedelta(seconds=CLAIM_LEASE)
+    )
+    with transaction.atomic():
+        ids = list(
+            PaymentVerification.objects.select_for_update(skip_locked=True)
+            .filter(due)
+            .order_by("available_at")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        PaymentVerification.objects.filter(id__in=ids).update(
+            status="processing", claimed_at=now, attempts=F("attempts") + 1
+        )
+    return list(PaymentVerification.objects.filter(id__in=ids))
+
+
+def _retry(job, error, now):
+    if job.attempts >= MAX_ATTEMPTS:
+        job.status = "failed"
+        job.error = f"Gave up after {job.attempts} attempts: {error}"
+        return "failed"
+    delay = min(RETRY_DELAY * 2 ** (job.attempts - 1), MAX_RETRY_DELAY)
+    job.status = "pending"
+    job.error = error
+    job.available_at = now + timedelta(seconds=delay)
+    return "retried"
+
+
+def _verify(client, job, orders, now):
+    """Check one job's transaction with Paystack and return its outcome"""
+    try:
+        data = client.verify_transaction(job.reference)
+    except PaystackUnavailable as exc:
+        return _retry(job, str(exc), now)
+    except PaystackError as exc:
+        job.status, job.error = "failed", str(exc)
+        return "failed"
+
+    state = data.get("status")
+    if state in IN_FLIGHT_STATUSES:
+        return _retry(job, f"Transaction is {state}", now)
+    if state != "success":
+        job.status, job.error = "failed", f"Transaction {state or 'failed'}"
+        return "failed"
+    if job.reference not in orders:
+        # The webhook can beat the checkout page to attaching the reference
+        return _retry(job, "No order with this reference yet", now)
+    if abs(Decimal(str(data.get("amount", 0))) / 100 - orders[job.reference][1]) > Decimal("0.01"):
+        job.status, job.error = "failed", "Payment amount does not match order amount"
+        return "failed"
+    job.status, job.error = "verified", ""
+    return "verified"
+
+
+def process_verification_batch(batch_size=BATCH_SIZE, client=None):
+    """
+    Verify one batch of queued references against Paystack.
+
+    Order totals for the whole batch are read in one query. Paid pending
+    orders are confirmed together through ``bulk_transition`` and the rest
+    marked paid by one conditional ``UPDATE``, so a concurrent
+    verification of the same order cannot apply twice.
+    Returns a count of jobs per outcome.
+    """
+    counts = {"verified": 0, "failed": 0, "retried": 0}
+    jobs = claim_batch(batch_size)
+    if not jobs:
+        return counts
+
+    client = client or paystack.get_client()
+    # References are unique, so each one names at most one order
+    orders = {
+        reference: (order_id, total)
+        for order_id, reference, total in Order.objects.filter(
+            paystack_reference__in=[job.reference for job in jobs]
+        ).values_list("id", "paystack_reference", "total")
+    }
+    confirmed = []
+    now = timezone.now()
+
+    for job in jobs:
+        start = perf_counter()
+        outcome = _verify(client, job, orders, now)
+        PAYSTACK_VERIFICATION.observe(perf_counter() - start, outcome)
+        counts[outcome] += 1
+        if outcome == "verified":
+            confirmed.append(orders[job.reference][0])
+
+    with transaction.atomic():
+        if confirmed:
+            unpaid = Order.objects.filter(id__in=confirmed, paid=False)
+            bulk_transition(unpaid.filter(status="pending"), "confirmed", paid=True)
+            unpaid.update(paid=True, updated=now)
+            for order in Order.objects.filter(id__in=confirmed).only(
+                "id", "customer_id", "reference", "status", "paid", "delivery_crew_id"
+            ):
+                publish_order_status(order)
+        PaymentVerification.objects.bulk_update(jobs, ["status", "error", "available_at"])
+    return counts
@@ -0,0 +1,188 @@
+import threading
+import time
+from urllib.parse import quote
+
+import requests
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_BASE_URL = "https://api.paystack.co"
+
+
+class PaystackError(Exception):
+    """Paystack answered, but not with a usable result"""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class PaystackUnavailable(PaystackError):
+    """Paystack could not be reached in time, or the circuit is open"""
+
+
+class CircuitBreaker:
+    """
+    Stop calling a failing upstream for a while.
+
+    After ``threshold`` consecutive failures the breaker opens and calls
+    fail fast for ``reset_timeout`` seconds. The first call after that is
+    let through as a probe; its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+
+    @property
+    def is_open(self):
+        with self._lock:
+            return self._opened_at is not None
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._clock() - self._opened_at >= self.reset_timeout:
+                # Half-open: let one probe through and hold the others back
+                self._opened_at = self._clock()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.threshold:
+                self._opened_at = self._clock()
+
+
+class PaystackClient:
+    """
+    Thin Paystack API client over a pooled keep-alive session.
+
+    Every request is bounded by ``(connect_timeout, read_timeout)``.
+    Idempotent GETs are retried on connection errors and 429/5xx answers
+    with exponential backoff; repeated failures open a circuit breaker so
+    a Paystack outage fails fast instead of tying up request workers.
+    """
+
+    def __init__(
+        self,
+        secret_key,
+        base_url=DEFAULT_BASE_URL,
+        connect_timeout=3.05,
+        read_timeout=10,
+        max_retries=2,
+        backoff_factor=0.3,
+        pool_size=10,
+        breaker=None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.breaker = breaker or CircuitBreaker()
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"Bearer {secret_key}",
+            "Content-Type": "application/json",
+        })
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({"GET"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _get(self, path):
+        if not self.breaker.allow():
+            raise PaystackUnavailable("Paystack is temporarily unavailable")
+        try:
+            response = self.session.get(f"{self.base_url}{path}", timeout=self.timeout)
+        except requests.RequestException as exc:
+            self.breaker.record_failure()
+            raise PaystackUnavailable(f"Paystack request failed: {exc}") from exc
+
+        if response.status_code >= 500 or response.status_code == 429:
+            self.breaker.record_failure()
+            raise PaystackUnavailable(
+                "Paystack is temporarily unavailable", status_code=response.status_code
+            )
+        self.breaker.record_success()
+
+        if response.status_code != 200:
+            raise PaystackError(
+                "Failed to verify payment with Paystack", status_code=response.status_code
+            )
+        try:
+            return response.json()
+        except ValueError as exc:
+            raise PaystackError("Invalid response from Paystack") from exc
+
+    def verify_transaction(self, reference):
+        """Return the ``data`` object of a Paystack transaction"""
+        payload = self._get(f"/transaction/verify/{quote(reference, safe='')}")
+        if not payload.get("status") or not isinstance(payload.get("data"), dict):
+            raise PaystackError(payload.get("message") or "Payment verification failed")
+        return payload["data"]
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Process-wide Paystack client, built from settings on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = PaystackClient(
+                    settings.PAYSTACK_SECRET_KEY,
+                    base_url=getattr(settings, "PAYSTACK_BASE_URL", DEFAULT_BASE_URL),
+                    connect_timeout=getattr(settings, "PAYSTACK_CONNECT_TIMEOUT", 3.05),
+                    read_timeout=getattr(settings, "PAYSTACK_READ_TIMEOUT", 10),
+                    max_retries=getattr(settings, "PAYSTACK_MAX_RETRIES", 2),
+                    backoff_factor=getattr(settings, "PAYSTACK_RETRY_BACKOFF", 0.3),
+                    pool_size=getattr(settings, "PAYSTACK_POOL_SIZE", 10),
+                    breaker=CircuitBreaker(
+                        threshold=getattr(settings, "PAYSTACK_BREAKER_THRESHOLD", 5),
+                        reset_timeout=getattr(settings, "PAYSTACK_BREAKER_RESET", 30),
+                    ),
+                )
+    return _client
+
+
+def reset_client():
+    """Drop the shared client so the next call picks up current settings"""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+
+
+@receiver(setting_changed)
+def _reset_client_on_settings_change(setting, **kwargs):
+    if setting.startswith("PAYSTACK_"):
+        reset_client()
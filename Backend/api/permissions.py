@@ -1,5 +1,9 @@
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
 from rest_framework import permissions
 
+from .roles import in_group
+
 
 class IsManager(permissions.BasePermission):
     def has_permission(self, request, view):
@@ -9,7 +13,7 @@ class IsManager(permissions.BasePermission):
 
         # Write operations only for managers and superusers
         return (request.user and request.user.is_authenticated and 
-                (request.user.groups.filter(name="Managers").exists() or 
+                (in_group(request.user, "Managers") or 
                  request.user.is_superuser))
 
 
@@ -21,11 +25,32 @@ class IsDeliveryCrew(permissions.BasePermission):
 
         # Write operations only for delivery crew and superusers
         return (request.user and request.user.is_authenticated and 
-                (request.user.groups.filter(name="Crew").exists() or 
+                (in_group(request.user, "Crew") or 
                  request.user.is_superuser))
 
 
 class IsCustomer(permissions.BasePermission):
     def has_permission(self, request, view):
         return (request.user and request.user.is_authenticated and 
-                not request.user.groups.filter(name__in=["Managers", "Crew"]).exists())
+                not in_group(request.user, "Managers", "Crew"))
+
+
+class IsKitchenStaff(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return (request.user and request.user.is_authenticated and
+                (in_group(request.user, "Managers") or
+                 request.user.is_staff or request.user.is_superuser))
+
+
+class CanScrapeMetrics(permissions.BasePermission):
+    """
+    Staff, or a scraper sending ``METRICS_TOKEN`` as the
+    ``X-Metrics-Token`` header.
+    """
+
+    def has_permission(self, request, view):
+        token = getattr(settings, "METRICS_TOKEN", "")
+        sent = request.headers.get("X-Metrics-Token", "")
+        if token and sent and constant_time_compare(sent, token):
+            return True
+        return bool(request.user and request.user.is_staff)
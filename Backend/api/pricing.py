@@ -0,0 +1,108 @@
+from collections import namedtuple
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .catalog import get_catalog_version
+from .models import MenuItem
+
+CENT = Decimal("0.01")
+PRICE_MAP_TIMEOUT = getattr(settings, "PRICE_MAP_TIMEOUT", 60 * 60)
+
+# Tax is charged on the item subtotal; delivery fees depend on delivery type
+TAX_RATE = Decimal(str(getattr(settings, "ORDER_TAX_RATE", "0.10")))
+DELIVERY_FEES = {
+    delivery_type: Decimal(str(fee))
+    for delivery_type, fee in getattr(
+        settings, "ORDER_DELIVERY_FEES", {"delivery": "5.00"}
+    ).items()
+}
+
+
+def money(value):
+    """Round a value to whole cents"""
+    return Decimal(value).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def calculate_tax(subtotal):
+    return money(subtotal * TAX_RATE)
+
+
+def delivery_fee(delivery_type):
+    return money(DELIVERY_FEES.get(delivery_type, 0))
+
+
+def calculate_totals(subtotal, delivery_type=None):
+    """Return subtotal, tax, delivery fee and total for an item subtotal"""
+    subtotal = money(subtotal)
+    tax = calculate_tax(subtotal)
+    fee = delivery_fee(delivery_type)
+    return {
+        "subtotal": subtotal,
+        "tax": tax,
+        "deliveryFee": fee,
+        "total": subtotal + tax + fee,
+    }
+
+
+# One entry of the price map
+MenuPrice = namedtuple("MenuPrice", ["price", "name"])
+
+
+class UnknownMenuItems(ValueError):
+    def __init__(self, ids):
+        self.ids = ids
+        super().__init__(f"Menu items not found: {ids}")
+
+
+def get_price_map(refresh=False):
+    """
+    ``{menu item id: MenuPrice}`` for the whole menu.
+
+    Built with one query and cached in this worker under the catalog
+    version, so checkouts in between menu changes run no price queries.
+    The version is kept in the shared cache and every menu item change
+    bumps it, so no worker goes on charging an old price or pricing a
+    deleted item.
+    """
+    key = f"menu-prices:{get_catalog_version()}"
+    prices = None if refresh else cache.get(key)
+    if prices is None:
+        prices = {
+            pk: MenuPrice(price, name)
+            for pk, price, name in MenuItem.objects.values_list("id", "price", "name")
+        }
+        cache.set(key, prices, PRICE_MAP_TIMEOUT)
+    return prices
+
+
+def price_order(items, delivery_type=None, prices=None):
+    """
+    Price order lines from the menu in one pass.
+
+    ``items`` are dicts with ``menuitem_id`` and ``quantity``; any price
+    they carry is replaced by the menu price, and the menu item name is
+    added. ``prices`` defaults to ``get_price_map()``. Returns the priced
+    lines and the order totals from ``calculate_totals``.
+    """
+    if prices is None:
+        prices = get_price_map()
+    ids = {item["menuitem_id"] for item in items}
+    if not ids <= prices.keys():
+        # The item may be newer than the catalog version bump; reload once,
+        # in place so callers holding ``prices`` see the fresh map
+        fresh = get_price_map(refresh=True)
+        prices.clear()
+        prices.update(fresh)
+    missing = sorted(ids - prices.keys())
+    if missing:
+        raise UnknownMenuItems(missing)
+
+    subtotal = Decimal(0)
+    lines = []
+    for item in items:
+        menu = prices[item["menuitem_id"]]
+        subtotal += menu.price * item["quantity"]
+        lines.append({**item, "price": menu.price, "name": menu.name})
+    return lines, calculate_totals(subtotal, delivery_type)
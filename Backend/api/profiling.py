@@ -0,0 +1,187 @@
+import logging
+import re
+import threading
+from collections import Counter
+from functools import lru_cache
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger("api.queries")
+
+# Duplicated statements kept per view in the report
+TOP_DUPLICATES = 5
+
+_IN_LIST = re.compile(r"\bIN \((?:%s, )*%s\)")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+\b")
+_SAVEPOINT = re.compile(r'"?s\d+_x\d+"?')
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql):
+    """
+    ``sql`` with literals and ``IN`` list lengths stripped, so statements
+    differing only in values (the rows of an N+1) compare equal.
+    """
+    sql = _IN_LIST.sub("IN (...)", sql)
+    sql = _STRING.sub("?", sql)
+    sql = _SAVEPOINT.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+def get_query_budget(view_name, method=None):
+    """
+    The most queries one request to ``view_name`` may issue, or ``None``.
+
+    ``QUERY_BUDGETS`` maps view names, optionally prefixed with the HTTP
+    method (``"POST order-list"``), to budgets; the method-specific entry
+    wins.
+    """
+    budgets = getattr(settings, "QUERY_BUDGETS", {})
+    if method is not None and f"{method} {view_name}" in budgets:
+        return budgets[f"{method} {view_name}"]
+    return budgets.get(view_name)
+
+
+class QueryRecorder:
+    """Database execute wrapper collecting one request's statements"""
+
+    __slots__ = ("statements", "seconds")
+
+    def __init__(self):
+        self.statements = []
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += perf_counter() - start
+            self.statements.append(sql)
+
+    def duplicates(self):
+        """Fingerprints run more than once, with their repeat counts"""
+        counts = Counter(fingerprint(sql) for sql in self.statements)
+        return {sql: n for sql, n in counts.items() if n > 1}
+
+
+class ViewProfile:
+    __slots__ = ("requests", "queries", "max_queries", "sql_seconds", "over_budget", "duplicates")
+
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.sql_seconds = 0.0
+        self.over_budget = 0
+        # Fingerprint -> redundant executions across all requests
+        self.duplicates = Counter()
+
+
+class QueryProfile:
+    """
+    Per-view query statistics for this worker process.
+
+    Views are keyed by HTTP method and view name, since a viewset's list
+    and create share a name but not their queries or budgets. Each request
+    updates its view's totals once, under a lock held for a
+    handful of additions. Every worker keeps its own numbers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def record(self, method, view_name, recorder, over_budget=False):
+        queries = len(recorder.statements)
+        duplicates = recorder.duplicates()
+        with self._lock:
+            profile = self._views.get((method, view_name))
+            if profile is None:
+                profile = self._views[method, view_name] = ViewProfile()
+            profile.requests += 1
+            profile.queries += queries
+            profile.max_queries = max(profile.max_queries, queries)
+            profile.sql_seconds += recorder.seconds
+            profile.over_budget += over_budget
+            for sql, n in duplicates.items():
+                profile.duplicates[sql] += n - 1
+
+    def snapshot(self):
+        """Per-view statistics, the views issuing the most queries first"""
+        with self._lock:
+            views = [
+                {
+                    "method": method,
+                    "view": view_name,
+                    "requests": profile.requests,
+                    "queries": profile.queries,
+                    "avg_queries": round(profile.queries / profile.requests, 2),
+                    "max_queries": profile.max_queries,
+                    "budget": get_query_budget(view_name, method),
+                    "over_budget": profile.over_budget,
+                    "sql_ms": round(profile.sql_seconds * 1000, 2),
+                    "avg_sql_ms": round(profile.sql_seconds * 1000 / profile.requests, 2),
+                    "duplicates": [
+                        {"sql": sql, "redundant": n}
+                        for sql, n in profile.duplicates.most_common(TOP_DUPLICATES)
+                    ],
+                }
+                for (method, view_name), profile in self._views.items()
+            ]
+        views.sort(key=lambda view: view["queries"], reverse=True)
+        return views
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+
+query_profile = QueryProfile()
+
+
+class QueryProfilerMiddleware:
+    """
+    Count the queries and SQL time of every request, by method and resolved
+    view name.
+
+    Requests issuing more queries than their ``QUERY_BUDGETS`` entry are
+    logged on ``api.queries`` with their duplicated statements. Runs when
+    ``QUERY_PROFILER_ENABLED`` is set, which defaults to ``DEBUG``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, "QUERY_PROFILER_ENABLED", settings.DEBUG)
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+
+        match = getattr(request, "resolver_match", None)
+        if match is None:
+            return response
+        budget = get_query_budget(match.view_name, request.method)
+        over_budget = budget is not None and len(recorder.statements) > budget
+        if over_budget:
+            logger.warning(
+                "query budget exceeded",
+                extra={"fields": {
+                    "view": match.view_name,
+                    "method": request.method,
+                    "queries": len(recorder.statements),
+                    "budget": budget,
+                    "duplicates": recorder.duplicates(),
+                }},
+            )
+        query_profile.record(request.method, match.view_name, recorder, over_budget)
+        return response
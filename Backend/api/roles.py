@@ -0,0 +1,90 @@
+from django.conf import settings
+from django.core.cache import caches
+
+# Group name -> role, in precedence order (first match wins)
+ROLE_GROUPS = (
+    ("Managers", "manager"),
+    ("Crew", "delivery"),
+)
+DEFAULT_ROLE = "customer"
+
+# Cache alias holding group names. Invalidation only reaches the cache it
+# runs against, so with the default LocMem cache another worker keeps a
+# user's old roles until its entry expires; keep the timeout short unless
+# this points at a shared (e.g. Redis) cache.
+ROLE_CACHE = getattr(settings, "ROLE_CACHE", "default")
+ROLE_CACHE_TIMEOUT = getattr(settings, "ROLE_CACHE_TIMEOUT", 60)
+
+# Attribute used to memoise group names on a user instance for the
+# lifetime of a request
+_INSTANCE_ATTR = "_group_names_cache"
+
+
+def _cache_key(user_id):
+    return f"user-groups:{user_id}"
+
+
+def get_group_names(user):
+    """
+    Return a frozenset of the user's group names.
+
+    Looks at, in order: the value memoised on the instance, a prefetched
+    ``groups`` relation, the ``ROLE_CACHE`` cache and finally the database.
+    """
+    if user is None or not getattr(user, "is_authenticated", False):
+        return frozenset()
+
+    names = getattr(user, _INSTANCE_ATTR, None)
+    if names is not None:
+        return names
+
+    prefetched = getattr(user, "_prefetched_objects_cache", {}).get("groups")
+    if prefetched is not None:
+        names = frozenset(group.name for group in prefetched)
+    else:
+        cache = caches[ROLE_CACHE]
+        key = _cache_key(user.pk)
+        names = cache.get(key)
+        if names is None:
+            names = frozenset(user.groups.values_list("name", flat=True))
+            cache.set(key, names, ROLE_CACHE_TIMEOUT)
+
+    setattr(user, _INSTANCE_ATTR, names)
+    return names
+
+
+def remember_group_names(user, names):
+    """Memoise group names already known, e.g. from token claims"""
+    setattr(user, _INSTANCE_ATTR, frozenset(names))
+
+
+def get_role(user):
+    """Return the user's role based on their group"""
+    names = get_group_names(user)
+    for group_name, role in ROLE_GROUPS:
+        if group_name in names:
+            return role
+    return DEFAULT_ROLE
+
+
+def in_group(user, *group_names):
+    return not get_group_names(user).isdisjoint(group_names)
+
+
+def is_staff_member(user):
+    """Managers and staff accounts, who run the kitchen and see every order"""
+    return bool(
+        user and user.is_authenticated
+        and (user.is_staff or user.is_superuser or in_group(user, "Managers"))
+    )
+
+
+def invalidate_user_roles(*user_ids):
+    """Drop cached group names for the given user ids"""
+    caches[ROLE_CACHE].delete_many([_cache_key(user_id) for user_id in user_ids])
+
+
+def forget_user_roles(user):
+    """Drop cached group names for a user, including the instance memo"""
+    user.__dict__.pop(_INSTANCE_ATTR, None)
+    invalidate_user_roles(user.pk)
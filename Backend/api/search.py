@@ -0,0 +1,92 @@
+import re
+import unicodedata
+
+from django.db import transaction
+from rest_framework import filters
+
+from .models import MenuItem, MenuItemSearchToken
+
+TOKEN_RE = re.compile(r"\w+")
+MAX_TOKEN_LENGTH = 64
+
+
+def tokenize(text):
+    """Split text into lower-case, accent-free word tokens"""
+    if not text:
+        return []
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return [token[:MAX_TOKEN_LENGTH] for token in TOKEN_RE.findall(text.lower())]
+
+
+def menu_item_tokens(menu_item, category_name=None):
+    if category_name is None:
+        category_name = menu_item.category.name
+    return set(
+        tokenize(menu_item.name)
+        + tokenize(menu_item.description)
+        + tokenize(category_name)
+    )
+
+
+def index_menu_items(menu_items):
+    """(Re)build the search tokens for the given menu items"""
+    menu_items = list(menu_items)
+    if not menu_items:
+        return
+    with transaction.atomic():
+        MenuItemSearchToken.objects.filter(menuitem__in=menu_items).delete()
+        MenuItemSearchToken.objects.bulk_create(
+            [
+                MenuItemSearchToken(menuitem=menu_item, token=token)
+                for menu_item in menu_items
+                for token in menu_item_tokens(menu_item)
+            ],
+            batch_size=1000,
+        )
+
+
+def rebuild_menu_search_index(batch_size=1000):
+    """Rebuild the whole index; returns the number of menu items indexed"""
+    queryset = MenuItem.objects.select_related("category").order_by("pk")
+    indexed = 0
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return indexed
+        index_menu_items(batch)
+        indexed += len(batch)
+        last_pk = batch[-1].pk
+
+
+def search_menu_items(queryset, query):
+    """
+    Restrict ``queryset`` to menu items matching every token of ``query``.
+
+    The last token is matched as a prefix so partially typed words work
+    for typeahead; earlier tokens must match exactly.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return queryset
+    *complete, partial = tokens
+    for token in complete:
+        queryset = queryset.filter(
+            pk__in=MenuItemSearchToken.objects.filter(token=token).values("menuitem_id")
+        )
+    return queryset.filter(
+        pk__in=MenuItemSearchToken.objects.filter(token__startswith=partial).values(
+            "menuitem_id"
+        )
+    )
+
+
+class MenuSearchFilter(filters.SearchFilter):
+    """SearchFilter backed by the menu item token index instead of LIKE scans"""
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, "")
+        if not query.strip():
+            return queryset
+        return search_menu_items(queryset, query)
@@ -6,7 +6,17 @@ from django.conf import settings
 import bleach
 from djoser.serializers import UserCreateSerializer as BaseUserCreateSerializer
 from djoser.serializers import UserSerializer as BaseUserSerializer
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from .authentication import add_user_claims
+from .denylist import is_revoked, revoke
+from .instrumentation import TimedSerializerMixin
 from .utils import generate_unique_order_reference
+from .roles import get_role
+from .pricing import UnknownMenuItems, money, price_order
+from .availability import BLOCKING_STATUSES, table_is_free
 
 User = get_user_model()
 
@@ -20,11 +30,7 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'role')
 
     def get_role(self, obj):
-        if obj.groups.filter(name='Managers').exists():
-            return 'manager'
-        if obj.groups.filter(name='Crew').exists():
-            return 'delivery'
-        return 'customer'
+        return get_role(obj)
 
 
 class UserCreateSerializer(BaseUserCreateSerializer):
@@ -34,6 +40,41 @@ class UserCreateSerializer(BaseUserCreateSerializer):
         read_only_fields = ('id',)
 
 
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Tokens carrying the claims ``StatelessJWTAuthentication`` trusts"""
+
+    @classmethod
+    def get_token(cls, user):
+        return add_user_claims(super().get_token(user), user)
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Re-read the user when refreshing, so role changes and deactivation
+    reach access tokens within one access token lifetime.
+
+    Revoked refresh tokens are refused. With rotation on, the presented
+    token is revoked as it is exchanged, so each one works only once.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if is_revoked(refresh):
+            raise InvalidToken('Token has been revoked')
+        if jwt_settings.ROTATE_REFRESH_TOKENS and not revoke(refresh):
+            raise InvalidToken('Token has been revoked')
+
+        data = super().validate(attrs)
+        access = AccessToken(data['access'])
+        user = User.objects.filter(
+            **{jwt_settings.USER_ID_FIELD: access[jwt_settings.USER_ID_CLAIM]}, is_active=True
+        ).first()
+        if user is None:
+            raise InvalidToken('User not found or inactive')
+        data['access'] = str(add_user_claims(access, user))
+        return data
+
+
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
@@ -47,7 +88,7 @@ class CategorySerializer(serializers.ModelSerializer):
         return super().validate(attrs)
 
 
-class MenuItemSerializer(serializers.ModelSerializer):
+class MenuItemSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     category_name = serializers.StringRelatedField(
         source="category", read_only=True, many=False
     )
@@ -80,9 +121,9 @@ class MenuItemSerializer(serializers.ModelSerializer):
         return super().validate(attrs)
 
 
-class CartItemSerializer(serializers.ModelSerializer):
+class CartItemSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     name = serializers.CharField(source='menuitem.name', read_only=True)  # Add this line
-    # subtotal = serializers.SerializerMethodField()
+    line_total = serializers.SerializerMethodField()
 
     
     class Meta:
@@ -93,7 +134,7 @@ class CartItemSerializer(serializers.ModelSerializer):
             "name",  # Include name in fields
             "quantity", 
             "price", 
-            # "subtotal",
+            "line_total",
             
         ]
         extra_kwargs = {
@@ -101,8 +142,12 @@ class CartItemSerializer(serializers.ModelSerializer):
             "price": {"read_only": True},
             "id": {"read_only": True},
         }
-    # def get_total_price(self, obj):
-    #     return obj.price * obj.quantity
+    def get_line_total(self, obj):
+        # Prefer the value annotated by the cart query
+        line_total = getattr(obj, 'line_total', None)
+        if line_total is None:
+            line_total = obj.price * obj.quantity
+        return str(money(line_total))
 
     def validate(self, attrs):
         if attrs["quantity"] < 0:
@@ -118,13 +163,24 @@ class CartSerializer(serializers.ModelSerializer):
         fields = ["customer", "items"]
 
 
-class OrderItemSerializer(serializers.ModelSerializer):
+class OrderItemSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     id = serializers.IntegerField(source='pk', read_only=True)
-    name = serializers.CharField(source='menuitem.name', read_only=True)
+    name = serializers.SerializerMethodField()
+    # Plain id so that a basket is validated with one in_bulk() lookup in
+    # OrderSerializer.validate instead of a query per line
+    menuitem = serializers.IntegerField(source='menuitem_id')
 
     class Meta:
         model = OrderItem
         fields = ['id', 'name', 'menuitem', 'quantity', 'price', 'specialInstructions']
+        # Prices come from the menu, see api/pricing.py
+        read_only_fields = ['price']
+        extra_kwargs = {'quantity': {'min_value': 1}}
+
+    def get_name(self, obj):
+        # Items of a new order carry the name from the price map
+        name = getattr(obj, 'name', None)
+        return name if name is not None else obj.menuitem.name
 
 
 class DeliveryInfoSerializer(serializers.Serializer):
@@ -135,11 +191,11 @@ class DeliveryInfoSerializer(serializers.Serializer):
     preferredTime = serializers.CharField(required=False, allow_null=True, allow_blank=True)
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     items = OrderItemSerializer(many=True)
     delivery = DeliveryInfoSerializer(write_only=True)
     customer = serializers.PrimaryKeyRelatedField(
-        queryset=User.objects.all()
+        queryset=User.objects.all(), required=False
     )
     reference = serializers.CharField(read_only=True)
 
@@ -149,18 +205,20 @@ class OrderSerializer(serializers.ModelSerializer):
             'id', 'customer', 'items', 'status',
             'subtotal', 'tax', 'deliveryFee', 'total',
             'paymentMethod', 'delivery', 'reference',
-            'created', 'updated'
+            'delivery_crew', 'created', 'updated'
+        ]
+        # Totals are computed on the server, whatever the client sends
+        read_only_fields = [
+            'reference', 'delivery_crew', 'created', 'updated',
+            'subtotal', 'tax', 'deliveryFee', 'total',
         ]
-        read_only_fields = ['reference', 'created', 'updated']
 
     def validate(self, data):
-        print("Validating data:", data)
-            
         if self.instance:  # Indicates this is an update
                 return data
             
             # Ensure all required fields are present for create requests
-        required_fields = ['customer', 'items', 'subtotal', 'tax', 'deliveryFee', 'total', 'paymentMethod', 'delivery']
+        required_fields = ['items', 'paymentMethod', 'delivery']
         for field in required_fields:
             if field not in data:
                     raise serializers.ValidationError({field: f"{field} is required"})
@@ -173,7 +231,13 @@ class OrderSerializer(serializers.ModelSerializer):
             # Validate items
         if not data.get('items'):
                 raise serializers.ValidationError({'items': 'At least one item is required'})
-            
+
+        # Price the basket from the cached menu price map
+        try:
+            data['items'], totals = price_order(data['items'], delivery_data.get('type'))
+        except UnknownMenuItems as exc:
+            raise serializers.ValidationError({'items': str(exc)})
+        data.update(totals)
         return data
 
 
@@ -197,19 +261,13 @@ class OrderSerializer(serializers.ModelSerializer):
         return representation
 
     def create(self, validated_data):
-        print("Creating order with data:", validated_data)
         items_data = validated_data.pop('items')
         delivery_data = validated_data.pop('delivery')
         
 
-        # Generate a unique reference
-        reference = generate_unique_order_reference()
-        while Order.objects.filter(reference=reference).exists():
-            reference = generate_unique_order_reference()
-
-        # Create the order
+        # Create the order; the allocator keeps references distinct without a lookup
         order = Order.objects.create(
-            reference=reference,
+            reference=generate_unique_order_reference(),
             delivery_type=delivery_data['type'],
             delivery_address=delivery_data.get('address'),
             contact_number=delivery_data['contactNumber'],
@@ -218,17 +276,37 @@ class OrderSerializer(serializers.ModelSerializer):
             **validated_data
         )
 
-        print("Order created:", order)
-
-        # Create order items
+        # Create order items in one INSERT. Lines were priced from the price
+        # map, which also named them, so rendering them needs no query
+        items = []
         for item_data in items_data:
-            OrderItem.objects.create(
+            item = OrderItem(
                 order=order,
-                **item_data
+                menuitem_id=item_data['menuitem_id'],
+                quantity=item_data['quantity'],
+                price=item_data['price'],
+                specialInstructions=item_data.get('specialInstructions'),
             )
+            item.name = item_data['name']
+            items.append(item)
+        items = OrderItem.objects.bulk_create(items)
+
+        # Prime the relation so the response renders without re-reading
+        order._prefetched_objects_cache = {'items': items}
 
         return order
 
+    def update(self, instance, validated_data):
+        # Status only moves through api.lifecycle, and only the fields sent
+        # are written, so a concurrent transition is never saved over
+        serializers.raise_errors_on_nested_writes('update', self, validated_data)
+        validated_data.pop('status', None)
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        if validated_data:
+            instance.save(update_fields=[*validated_data, 'updated'])
+        return instance
+
 
 class CustomOrderSerializer(OrderSerializer):
     class Meta(OrderSerializer.Meta):
@@ -264,4 +342,38 @@ class TableBookingSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 "Number of guests exceeds table capacity"
             )
+
+        if self.slot_taken(data):
+            raise serializers.ValidationError(
+                "Table is already booked at this time"
+            )
+        return data
+
+    def slot_taken(self, data):
+        """Whether the booking in ``data`` overlaps another one of its table"""
+        table = data.get('table', self.instance.table if self.instance else None)
+        booking_date = data.get('booking_date', self.instance.booking_date if self.instance else None)
+        booking_time = data.get('booking_time', self.instance.booking_time if self.instance else None)
+        booking_status = data.get('status', self.instance.status if self.instance else 'pending')
+        return bool(
+            table and booking_date and booking_time
+            and booking_status in BLOCKING_STATUSES
+            and not table_is_free(
+                table, booking_date, booking_time,
+                exclude_booking=self.instance.pk if self.instance else None,
+            )
+        )
+
+
+class AvailabilityQuerySerializer(serializers.Serializer):
+    """Query parameters of the table availability endpoints"""
+
+    date = serializers.DateField()
+    time = serializers.TimeField(required=False)
+    guests = serializers.IntegerField(min_value=1, default=1)
+    interval = serializers.IntegerField(min_value=5, max_value=240, required=False)
+
+    def validate(self, data):
+        if self.context.get('require_time') and 'time' not in data:
+            raise serializers.ValidationError({'time': 'This field is required.'})
         return data
@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .catalog import bump_catalog_version
+from .models import Category, MenuItem
+from .search import index_menu_items
+from .roles import forget_user_roles, invalidate_user_roles
+
+User = get_user_model()
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_roles_on_group_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Keep the role cache in step with ``user.groups`` / ``group.user_set``"""
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            forget_user_roles(instance)
+        return
+
+    # Reverse side: ``instance`` is a Group
+    if action == "pre_clear":
+        invalidate_user_roles(*instance.user_set.values_list("pk", flat=True))
+    elif action in ("post_add", "post_remove") and pk_set:
+        invalidate_user_roles(*pk_set)
+
+
+@receiver(pre_delete, sender=Group)
+def collect_group_members(sender, instance, **kwargs):
+    # Memberships are gone by post_delete, and their cascade sends no m2m_changed
+    instance._member_ids = list(instance.user_set.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Group)
+def invalidate_roles_on_group_delete(sender, instance, **kwargs):
+    invalidate_user_roles(*getattr(instance, "_member_ids", ()))
+
+
+@receiver(post_save, sender=Group)
+def invalidate_roles_on_group_rename(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        invalidate_user_roles(*instance.user_set.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=User)
+def invalidate_roles_on_user_delete(sender, instance, **kwargs):
+    invalidate_user_roles(instance.pk)
+
+
+@receiver(post_save, sender=MenuItem)
+@receiver(post_delete, sender=MenuItem)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_catalog(sender, **kwargs):
+    """Bump the catalog version once the change is visible to readers"""
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_save, sender=MenuItem)
+def index_menu_item(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_menu_items([instance])
+
+
+@receiver(post_save, sender=Category)
+def reindex_category_items(sender, instance, created, raw=False, **kwargs):
+    # A renamed category changes the tokens of all of its items
+    if not created and not raw:
+        index_menu_items(instance.menu_items.select_related("category"))
@@ -0,0 +1,134 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from api.profiling import fingerprint, get_query_budget
+
+
+class QueryCountMixin:
+    """
+    Assertions for checking that an endpoint's query count does not depend
+    on how many rows it returns.
+    """
+
+    def count_queries(self, method, url, **kwargs):
+        with CaptureQueriesContext(connection) as ctx:
+            response = getattr(self.client, method)(url, **kwargs)
+        self.assertLess(response.status_code, 400, getattr(response, "data", None))
+        return len(ctx.captured_queries)
+
+    def assertQueryCountIsFlat(self, url, add_rows, small=2, large=12, method="get", **kwargs):
+        """
+        Render ``url`` with ``small`` rows, then with ``large`` rows, and fail
+        if the second render needs more queries than the first.
+
+        ``add_rows(count)`` must create ``count`` additional rows visible to
+        the endpoint.
+        """
+        add_rows(small)
+        before = self.count_queries(method, url, **kwargs)
+        add_rows(large - small)
+        after = self.count_queries(method, url, **kwargs)
+        self.assertEqual(
+            before,
+            after,
+            f"{url} issued {before} queries for {small} rows but {after} for {large}",
+        )
+        return after
+
+    def assertWithinQueryBudget(self, url, method="get", **kwargs):
+        """
+        Request ``url`` and fail if it issues more queries than the budget
+        declared for its view in ``QUERY_BUDGETS``, or if none is declared.
+        """
+        with CaptureQueriesContext(connection) as ctx:
+            response = getattr(self.client, method)(url, **kwargs)
+        self.assertLess(response.status_code, 400, getattr(response, "data", None))
+        view_name = response.resolver_match.view_name
+        budget = get_query_budget(view_name, method.upper())
+        if budget is None:
+            self.fail(f"{view_name} has no query budget in QUERY_BUDGETS")
+        queries = [query["sql"] for query in ctx.captured_queries]
+        if len(queries) > budget:
+            self.fail(
+                f"{method.upper()} {view_name} issued {len(queries)} queries, "
+                f"over its budget of {budget}:\n"
+                + "\n".join(fingerprint(sql) for sql in queries)
+            )
+        return len(queries)
+
+
+LOCMEM = "django.core.cache.backends.locmem.LocMemCache"
+
+
+class WorkerCachesMixin:
+    """
+    Run parts of a test as if on separate worker processes: each worker has
+    a ``default`` cache of its own, and all of them see one ``shared`` cache.
+    """
+
+    def worker(self, name):
+        return override_settings(CACHES={
+            "default": {"BACKEND": LOCMEM, "LOCATION": f"worker-{name}"},
+            "shared": {"BACKEND": LOCMEM, "LOCATION": "workers-shared"},
+        })
+
+    def reset_workers(self, *names):
+        """Empty the caches of the named workers and the shared cache"""
+        for name in names:
+            with self.worker(name):
+                caches["default"].clear()
+                caches["shared"].clear()
+
+
+class FakePaystackHandler(BaseHTTPRequestHandler):
+    """Answers /transaction/verify/<reference> based on the reference"""
+
+    def do_GET(self):
+        self.server.hits.append(self.path)
+        reference = self.path.rsplit("/", 1)[-1]
+        if reference.startswith("slow"):
+            time.sleep(0.5)
+        if reference.startswith("down"):
+            return self._reply(503, {"status": False})
+        if reference.startswith("missing"):
+            return self._reply(404, {"status": False, "message": "Transaction reference not found"})
+        state = "ongoing" if reference.startswith("inflight") else "success"
+        amount = int(reference.split("-")[-1]) if reference.startswith("paid") else 0
+        self._reply(200, {"status": True, "data": {"status": state, "amount": amount}})
+
+    def _reply(self, code, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakePaystackMixin:
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), FakePaystackHandler)
+        cls.server.hits = []
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        self.server.hits.clear()
@@ -0,0 +1,153 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.authentication import StatelessJWTAuthentication
+from api.checks import check_denylist_cache
+from api.roles import in_group
+from api.serializers import ClaimsTokenObtainPairSerializer, ClaimsTokenRefreshSerializer
+
+User = get_user_model()
+
+
+class StatelessJWTAuthenticationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="manager@example.com", password="pass", first_name="M", last_name="M"
+        )
+        self.user.groups.add(Group.objects.create(name="Managers"))
+        self.factory = APIRequestFactory()
+
+    def _access(self):
+        return str(ClaimsTokenObtainPairSerializer.get_token(self.user).access_token)
+
+    def _authenticate(self, method, token):
+        request = getattr(self.factory, method)("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        return StatelessJWTAuthentication().authenticate(request)[0]
+
+    def test_reads_trust_claims_without_queries(self):
+        token = self._access()
+        with self.assertNumQueries(0):
+            user = self._authenticate("get", token)
+            self.assertEqual(user.pk, self.user.pk)
+            self.assertEqual(user.email, "manager@example.com")
+            self.assertTrue(user.is_authenticated)
+            self.assertTrue(in_group(user, "Managers"))
+        # Anything not in the token is loaded on demand
+        self.assertEqual(user.first_name, "M")
+
+    def test_writes_load_the_user(self):
+        token = self._access()
+        with self.assertNumQueries(1):
+            user = self._authenticate("post", token)
+        self.assertEqual(user.get_deferred_fields(), set())
+
+    def test_tokens_without_claims_fall_back_to_the_database(self):
+        token = str(AccessToken.for_user(self.user))
+        with self.assertNumQueries(1):
+            self.assertEqual(self._authenticate("get", token).pk, self.user.pk)
+
+    def test_login_and_refresh_carry_current_roles(self):
+        client = APIClient()
+        response = client.post(
+            reverse("jwt-create"), {"email": "manager@example.com", "password": "pass"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(AccessToken(response.data["access"])["role"], "manager")
+
+        self.user.groups.clear()
+        serializer = ClaimsTokenRefreshSerializer(data={"refresh": response.data["refresh"]})
+        self.assertTrue(serializer.is_valid())
+        access = AccessToken(serializer.validated_data["access"])
+        self.assertEqual(access["groups"], [])
+        self.assertEqual(access["role"], "customer")
+
+
+class CookieAuthFlowTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="customer@example.com", password="pass", first_name="C", last_name="C"
+        )
+        self.client = APIClient()
+
+    def _login(self):
+        response = self.client.post(
+            reverse("auth-cookie-login"), {"email": "customer@example.com", "password": "pass"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_login_sets_cookies_that_authenticate(self):
+        response = self._login()
+        self.assertEqual(response.data, {"detail": "Login successful"})
+        self.assertTrue(response.cookies["access_token"]["httponly"])
+        self.assertEqual(response.cookies["refresh_token"]["path"], "/api/v1/auth/")
+
+        response = self.client.get(reverse("user-me"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["email"], "customer@example.com")
+
+    def test_bad_credentials_are_rejected(self):
+        response = self.client.post(
+            reverse("auth-cookie-login"), {"email": "customer@example.com", "password": "nope"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_tokens_rotate_and_work_once(self):
+        self._login()
+        old_refresh = self.client.cookies["refresh_token"].value
+        response = self.client.post(reverse("auth-cookie-refresh"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.cookies["refresh_token"].value, old_refresh)
+
+        response = APIClient().post(reverse("auth-cookie-refresh"), {"refresh": old_refresh}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_logout_revokes_both_tokens(self):
+        self._login()
+        access = self.client.cookies["access_token"].value
+        refresh = self.client.cookies["refresh_token"].value
+
+        with self.assertNumQueries(0):
+            response = self.client.post(reverse("auth-logout"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        self.assertEqual(client.get(reverse("user-me")).status_code, status.HTTP_401_UNAUTHORIZED)
+        response = client.post(reverse("auth-cookie-refresh"), {"refresh": refresh}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_cookie_writes_need_csrf(self):
+        client = APIClient(enforce_csrf_checks=True)
+        client.post(
+            reverse("auth-cookie-login"), {"email": "customer@example.com", "password": "pass"},
+            format="json",
+        )
+        response = client.patch(reverse("user-me"), {"first_name": "D"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class DenylistCacheCheckTest(SimpleTestCase):
+    def _caches(self, backend):
+        return {
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+            "shared": {"BACKEND": backend, "LOCATION": "redis://localhost:6379/0"},
+        }
+
+    def test_process_local_denylist_is_flagged(self):
+        with override_settings(CACHES=self._caches("django.core.cache.backends.locmem.LocMemCache")):
+            self.assertEqual([warning.id for warning in check_denylist_cache(None)], ["api.W001"])
+
+    def test_shared_denylist_passes(self):
+        with override_settings(CACHES=self._caches("django.core.cache.backends.redis.RedisCache")):
+            self.assertEqual(check_denylist_cache(None), [])
@@ -0,0 +1,87 @@
+from datetime import date, time
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.availability import DayAvailability
+from api.models import Table, TableBooking
+
+User = get_user_model()
+
+
+class TableAvailabilityTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email="customer@example.com", password="pass", first_name="C", last_name="C"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.small = Table.objects.create(table_number=1, capacity=2)
+        self.large = Table.objects.create(table_number=2, capacity=6)
+        TableBooking.objects.create(
+            customer=self.user, table=self.small, booking_date=date(2024, 3, 20),
+            booking_time=time(19, 0), number_of_guests=2,
+        )
+        TableBooking.objects.create(
+            customer=self.user, table=self.large, booking_date=date(2024, 3, 20),
+            booking_time=time(12, 0), number_of_guests=4, status="cancelled",
+        )
+
+    def _free(self, at, guests=1):
+        response = self.client.get(
+            reverse("table-booking-available-tables"),
+            {"date": "2024-03-20", "time": at, "guests": guests},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [table["table_number"] for table in response.data]
+
+    def test_booking_blocks_its_whole_seating(self):
+        self.assertEqual(self._free("19:15"), [2])
+        self.assertEqual(self._free("18:15"), [2])
+        self.assertEqual(self._free("20:00"), [1, 2])
+        self.assertEqual(self._free("18:00"), [1, 2])
+
+    def test_guests_and_cancelled_bookings(self):
+        self.assertEqual(self._free("12:00", guests=4), [2])
+        self.assertEqual(self._free("19:00", guests=3), [2])
+
+    def test_invalid_query(self):
+        response = self.client.get(
+            reverse("table-booking-available-tables"), {"date": "tonight", "time": "19:00"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_day_grid_loads_bookings_once(self):
+        with self.assertNumQueries(2):
+            grid = dict(DayAvailability(date(2024, 3, 20)).grid())
+        self.assertEqual(grid[time(18, 0)], [self.small.id, self.large.id])
+        self.assertEqual(grid[time(18, 45)], [self.large.id])
+        self.assertEqual(grid[time(21, 0)], [self.small.id, self.large.id])
+        self.assertNotIn(time(21, 15), grid)
+
+    def test_day_grid_endpoint(self):
+        response = self.client.get(
+            reverse("table-booking-availability"),
+            {"date": "2024-03-20", "guests": 3, "interval": 60},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        slots = {slot["time"]: slot["tables"] for slot in response.data["slots"]}
+        self.assertEqual(list(slots), [f"{hour}:00" for hour in range(11, 22)])
+        self.assertEqual(slots["19:00"], [self.large.id])
+
+    def test_overlapping_booking_is_rejected(self):
+        data = {
+            "table": self.small.id, "booking_date": "2024-03-20",
+            "number_of_guests": 2,
+        }
+        response = self.client.post(
+            reverse("table-booking-list"), {**data, "booking_time": "19:30"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(
+            reverse("table-booking-list"), {**data, "booking_time": "20:00"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -0,0 +1,159 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.carts import bump_cart_version, get_cart_snapshot
+from api.models import Cart, CartItem, Category, MenuItem
+from api.pricing import get_price_map
+from api.tests.helpers import WorkerCachesMixin
+
+User = get_user_model()
+
+
+class CartSnapshotTest(WorkerCachesMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email="customer@example.com", password="pass", first_name="C", last_name="C"
+        )
+        self.client.force_authenticate(user=self.user)
+        category = Category.objects.create(name="Drinks")
+        self.coke = MenuItem.objects.create(name="Coke", price=Decimal("1.99"), category=category)
+        self.tea = MenuItem.objects.create(name="Tea", price=Decimal("2.50"), category=category)
+
+    def test_cart_returns_server_totals(self):
+        self.client.post(reverse("cart-list"), {"menuitem": self.coke.id, "quantity": 3})
+        response = self.client.post(reverse("cart-list"), {"menuitem": self.tea.id, "quantity": 1})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.client.get(reverse("cart-list"), {"delivery_type": "delivery"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["items"][0]["name"], "Coke")
+        self.assertEqual(response.data["items"][0]["line_total"], "5.97")
+        self.assertEqual(response.data["subtotal"], "8.47")
+        self.assertEqual(response.data["tax"], "0.85")
+        self.assertEqual(response.data["deliveryFee"], "5.00")
+        self.assertEqual(response.data["total"], "14.32")
+
+    def test_snapshot_is_cached_until_cart_changes(self):
+        cart = Cart.objects.create(customer=self.user)
+        item = CartItem.objects.create(cart=cart, menuitem=self.coke, quantity=1, price=self.coke.price)
+
+        self.client.get(reverse("cart-list"))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("cart-list"))
+        self.assertEqual(response.data["subtotal"], "1.99")
+
+        response = self.client.patch(
+            reverse("cart-detail", kwargs={"pk": item.pk}), {"quantity": 2}, format="json"
+        )
+        self.assertEqual(response.data["subtotal"], "3.98")
+
+        self.client.delete(reverse("cart-detail", kwargs={"pk": item.pk}))
+        response = self.client.get(reverse("cart-list"))
+        self.assertEqual(response.data["items"], [])
+        self.assertEqual(response.data["subtotal"], "0.00")
+
+    def test_bump_on_one_worker_retires_snapshots_on_the_others(self):
+        self.reset_workers("a", "b")
+        cart = Cart.objects.create(customer=self.user)
+        CartItem.objects.create(cart=cart, menuitem=self.coke, quantity=1, price=self.coke.price)
+        with self.worker("a"):
+            self.assertEqual(get_cart_snapshot(self.user)["subtotal"], "1.99")
+
+        CartItem.objects.create(cart=cart, menuitem=self.tea, quantity=1, price=self.tea.price)
+        with self.worker("b"):
+            bump_cart_version(self.user.pk)
+
+        with self.worker("a"):
+            snapshot = get_cart_snapshot(self.user)
+        self.assertEqual(len(snapshot["items"]), 2)
+        self.assertEqual(snapshot["subtotal"], "4.49")
+
+    def test_snapshot_is_built_with_one_query(self):
+        cart = Cart.objects.create(customer=self.user)
+        for menu_item in (self.coke, self.tea):
+            CartItem.objects.create(cart=cart, menuitem=menu_item, quantity=1, price=menu_item.price)
+        # The price map is shared with checkout and usually warm
+        get_price_map()
+        with self.assertNumQueries(1):
+            self.client.get(reverse("cart-list"))
+
+    def test_cart_is_priced_like_checkout(self):
+        cart = Cart.objects.create(customer=self.user)
+        CartItem.objects.create(cart=cart, menuitem=self.coke, quantity=2, price=self.coke.price)
+        etag = self.client.get(reverse("cart-list"))["ETag"]
+
+        self.coke.price = Decimal("2.49")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.coke.save()
+
+        response = self.client.get(reverse("cart-list"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.data["items"][0]["price"], "2.49")
+        self.assertEqual(response.data["items"][0]["line_total"], "4.98")
+        self.assertEqual(response.data["subtotal"], "4.98")
+
+
+class CartConditionalGetTest(WorkerCachesMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email="customer@example.com", password="pass", first_name="C", last_name="C"
+        )
+        self.client.force_authenticate(user=self.user)
+        category = Category.objects.create(name="Drinks")
+        self.coke = MenuItem.objects.create(name="Coke", price=Decimal("1.99"), category=category)
+
+    def test_matching_etag_returns_304_without_queries(self):
+        response = self.client.get(reverse("cart-list"))
+        etag = response["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("cart-list"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_cart_mutation_changes_etag(self):
+        etag = self.client.get(reverse("cart-list"))["ETag"]
+
+        self.client.post(reverse("cart-list"), {"menuitem": self.coke.id, "quantity": 1})
+
+        response = self.client.get(reverse("cart-list"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(len(response.data["items"]), 1)
+
+    def test_etag_depends_on_delivery_type(self):
+        pickup = self.client.get(reverse("cart-list"), {"delivery_type": "pickup"})["ETag"]
+        response = self.client.get(
+            reverse("cart-list"), {"delivery_type": "delivery"}, HTTP_IF_NONE_MATCH=pickup
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_etags_hold_across_workers(self):
+        self.reset_workers("a", "b")
+        with self.worker("a"):
+            etag = self.client.get(reverse("cart-list"))["ETag"]
+        with self.worker("b"):
+            response = self.client.get(reverse("cart-list"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_mutation_on_one_worker_retires_etags_on_the_others(self):
+        self.reset_workers("a", "b")
+        with self.worker("a"):
+            etag = self.client.get(reverse("cart-list"))["ETag"]
+        with self.worker("b"):
+            self.client.post(reverse("cart-list"), {"menuitem": self.coke.id, "quantity": 1})
+        with self.worker("a"):
+            response = self.client.get(reverse("cart-list"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["items"]), 1)
@@ -0,0 +1,97 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.models import Category, MenuItem
+from api.tests.helpers import WorkerCachesMixin
+
+User = get_user_model()
+
+
+class MenuCatalogCacheTest(WorkerCachesMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.manager = User.objects.create_user(
+            email="manager@example.com", password="pass", first_name="M", last_name="M"
+        )
+        self.manager.groups.add(Group.objects.create(name="Managers"))
+        self.client.force_authenticate(user=self.manager)
+        self.drinks = Category.objects.create(name="Drinks")
+        self.mains = Category.objects.create(name="Mains")
+        self.coke = MenuItem.objects.create(name="Coke", price=Decimal("1.99"), category=self.drinks)
+        MenuItem.objects.create(name="Rice", price=Decimal("8.00"), category=self.mains, featured=False)
+
+    def test_repeat_reads_are_served_from_cache(self):
+        first = self.client.get(reverse("menuitem-list"), HTTP_ACCEPT="application/json")
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(0):
+            second = self.client.get(reverse("menuitem-list"), HTTP_ACCEPT="application/json")
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(second.json()["count"], 2)
+
+    def test_filters_are_cached_separately(self):
+        url = reverse("menuitem-list")
+        response = self.client.get(url, {"category": self.drinks.id}, HTTP_ACCEPT="application/json")
+        self.assertEqual([item["name"] for item in response.json()["results"]], ["Coke"])
+        response = self.client.get(url, {"featured": "false"}, HTTP_ACCEPT="application/json")
+        self.assertEqual([item["name"] for item in response.json()["results"]], ["Rice"])
+
+    def test_links_are_cached_per_host_and_scheme(self):
+        url = reverse("menuitem-list")
+        links = set()
+        origins = (("a.example.com", False), ("b.example.com", False), ("a.example.com", True))
+        for host, secure in origins:
+            response = self.client.get(
+                url, {"page_size": 1}, HTTP_ACCEPT="application/json", HTTP_HOST=host,
+                secure=secure,
+            )
+            next_link = response.json()["next"]
+            self.assertTrue(next_link.startswith(f"{'https' if secure else 'http'}://{host}/"))
+            links.add(next_link)
+        self.assertEqual(len(links), 3)
+
+    def test_writes_bump_the_catalog_version(self):
+        url = reverse("menuitem-list")
+        self.client.get(url, HTTP_ACCEPT="application/json")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                reverse("menuitem-detail", kwargs={"pk": self.coke.pk}),
+                {"price": "2.49", "name": "Coke"},
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+
+        response = self.client.get(url, HTTP_ACCEPT="application/json")
+        prices = {item["name"]: item["price"] for item in response.json()["results"]}
+        self.assertEqual(prices["Coke"], "2.49")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.drinks.delete()
+        response = self.client.get(reverse("category-list"), HTTP_ACCEPT="application/json")
+        self.assertEqual([category["name"] for category in response.json()], ["Mains"])
+
+    def test_edits_on_one_worker_reach_the_others(self):
+        self.reset_workers("a", "b")
+        url = reverse("menuitem-list")
+        with self.worker("a"):
+            self.client.get(url, HTTP_ACCEPT="application/json")
+
+        with self.worker("b"), self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(
+                reverse("menuitem-detail", kwargs={"pk": self.coke.pk}),
+                {"price": "2.49", "name": "Coke"},
+                format="json",
+            )
+
+        with self.worker("a"):
+            response = self.client.get(url, HTTP_ACCEPT="application/json")
+        prices = {item["name"]: item["price"] for item in response.json()["results"]}
+        self.assertEqual(prices["Coke"], "2.49")
@@ -0,0 +1,96 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.dispatch import dispatch_ready_orders
+from api.models import Order
+
+User = get_user_model()
+
+
+class DispatchTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        crew_group = Group.objects.create(name="Crew")
+        self.crew = []
+        for i in range(2):
+            member = User.objects.create_user(
+                email=f"crew{i}@example.com", password="pass", first_name="D", last_name=str(i)
+            )
+            member.groups.add(crew_group)
+            self.crew.append(member)
+        self.customer = User.objects.create_user(
+            email="customer@example.com", password="pass", first_name="C", last_name="C"
+        )
+        self.count = 0
+
+    def _order(self, order_status="ready", delivery_type="delivery", crew=None):
+        self.count += 1
+        return Order.objects.create(
+            customer=self.customer, reference=f"REF-{self.count}", status=order_status,
+            subtotal=10, tax=1, deliveryFee=5, total=16, paymentMethod="card",
+            delivery_type=delivery_type, delivery_address="1 Road", contact_number="0200000000",
+            delivery_crew=crew,
+        )
+
+    def test_assigns_by_load(self):
+        self._order(crew=self.crew[0])
+        self._order(crew=self.crew[0])
+        ready = [self._order() for _ in range(3)]
+        self._order(order_status="preparing")
+        self._order(delivery_type="pickup")
+
+        assigned = dispatch_ready_orders(max_open=3)
+
+        self.assertEqual(sorted(order.id for order in assigned), sorted(o.id for o in ready))
+        loads = {
+            member.pk: Order.objects.filter(delivery_crew=member).count() for member in self.crew
+        }
+        self.assertEqual(loads, {self.crew[0].pk: 3, self.crew[1].pk: 2})
+        self.assertEqual(dispatch_ready_orders(), [])
+
+    def test_crew_capacity_is_respected(self):
+        for _ in range(5):
+            self._order()
+        self.assertEqual(len(dispatch_ready_orders(max_open=2)), 4)
+        self.assertEqual(Order.objects.filter(delivery_crew__isnull=True).count(), 1)
+
+    def test_deliveries_in_transit_count_as_load(self):
+        self._order(order_status="in_transit", crew=self.crew[0])
+        self._order(order_status="in_transit", crew=self.crew[0])
+        self._order(order_status="delivered", crew=self.crew[1])
+        ready = self._order()
+
+        self.assertEqual(dispatch_ready_orders(max_open=2), [ready])
+        ready.refresh_from_db()
+        self.assertEqual(ready.delivery_crew, self.crew[1])
+
+    def test_crew_sees_assigned_deliveries(self):
+        order = self._order()
+        dispatch_ready_orders()
+        order.refresh_from_db()
+        member = order.delivery_crew
+
+        self.client.force_authenticate(user=member)
+        response = self.client.get(reverse("delivery-orders-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([o["id"] for o in response.data["results"]], [order.id])
+        self.assertEqual(response.data["results"][0]["delivery_crew"], member.pk)
+
+    def test_dispatch_endpoint_is_for_managers(self):
+        self._order()
+        self.client.force_authenticate(user=self.crew[0])
+        response = self.client.post(reverse("delivery-orders-dispatch-ready"))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        manager = User.objects.create_user(
+            email="manager@example.com", password="pass", first_name="M", last_name="M"
+        )
+        manager.groups.add(Group.objects.create(name="Managers"))
+        self.client.force_authenticate(user=manager)
+        response = self.client.post(reverse("delivery-orders-dispatch-ready"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["assigned"]), 1)
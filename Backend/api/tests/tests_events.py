@@ -0,0 +1,215 @@
+import asyncio
+import queue
+import threading
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.authentication import issue_event_ticket
+from api.checks import check_order_events_broker
+from api.events import InProcessBroker, RedisBroker, event_stream, topics_for_user
+from api.models import Category, MenuItem
+
+User = get_user_model()
+
+
+class RecordingBroker:
+    published = []
+
+    def publish(self, topics, event):
+        self.published.append((sorted(topics), event))
+
+
+@override_settings(ORDER_EVENTS_BROKER="api.tests.tests_events.RecordingBroker")
+class OrderEventPublishTest(TestCase):
+    def setUp(self):
+        RecordingBroker.published = []
+        self.client = APIClient()
+        self.customer = User.objects.create_user(
+            email="customer@example.com", password="pass", first_name="C", last_name="C"
+        )
+        self.client.force_authenticate(user=self.customer)
+        category = Category.objects.create(name="Mains")
+        self.dish = MenuItem.objects.create(name="Dish", price=Decimal("5.00"), category=category)
+
+    def _create_order(self):
+        payload = {
+            "items": [{"menuitem": self.dish.id, "quantity": 1, "price": "5.00"}],
+            "subtotal": "5.00", "tax": "0.00", "deliveryFee": "0.00", "total": "5.00",
+            "paymentMethod": "card",
+            "delivery": {"type": "pickup", "contactNumber": "0200000000", "preferredTime": "18:00"},
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("order-list"), payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data["order"]["id"]
+
+    def test_create_and_status_change_are_published_after_commit(self):
+        order_id = self._create_order()
+        self.assertEqual(
+            RecordingBroker.published[0][0], [f"customer:{self.customer.pk}", "staff"]
+        )
+        self.assertEqual(RecordingBroker.published[0][1]["status"], "pending")
+
+        staff = User.objects.create_user(
+            email="staff@example.com", password="pass", first_name="S", last_name="S",
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=staff)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse("order-detail", args=[order_id]), {"status": "confirmed"}, format="json")
+            self.client.patch(reverse("order-detail", args=[order_id]), {"status": "confirmed"}, format="json")
+        self.assertEqual(
+            [event["status"] for _, event in RecordingBroker.published], ["pending", "confirmed"]
+        )
+
+
+class OrderEventStreamTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_topics_follow_role(self):
+        customer = User.objects.create_user(
+            email="customer@example.com", password="pass", first_name="C", last_name="C"
+        )
+        manager = User.objects.create_user(
+            email="manager@example.com", password="pass", first_name="M", last_name="M"
+        )
+        manager.groups.add(Group.objects.create(name="Managers"))
+        self.assertEqual(topics_for_user(customer), {f"customer:{customer.pk}"})
+        self.assertEqual(topics_for_user(manager), {f"customer:{manager.pk}", "staff"})
+
+    def test_stream_requires_authentication(self):
+        response = self.client.get(reverse("order-events"), HTTP_ACCEPT="text/event-stream")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_stream_rejects_access_tokens_and_bad_tickets(self):
+        user = User.objects.create_user(
+            email="customer@example.com", password="pass", first_name="C", last_name="C"
+        )
+        for params in ({"access_token": str(AccessToken.for_user(user))}, {"ticket": "forged"}):
+            response = self.client.get(reverse("order-events"), params, HTTP_ACCEPT="text/event-stream")
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_ticket_is_issued_to_authenticated_users(self):
+        user = User.objects.create_user(
+            email="customer@example.com", password="pass", first_name="C", last_name="C"
+        )
+        client = APIClient()
+        self.assertEqual(
+            client.post(reverse("order-events-ticket")).status_code, status.HTTP_401_UNAUTHORIZED
+        )
+        client.force_authenticate(user=user)
+        response = client.post(reverse("order-events-ticket"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["expires_in"], 60)
+
+    def test_stream_is_unavailable_under_wsgi(self):
+        user = User.objects.create_user(
+            email="customer@example.com", password="pass", first_name="C", last_name="C"
+        )
+        response = self.client.get(
+            reverse("order-events"), {"ticket": issue_event_ticket(user)},
+            HTTP_ACCEPT="text/event-stream",
+        )
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertFalse(response.streaming)
+
+
+class OrderEventStreamAsgiTest(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(
+            email="customer@example.com", password="pass", first_name="C", last_name="C"
+        )
+        self.ticket = issue_event_ticket(user)
+
+    async def test_stream_accepts_ticket(self):
+        response = await self.async_client.get(
+            reverse("order-events"), {"ticket": self.ticket}, headers={"accept": "text/event-stream"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertTrue(response.streaming)
+
+
+class InProcessBrokerTest(TestCase):
+    async def test_events_fan_out_from_other_threads(self):
+        broker = InProcessBroker()
+        mine = event_stream({"customer:1"}, broker=broker, heartbeat=5)
+        other = event_stream({"customer:2"}, broker=broker, heartbeat=5)
+        self.assertEqual(await mine.__anext__(), ": connected\n\n")
+        await other.__anext__()
+        self.assertEqual(broker.subscriber_count(), 2)
+
+        thread = threading.Thread(
+            target=broker.publish, args=(["customer:1"], {"type": "order.status", "order": 7})
+        )
+        thread.start()
+        thread.join()
+        chunk = await asyncio.wait_for(mine.__anext__(), 1)
+        self.assertTrue(chunk.startswith("event: order.status\ndata: "))
+        self.assertIn('"order": 7', chunk)
+
+        await mine.aclose()
+        await other.aclose()
+        self.assertEqual(broker.subscriber_count(), 0)
+
+
+class FakeRedis:
+    """Just enough Redis pub/sub to connect brokers standing in for separate processes"""
+
+    def __init__(self):
+        self.subscribers = []
+
+    def publish(self, channel, message):
+        for subscriber in self.subscribers:
+            subscriber.put({"type": "message", "channel": channel, "data": message})
+        return len(self.subscribers)
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return FakePubSub(self)
+
+
+class FakePubSub:
+    def __init__(self, redis):
+        self.redis = redis
+        self.messages = queue.Queue()
+
+    def subscribe(self, channel):
+        self.redis.subscribers.append(self.messages)
+
+    def listen(self):
+        while True:
+            yield self.messages.get()
+
+
+class RedisBrokerTest(TestCase):
+    async def test_events_published_by_another_process_reach_streams(self):
+        redis = FakeRedis()
+        web, payment_worker = RedisBroker(client=redis), RedisBroker(client=redis)
+        stream = event_stream({"customer:1"}, broker=web, heartbeat=5)
+        self.assertEqual(await stream.__anext__(), ": connected\n\n")
+        for _ in range(100):
+            if redis.subscribers:
+                break
+            await asyncio.sleep(0.01)
+
+        payment_worker.publish(["customer:1"], {"type": "order.status", "order": 7})
+        chunk = await asyncio.wait_for(stream.__anext__(), 1)
+        self.assertIn('"order": 7', chunk)
+        # The publishing side never listens
+        self.assertEqual(len(redis.subscribers), 1)
+        await stream.aclose()
+
+    def test_deploy_check_requires_a_shared_broker(self):
+        with override_settings(ORDER_EVENTS_BROKER="api.events.InProcessBroker"):
+            self.assertEqual([w.id for w in check_order_events_broker(None)], ["api.W003"])
+        with override_settings(ORDER_EVENTS_BROKER="api.events.RedisBroker"):
+            self.assertEqual(check_order_events_broker(None), [])
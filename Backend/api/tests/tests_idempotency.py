@@ -0,0 +1,115 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.db import OperationalError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.checks import check_idempotency_cache
+from api.idempotency import IDEMPOTENCY_CACHE
+from api.models import Category, MenuItem, Order, PaymentVerification
+from api.serializers import OrderSerializer
+
+User = get_user_model()
+
+
+class IdempotencyKeyTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches[IDEMPOTENCY_CACHE].clear()
+        self.client = APIClient()
+        self.customer = User.objects.create_user(
+            email="customer@example.com", password="pass", first_name="C", last_name="C"
+        )
+        self.client.force_authenticate(user=self.customer)
+        category = Category.objects.create(name="Mains")
+        self.dish = MenuItem.objects.create(name="Dish", price=Decimal("5.00"), category=category)
+
+    def _create(self, key, quantity=1):
+        payload = {
+            "items": [{"menuitem": self.dish.id, "quantity": quantity, "price": "5.00"}],
+            "subtotal": "5.00", "tax": "0.00", "deliveryFee": "0.00", "total": "5.00",
+            "paymentMethod": "card",
+            "delivery": {"type": "pickup", "contactNumber": "0200000000", "preferredTime": "18:00"},
+        }
+        return self.client.post(
+            reverse("order-list"), payload, format="json", HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def test_replayed_order_create_returns_first_response(self):
+        first = self._create("checkout-1")
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+
+        with self.assertNumQueries(0):
+            replay = self._create("checkout-1")
+        self.assertEqual(replay.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(replay["Idempotent-Replayed"], "true")
+        self.assertEqual(replay.data["order"]["reference"], first.data["order"]["reference"])
+        self.assertEqual(Order.objects.count(), 1)
+
+        self.assertEqual(self._create("checkout-2").status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_transient_failures_are_not_replayed(self):
+        with mock.patch.object(OrderSerializer, "save", side_effect=OperationalError("gone")):
+            response = self._create("checkout-1")
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(Order.objects.count(), 0)
+
+        response = self._create("checkout-1")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn("Idempotent-Replayed", response)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_validation_errors_are_replayed(self):
+        self.dish.delete()
+        self.assertEqual(self._create("checkout-1").status_code, status.HTTP_400_BAD_REQUEST)
+        replay = self._create("checkout-1")
+        self.assertEqual(replay.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(replay["Idempotent-Replayed"], "true")
+
+    def test_key_reused_for_other_body_is_rejected(self):
+        self._create("checkout-1")
+        response = self._create("checkout-1", quantity=2)
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_keys_are_scoped_per_user(self):
+        self._create("checkout-1")
+        other = User.objects.create_user(
+            email="other@example.com", password="pass", first_name="O", last_name="O"
+        )
+        self.client.force_authenticate(user=other)
+        self.assertNotIn("Idempotent-Replayed", self._create("checkout-1"))
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_verify_payment_replay_does_not_requeue(self):
+        order_id = self._create("checkout-1").data["order"]["id"]
+        url = reverse("verify-payment", args=[order_id])
+        for _ in range(2):
+            response = self.client.post(
+                url, {"paystackRef": "ref-1"}, format="json", HTTP_IDEMPOTENCY_KEY="verify-ref-1"
+            )
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response["Idempotent-Replayed"], "true")
+        self.assertEqual(PaymentVerification.objects.count(), 1)
+
+
+class IdempotencyCacheCheckTest(SimpleTestCase):
+    def _caches(self, backend):
+        return {
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+            IDEMPOTENCY_CACHE: {"BACKEND": backend, "LOCATION": "redis://localhost:6379/0"},
+        }
+
+    def test_process_local_cache_is_flagged(self):
+        with override_settings(CACHES=self._caches("django.core.cache.backends.locmem.LocMemCache")):
+            self.assertEqual([warning.id for warning in check_idempotency_cache(None)], ["api.W002"])
+
+    def test_shared_cache_passes(self):
+        with override_settings(CACHES=self._caches("django.core.cache.backends.redis.RedisCache")):
+            self.assertEqual(check_idempotency_cache(None), [])
@@ -0,0 +1,92 @@
+import json
+import logging
+import os
+import threading
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.instrumentation import JsonFormatter, QueueLogHandler, span
+from api.models import Category, MenuItem
+
+User = get_user_model()
+
+
+class RequestTraceTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        user = User.objects.create_user(
+            email="customer@example.com", password="pass", first_name="C", last_name="C"
+        )
+        self.client.force_authenticate(user=user)
+        category = Category.objects.create(name="Mains")
+        MenuItem.objects.create(name="Dish", price=Decimal("5.00"), category=category)
+
+    @override_settings(REQUEST_TRACE_SAMPLE_RATE=1.0)
+    def test_sampled_request_logs_phases(self):
+        with self.assertLogs("api.requests", "INFO") as logs:
+            self.client.get(reverse("menuitem-list"), {"access_token": "secret"})
+        fields = logs.records[0].fields
+        self.assertEqual(fields["path"], "/api/v1/menu-items/")
+        self.assertNotIn("secret", json.dumps(fields))
+        self.assertEqual(fields["status"], 200)
+        self.assertTrue(fields["sampled"])
+        self.assertGreater(fields["db_queries"], 0)
+        self.assertGreater(fields["serializer_ms"], 0)
+        self.assertGreaterEqual(
+            fields["duration_ms"], fields["db_ms"] + fields["serializer_ms"] - 0.05
+        )
+
+    @override_settings(REQUEST_TRACE_SAMPLE_RATE=0.0, REQUEST_TRACE_SLOW_MS=60_000)
+    def test_unsampled_fast_request_is_not_logged(self):
+        with self.assertNoLogs("api.requests", "INFO"):
+            self.client.get(reverse("menuitem-list"))
+
+    @override_settings(REQUEST_TRACE_SAMPLE_RATE=0.0, REQUEST_TRACE_SLOW_MS=0)
+    def test_slow_requests_are_logged_without_sampling(self):
+        with self.assertLogs("api.requests", "INFO") as logs:
+            self.client.get(reverse("menuitem-list"))
+        self.assertFalse(logs.records[0].fields["sampled"])
+        self.assertNotIn("db_ms", logs.records[0].fields)
+
+
+class InstrumentationPrimitivesTest(SimpleTestCase):
+    def test_span_outside_a_trace_is_a_no_op(self):
+        with span("serializer"):
+            pass
+
+    def test_queue_handler_writes_json_off_thread(self):
+        written = []
+        done = threading.Event()
+
+        class Target(logging.Handler):
+            def emit(self, record):
+                written.append((record.getMessage(), threading.current_thread()))
+                done.set()
+
+        handler = QueueLogHandler(target=Target())
+        handler.setFormatter(JsonFormatter())
+        log = logging.getLogger("api.tests.instrumentation")
+        log.addHandler(handler)
+        self.addCleanup(log.removeHandler, handler)
+        self.addCleanup(handler.close)
+
+        log.warning("hello", extra={"fields": {"order": 7}})
+        self.assertTrue(done.wait(2))
+        message, thread = written[0]
+        self.assertEqual(json.loads(message)["order"], 7)
+        self.assertIsNot(thread, threading.current_thread())
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        handler = QueueLogHandler(target=logging.NullHandler(), maxsize=1)
+        # Pretend the writer is running so nothing drains the queue
+        handler._pid = os.getpid()
+        record = logging.makeLogRecord({"msg": "x"})
+        handler.enqueue(record)
+        handler.enqueue(record)
+        self.assertEqual(handler.dropped, 1)
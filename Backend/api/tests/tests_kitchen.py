@@ -0,0 +1,81 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.models import Category, MenuItem, Order, OrderItem
+
+User = get_user_model()
+
+
+class KitchenQueueTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.manager = User.objects.create_user(
+            email="manager@example.com", password="pass", first_name="M", last_name="M"
+        )
+        self.manager.groups.add(Group.objects.create(name="Managers"))
+        self.client.force_authenticate(user=self.manager)
+        category = Category.objects.create(name="Mains")
+        self.dish = MenuItem.objects.create(name="Jollof", price=Decimal("5.00"), category=category)
+
+    def _order(self, reference, order_status, items=2):
+        order = Order.objects.create(
+            customer=self.manager, reference=reference, status=order_status, subtotal=10,
+            tax=1, deliveryFee=0, total=11, paymentMethod="card", delivery_type="pickup",
+            contact_number="0200000000",
+        )
+        OrderItem.objects.bulk_create(
+            [OrderItem(order=order, menuitem=self.dish, quantity=1, price=5) for _ in range(items)]
+        )
+        return order
+
+    def _queue(self, **params):
+        response = self.client.get(reverse("order-kitchen"), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        return response.data
+
+    def test_active_orders_with_items_in_one_query(self):
+        self._order("REF-1", "confirmed", items=3)
+        self._order("REF-2", "ready")
+        self._order("REF-3", "pending")
+        self._order("REF-4", "delivered")
+
+        self._queue()  # warm the role cache used by the permission check
+        with self.assertNumQueries(1):
+            data = self._queue()
+        self.assertEqual([order["reference"] for order in data["orders"]], ["REF-1", "REF-2"])
+        self.assertEqual(len(data["orders"][0]["items"]), 3)
+        self.assertEqual(data["orders"][0]["items"][0]["name"], "Jollof")
+
+    def test_since_returns_only_changed_orders(self):
+        first = self._order("REF-1", "confirmed")
+        second = self._order("REF-2", "preparing")
+        Order.objects.update(updated=timezone.now() - timedelta(minutes=5))
+        cursor = self._queue()["cursor"]
+
+        self.assertEqual(self._queue(since=cursor)["orders"], [])
+
+        second.status = "delivered"
+        second.save()
+        delta = self._queue(since=cursor)
+        self.assertEqual([(o["id"], o["status"]) for o in delta["orders"]], [(second.id, "delivered")])
+        self.assertNotEqual(delta["cursor"], cursor)
+        self.assertNotIn(first.id, [o["id"] for o in delta["orders"]])
+
+    def test_invalid_cursor_and_permissions(self):
+        response = self.client.get(reverse("order-kitchen"), {"since": "yesterday"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        customer = User.objects.create_user(
+            email="customer@example.com", password="pass", first_name="C", last_name="C"
+        )
+        self.client.force_authenticate(user=customer)
+        response = self.client.get(reverse("order-kitchen"))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,129 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.lifecycle import InvalidTransition, TransitionConflict, TransitionNotAllowed, transition
+from api.models import Order, OrderStatusEvent
+
+User = get_user_model()
+
+
+class OrderLifecycleTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.customer = User.objects.create_user(
+            email="customer@example.com", password="pass", first_name="C", last_name="C"
+        )
+        self.order = Order.objects.create(
+            customer=self.customer, reference="REF-1", subtotal=10, tax=1, deliveryFee=5,
+            total=16, paymentMethod="card", delivery_type="delivery",
+            delivery_address="1 Road", contact_number="0200000000",
+        )
+
+    def _events(self):
+        return list(OrderStatusEvent.objects.values_list("from_status", "to_status"))
+
+    def test_transition_updates_status_and_appends_event(self):
+        transition(self.order, "confirmed")
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, "confirmed")
+        self.assertEqual(self._events(), [("pending", "confirmed")])
+
+    def test_illegal_transition_is_rejected(self):
+        with self.assertRaises(InvalidTransition):
+            transition(self.order, "delivered")
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, "pending")
+        self.assertEqual(self._events(), [])
+
+    def test_stale_transition_loses_to_concurrent_one(self):
+        stale = Order.objects.get(pk=self.order.pk)
+        transition(self.order, "confirmed")
+        with self.assertRaises(TransitionConflict) as caught:
+            transition(stale, "cancelled")
+        self.assertEqual(caught.exception.current, "confirmed")
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, "confirmed")
+        self.assertEqual(self._events(), [("pending", "confirmed")])
+
+    def test_patch_goes_through_the_lifecycle(self):
+        self.client.force_authenticate(user=self.customer)
+        url = reverse("order-detail", args=[self.order.id])
+        response = self.client.patch(url, {"status": "ready"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.patch(url, {"status": "cancelled"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], "cancelled")
+        self.assertEqual(self._events(), [("pending", "cancelled")])
+
+    def test_customers_cannot_confirm_their_own_order(self):
+        with self.assertRaises(TransitionNotAllowed):
+            transition(self.order, "confirmed", actor=self.customer)
+
+        self.client.force_authenticate(user=self.customer)
+        url = reverse("order-detail", args=[self.order.id])
+        response = self.client.patch(url, {"status": "confirmed"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, "pending")
+        self.assertEqual(self._events(), [])
+
+    def test_orders_are_scoped_to_their_customer(self):
+        stranger = User.objects.create_user(
+            email="stranger@example.com", password="pass", first_name="S", last_name="S"
+        )
+        self.client.force_authenticate(user=stranger)
+        url = reverse("order-detail", args=[self.order.id])
+        response = self.client.patch(url, {"status": "cancelled"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(reverse("order-list")).data["results"], [])
+
+    def test_staff_move_orders_through_the_kitchen(self):
+        staff = User.objects.create_user(
+            email="staff@example.com", password="pass", first_name="K", last_name="K",
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=staff)
+        url = reverse("order-detail", args=[self.order.id])
+        for target in ("confirmed", "preparing"):
+            response = self.client.patch(url, {"status": target}, format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._events(), [("pending", "confirmed"), ("confirmed", "preparing")])
+
+    def test_crew_moves_delivery_in_transit(self):
+        crew = User.objects.create_user(
+            email="crew@example.com", password="pass", first_name="D", last_name="D"
+        )
+        crew.groups.add(Group.objects.create(name="Crew"))
+        Order.objects.filter(pk=self.order.pk).update(status="ready", delivery_crew=crew)
+        self.client.force_authenticate(user=crew)
+        url = reverse("delivery-orders-update-status", args=[self.order.id])
+
+        response = self.client.patch(url, {"status": "pending"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.patch(url, {"status": "in_transit"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.patch(url, {"status": "delivered"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self._events(), [("ready", "in_transit"), ("in_transit", "delivered")]
+        )
+
+    def test_delivery_orders_have_no_generic_update(self):
+        crew = User.objects.create_user(
+            email="crew@example.com", password="pass", first_name="D", last_name="D"
+        )
+        crew.groups.add(Group.objects.create(name="Crew"))
+        Order.objects.filter(pk=self.order.pk).update(status="ready", delivery_crew=crew)
+        self.client.force_authenticate(user=crew)
+        response = self.client.patch(
+            reverse("delivery-orders-detail", args=[self.order.id]), {"status": "delivered"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend as LocmemEmailBackend
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.mail import process_outbox_batch
+from api.models import OutboundEmail
+
+User = get_user_model()
+
+
+class FlakyBackend(LocmemEmailBackend):
+    """Refuses mail for addresses starting with "bounce" """
+
+    def send_messages(self, messages):
+        if any(address.startswith("bounce") for message in messages for address in message.to):
+            raise ConnectionError("Recipient refused")
+        return super().send_messages(messages)
+
+
+@override_settings(
+    EMAIL_BACKEND="api.mail.OutboxEmailBackend",
+    OUTBOX_DELIVERY_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+)
+class OutboxTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        User.objects.create_user(
+            email="customer@example.com", password="pass", first_name="C", last_name="C"
+        )
+
+    def test_password_reset_is_queued_then_delivered(self):
+        response = self.client.post(
+            reverse("password-reset"), {"email": "customer@example.com"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(mail.outbox, [])
+        queued = OutboundEmail.objects.get()
+        self.assertEqual((queued.status, queued.to), ("queued", ["customer@example.com"]))
+
+        self.assertEqual(process_outbox_batch(), {"sent": 1, "failed": 0, "retried": 0})
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn("reset-password/", mail.outbox[0].body)
+        self.assertEqual(OutboundEmail.objects.get().status, "sent")
+        self.assertEqual(process_outbox_batch()["sent"], 0)
+
+    def test_html_alternative_survives_the_queue(self):
+        message = mail.EmailMultiAlternatives("Welcome", "text", "no-reply@example.com", ["a@example.com"])
+        message.attach_alternative("<p>html</p>", "text/html")
+        message.send()
+        process_outbox_batch()
+        self.assertEqual(mail.outbox[0].alternatives[0][0], "<p>html</p>")
+
+    @override_settings(OUTBOX_DELIVERY_BACKEND="api.tests.tests_mail.FlakyBackend")
+    def test_failed_message_is_retried_without_blocking_the_batch(self):
+        mail.send_mail("One", "body", "no-reply@example.com", ["bounce@example.com"])
+        mail.send_mail("Two", "body", "no-reply@example.com", ["ok@example.com"])
+
+        self.assertEqual(process_outbox_batch(), {"sent": 1, "failed": 0, "retried": 1})
+        self.assertEqual([message.subject for message in mail.outbox], ["Two"])
+        bounced = OutboundEmail.objects.get(subject="One")
+        self.assertEqual((bounced.status, bounced.attempts), ("queued", 1))
+        self.assertIn("Recipient refused", bounced.error)
@@ -0,0 +1,160 @@
+import threading
+from datetime import date, time
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.metrics import BOOKING_CONFLICTS, CART_MUTATIONS, REQUEST_LATENCY, Registry
+from api.models import Category, MenuItem, Table, TableBooking
+from api.serializers import TableBookingSerializer
+
+User = get_user_model()
+
+
+class RegistryTest(SimpleTestCase):
+    def setUp(self):
+        self.registry = Registry()
+
+    def test_counter_sums_threads(self):
+        counter = self.registry.counter("jobs_total", "Jobs.", ("kind",))
+
+        def work():
+            for _ in range(1000):
+                counter.inc("a")
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        counter.inc("b", amount=2)
+
+        self.assertEqual(counter.values(), {("a",): 4000, ("b",): 2})
+        self.assertIn('jobs_total{kind="a"} 4000\n', self.registry.render())
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = self.registry.histogram("wait_seconds", "Waits.", buckets=(0.5, 1.0))
+        for value in (0.25, 0.5, 0.75, 3):
+            histogram.observe(value)
+
+        text = self.registry.render()
+        self.assertIn("# TYPE wait_seconds histogram", text)
+        self.assertIn('wait_seconds_bucket{le="0.5"} 2\n', text)
+        self.assertIn('wait_seconds_bucket{le="1.0"} 3\n', text)
+        self.assertIn('wait_seconds_bucket{le="+Inf"} 4\n', text)
+        self.assertIn("wait_seconds_sum 4.5\n", text)
+        self.assertIn("wait_seconds_count 4\n", text)
+
+    def test_labels_are_checked_and_escaped(self):
+        counter = self.registry.counter("calls_total", "Calls.", ("route",))
+        with self.assertRaises(ValueError):
+            counter.inc()
+        counter.inc('say "hi"\n')
+        self.assertIn('calls_total{route="say \\"hi\\"\\n"} 1', self.registry.render())
+
+    def test_names_are_unique(self):
+        self.registry.counter("calls_total", "Calls.")
+        with self.assertRaises(ValueError):
+            self.registry.counter("calls_total", "Calls.")
+
+
+class MetricsEndpointTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.customer = User.objects.create_user(
+            email="customer@example.com", password="pass", first_name="C", last_name="C"
+        )
+        self.admin = User.objects.create_user(
+            email="admin@example.com", password="pass", first_name="A", last_name="A",
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.customer)
+
+    def _requests(self, route):
+        return sum(
+            sum(slots[:-1])
+            for labels, slots in REQUEST_LATENCY.values().items()
+            if labels[1] == route
+        )
+
+    def test_request_latency_is_recorded_by_route(self):
+        before = self._requests("cart-list")
+        self.client.get(reverse("cart-list"))
+        self.assertEqual(self._requests("cart-list"), before + 1)
+
+    def test_cart_mutations_are_counted(self):
+        item = MenuItem.objects.create(
+            name="Dish", price=Decimal("5.00"), category=Category.objects.create(name="Mains")
+        )
+        before = CART_MUTATIONS.values().get(("add",), 0)
+        response = self.client.post(reverse("cart-list"), {"menuitem": item.id}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(CART_MUTATIONS.values()[("add",)], before + 1)
+
+    def test_exposition_needs_staff_or_token(self):
+        url = reverse("metrics")
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        self.assertIn(b"# TYPE api_request_duration_seconds histogram", response.content)
+
+    @override_settings(METRICS_TOKEN="scrape-me")
+    def test_scraper_token(self):
+        client = APIClient()
+        url = reverse("metrics")
+        self.assertEqual(client.get(url, HTTP_X_METRICS_TOKEN="scrape-me").status_code, 200)
+        self.assertNotEqual(client.get(url, HTTP_X_METRICS_TOKEN="guess").status_code, 200)
+
+
+class BookingConflictTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.customer = User.objects.create_user(
+            email="customer@example.com", password="pass", first_name="C", last_name="C"
+        )
+        self.client.force_authenticate(user=self.customer)
+        self.table = Table.objects.create(table_number=1, capacity=4)
+        TableBooking.objects.create(
+            customer=self.customer, table=self.table, booking_date=date(2030, 3, 20),
+            booking_time=time(19, 0), number_of_guests=2,
+        )
+
+    def test_constraint_violation_is_a_counted_conflict(self):
+        before = BOOKING_CONFLICTS.values().get((), 0)
+        payload = {
+            "table": self.table.id, "booking_date": "2030-03-20",
+            "booking_time": "19:00", "number_of_guests": 2,
+        }
+        # Simulate a request that validated before the first booking committed
+        with mock.patch.object(TableBookingSerializer, "get_validators", return_value=[]), \
+                mock.patch("api.serializers.table_is_free", return_value=True):
+            response = self.client.post(reverse("table-booking-list"), payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(BOOKING_CONFLICTS.values()[()], before + 1)
+        self.assertEqual(TableBooking.objects.count(), 1)
+
+    def test_overlap_is_rechecked_under_the_table_lock(self):
+        before = BOOKING_CONFLICTS.values().get((), 0)
+        # Overlaps the 19:00 booking without hitting the unique constraint
+        payload = {
+            "table": self.table.id, "booking_date": "2030-03-20",
+            "booking_time": "19:30", "number_of_guests": 2,
+        }
+        # Free when validated, taken by the time the table is locked
+        with mock.patch("api.serializers.table_is_free", side_effect=[True, False]):
+            response = self.client.post(reverse("table-booking-list"), payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(BOOKING_CONFLICTS.values()[()], before + 1)
+        self.assertEqual(TableBooking.objects.count(), 1)
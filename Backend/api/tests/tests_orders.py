@@ -0,0 +1,157 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.metrics import ORDERS_CREATED
+from api.models import Cart, CartItem, Category, MenuItem, Order, OrderItem
+from api.pricing import get_price_map
+from api.tests.helpers import WorkerCachesMixin
+
+User = get_user_model()
+
+
+class OrderCreateTest(WorkerCachesMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.customer = User.objects.create_user(
+            email="customer@example.com", password="pass", first_name="C", last_name="C"
+        )
+        self.client.force_authenticate(user=self.customer)
+        self.category = Category.objects.create(name="Mains")
+        self.menu_items = [
+            MenuItem.objects.create(
+                name=f"Dish {i}", price=Decimal("5.00"), category=self.category
+            )
+            for i in range(15)
+        ]
+
+    def _payload(self, count):
+        return {
+            "items": [
+                {"menuitem": item.id, "quantity": 1, "price": "5.00"}
+                for item in self.menu_items[:count]
+            ],
+            "subtotal": str(Decimal("5.00") * count),
+            "tax": "0.00",
+            "deliveryFee": "0.00",
+            "total": str(Decimal("5.00") * count),
+            "paymentMethod": "card",
+            "delivery": {
+                "type": "pickup",
+                "contactNumber": "0200000000",
+                "preferredTime": "18:00",
+            },
+        }
+
+    def _create(self, count):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(
+                reverse("order-list"), self._payload(count), format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        return response, len(ctx.captured_queries)
+
+    def test_created_orders_are_counted_by_delivery_type(self):
+        before = ORDERS_CREATED.values().get(("pickup",), 0)
+        self._create(1)
+        self.assertEqual(ORDERS_CREATED.values()[("pickup",)], before + 1)
+
+    def test_create_order(self):
+        cart = Cart.objects.create(customer=self.customer)
+        CartItem.objects.create(cart=cart, menuitem=self.menu_items[0], price=Decimal("5.00"))
+
+        response, _ = self._create(3)
+
+        order = Order.objects.get()
+        self.assertEqual(order.customer, self.customer)
+        self.assertEqual(order.items.count(), 3)
+        self.assertEqual(len(response.data["order"]["items"]), 3)
+        self.assertEqual(response.data["order"]["items"][0]["name"], "Dish 0")
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_price_changes_reach_every_worker(self):
+        self.reset_workers("a", "b")
+        dish = self.menu_items[0]
+        with self.worker("a"):
+            self.assertEqual(get_price_map()[dish.id].price, Decimal("5.00"))
+
+        with self.worker("b"), self.captureOnCommitCallbacks(execute=True):
+            dish.price = Decimal("7.00")
+            dish.save()
+
+        with self.worker("a"):
+            response, _ = self._create(1)
+        self.assertEqual(response.data["order"]["items"][0]["price"], "7.00")
+        self.assertEqual(Order.objects.get().subtotal, Decimal("7.00"))
+
+    def test_price_map_entries_are_named(self):
+        dish = get_price_map()[self.menu_items[0].id]
+        self.assertEqual((dish.price, dish.name), (Decimal("5.00"), "Dish 0"))
+
+    def test_new_order_items_render_the_menu_name(self):
+        response, _ = self._create(2)
+        self.assertEqual(
+            [(item["menuitem"], item["name"]) for item in response.data["order"]["items"]],
+            [(self.menu_items[0].id, "Dish 0"), (self.menu_items[1].id, "Dish 1")],
+        )
+        item = OrderItem.objects.get(menuitem=self.menu_items[1])
+        self.assertEqual(item.price, Decimal("5.00"))
+
+    def test_query_count_does_not_grow_with_basket_size(self):
+        get_price_map()
+        _, small = self._create(1)
+        _, large = self._create(15)
+        self.assertEqual(small, large)
+        self.assertLessEqual(large, 8)
+        self.assertEqual(OrderItem.objects.count(), 16)
+
+    def test_unknown_menu_item_is_rejected(self):
+        payload = self._payload(1)
+        payload["items"].append({"menuitem": 999999, "quantity": 1, "price": "5.00"})
+        response = self.client.post(reverse("order-list"), payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Order.objects.exists())
+
+    def test_prices_and_totals_come_from_the_menu(self):
+        payload = self._payload(2)
+        for item in payload["items"]:
+            item["price"] = "0.01"
+        payload.update(subtotal="0.02", tax="0.00", deliveryFee="0.00", total="0.02")
+        payload["delivery"] = {"type": "delivery", "address": "1 Road", "contactNumber": "0200000000"}
+        payload["items"][0]["quantity"] = 3
+
+        response = self.client.post(reverse("order-list"), payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+
+        order = Order.objects.get()
+        self.assertEqual(
+            (order.subtotal, order.tax, order.deliveryFee, order.total),
+            (Decimal("20.00"), Decimal("2.00"), Decimal("5.00"), Decimal("27.00")),
+        )
+        self.assertEqual(
+            sorted(order.items.values_list("price", flat=True)), [Decimal("5.00")] * 2
+        )
+        self.assertEqual(response.data["order"]["total"], "27.00")
+
+    def test_checkout_reads_prices_from_the_cached_map(self):
+        self._create(1)
+        with CaptureQueriesContext(connection) as ctx:
+            self._create(15)
+        menu_queries = [q["sql"] for q in ctx.captured_queries if '"api_menuitem"' in q["sql"]]
+        self.assertEqual(menu_queries, [])
+
+        # A menu item created after the map was cached is still found
+        late = MenuItem.objects.create(name="Late", price=Decimal("7.50"), category=self.category)
+        payload = self._payload(0)
+        payload["items"] = [{"menuitem": late.id, "quantity": 1}]
+        response = self.client.post(reverse("order-list"), payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(response.data["order"]["subtotal"], "7.50")
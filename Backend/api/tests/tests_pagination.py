@@ -0,0 +1,54 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.models import Category, MenuItem, Order
+
+User = get_user_model()
+
+
+class PaginationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email="customer@example.com", password="pass", first_name="C", last_name="C"
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_orders_use_cursor_pagination(self):
+        for i in range(5):
+            Order.objects.create(
+                customer=self.user, reference=f"REF-{i}", subtotal=10, tax=1,
+                deliveryFee=0, total=11, paymentMethod="card", delivery_type="pickup",
+                contact_number="0200000000",
+            )
+
+        response = self.client.get(reverse("order-list"), {"page_size": 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [order["reference"] for order in response.data["results"]], ["REF-4", "REF-3"]
+        )
+
+        seen = []
+        url = reverse("order-list") + "?page_size=2"
+        while url:
+            response = self.client.get(url)
+            seen.extend(order["reference"] for order in response.data["results"])
+            url = response.data["next"]
+        self.assertEqual(seen, [f"REF-{i}" for i in reversed(range(5))])
+
+    def test_page_size_is_capped(self):
+        category = Category.objects.create(name="Mains")
+        for i in range(3):
+            MenuItem.objects.create(name=f"Dish {i}", price=Decimal("5.00"), category=category)
+
+        response = self.client.get(reverse("menuitem-list"), {"page_size": 2})
+        self.assertEqual(response.json()["count"], 3)
+        self.assertEqual(len(response.json()["results"]), 2)
+
+        response = self.client.get(reverse("menuitem-list"), {"page_size": 100000})
+        self.assertEqual(len(response.json()["results"]), 3)
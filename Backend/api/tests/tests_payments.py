@@ -0,0 +1,153 @@
+import hashlib
+import hmac
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.metrics import PAYSTACK_VERIFICATION
+from api.models import Order, OrderStatusEvent, PaymentVerification
+from api.payments import process_verification_batch
+
+from .helpers import FakePaystackMixin
+
+User = get_user_model()
+
+
+class PaymentPipelineTest(FakePaystackMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email="customer@example.com", password="pass", first_name="C", last_name="C"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.order = Order.objects.create(
+            customer=self.user, reference="REF-1", subtotal=10, tax=1, deliveryFee=0,
+            total=11, paymentMethod="card", delivery_type="pickup", contact_number="0200000000",
+        )
+        self.settings = override_settings(
+            PAYSTACK_SECRET_KEY="sk_test", PAYSTACK_BASE_URL=self.base_url,
+            PAYSTACK_READ_TIMEOUT=0.2, PAYSTACK_MAX_RETRIES=0,
+        )
+        self.settings.enable()
+        self.addCleanup(self.settings.disable)
+
+    def _verify(self, reference):
+        return self.client.post(
+            reverse("verify-payment", args=[self.order.id]), {"paystackRef": reference}, format="json"
+        )
+
+    def _webhook(self, payload, signature=None):
+        body = json.dumps(payload).encode()
+        if signature is None:
+            signature = hmac.new(b"sk_test", body, hashlib.sha512).hexdigest()
+        return self.client.generic(
+            "POST", reverse("paystack-webhook"), body,
+            content_type="application/json", HTTP_X_PAYSTACK_SIGNATURE=signature,
+        )
+
+    def test_verify_queues_and_worker_confirms(self):
+        response = self._verify("paid-1100")
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.paystack_reference, "paid-1100")
+        self.assertFalse(self.order.paid)
+        self.assertEqual(self.server.hits, [])
+
+        counts = process_verification_batch()
+        self.assertEqual(counts, {"verified": 1, "failed": 0, "retried": 0})
+        self.order.refresh_from_db()
+        self.assertTrue(self.order.paid)
+        self.assertEqual(self.order.status, "confirmed")
+        self.assertEqual(
+            list(OrderStatusEvent.objects.values_list("from_status", "to_status")),
+            [("pending", "confirmed")],
+        )
+        self.assertEqual(self._verify("paid-1100").data, {"status": "success"})
+
+    def test_verification_latency_is_recorded_by_outcome(self):
+        def observed(outcome):
+            slots = PAYSTACK_VERIFICATION.values().get((outcome,))
+            return sum(slots[:-1]) if slots else 0
+
+        before = observed("verified"), observed("failed")
+        self._verify("paid-1100")
+        process_verification_batch()
+        self.assertEqual((observed("verified"), observed("failed")), (before[0] + 1, before[1]))
+
+    def test_webhook_is_signed_and_deduplicated(self):
+        event = {
+            "event": "charge.success",
+            "data": {
+                "reference": "paid-1100",
+                "metadata": {"custom_fields": [{"variable_name": "order_id", "value": self.order.id}]},
+            },
+        }
+        response = self._webhook(event, signature="forged")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertFalse(PaymentVerification.objects.exists())
+
+        for _ in range(3):
+            self.assertEqual(self._webhook(event).status_code, status.HTTP_200_OK)
+        self._verify("paid-1100")
+        self.assertEqual(PaymentVerification.objects.count(), 1)
+
+        process_verification_batch()
+        self.assertEqual(len(self.server.hits), 1)
+        self.order.refresh_from_db()
+        self.assertTrue(self.order.paid)
+
+    def test_amount_mismatch_fails_without_paying(self):
+        self._verify("paid-500")
+        counts = process_verification_batch()
+        self.assertEqual(counts["failed"], 1)
+        self.order.refresh_from_db()
+        self.assertFalse(self.order.paid)
+        job = PaymentVerification.objects.get()
+        self.assertEqual(job.error, "Payment amount does not match order amount")
+
+    def test_unavailable_provider_is_retried_later(self):
+        self._verify("down")
+        self.assertEqual(process_verification_batch()["retried"], 1)
+        job = PaymentVerification.objects.get()
+        self.assertEqual((job.status, job.attempts), ("pending", 1))
+        self.assertGreater(job.available_at, job.created)
+        # Not due yet
+        self.assertEqual(process_verification_batch()["retried"], 0)
+
+    def _other_order(self, customer=None):
+        return Order.objects.create(
+            customer=customer or self.user, reference="REF-2", subtotal=10, tax=1, deliveryFee=0,
+            total=11, paymentMethod="card", delivery_type="pickup", contact_number="0200000000",
+        )
+
+    def test_reference_pays_for_one_order_only(self):
+        other = self._other_order()
+        self.assertEqual(self._verify("paid-1100").status_code, status.HTTP_202_ACCEPTED)
+        response = self.client.post(
+            reverse("verify-payment", args=[other.id]), {"paystackRef": "paid-1100"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        process_verification_batch()
+        self.order.refresh_from_db()
+        other.refresh_from_db()
+        self.assertTrue(self.order.paid)
+        self.assertFalse(other.paid)
+        self.assertIsNone(other.paystack_reference)
+
+    def test_cannot_verify_someone_elses_order(self):
+        stranger = User.objects.create_user(
+            email="stranger@example.com", password="pass", first_name="S", last_name="S"
+        )
+        other = self._other_order(customer=stranger)
+        response = self.client.post(
+            reverse("verify-payment", args=[other.id]), {"paystackRef": "paid-1100"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        other.refresh_from_db()
+        self.assertIsNone(other.paystack_reference)
@@ -0,0 +1,56 @@
+import time
+
+from django.test import TestCase
+
+from api.paystack import CircuitBreaker, PaystackClient, PaystackError, PaystackUnavailable
+
+from .helpers import FakePaystackMixin
+
+
+class PaystackClientTest(FakePaystackMixin, TestCase):
+    def _client(self, **kwargs):
+        options = {"read_timeout": 0.2, "max_retries": 1, "backoff_factor": 0}
+        options.update(kwargs)
+        return PaystackClient("sk_test", base_url=self.base_url, **options)
+
+    def test_verify_reuses_one_connection(self):
+        client = self._client()
+        self.assertEqual(client.verify_transaction("paid-500")["amount"], 500)
+        self.assertEqual(client.verify_transaction("paid-700")["amount"], 700)
+        pool = client.session.get_adapter(self.base_url).poolmanager
+        self.assertEqual(len(pool.pools), 1)
+
+    def test_client_errors_are_not_retried(self):
+        with self.assertRaises(PaystackError) as ctx:
+            self._client().verify_transaction("missing")
+        self.assertEqual(ctx.exception.status_code, 404)
+        self.assertEqual(len(self.server.hits), 1)
+
+    def test_server_errors_are_retried_then_raise(self):
+        with self.assertRaises(PaystackUnavailable):
+            self._client(max_retries=2).verify_transaction("down")
+        self.assertEqual(len(self.server.hits), 3)
+
+    def test_read_timeout_is_bounded(self):
+        started = time.monotonic()
+        with self.assertRaises(PaystackUnavailable):
+            self._client(max_retries=0).verify_transaction("slow")
+        self.assertLess(time.monotonic() - started, 0.45)
+
+    def test_breaker_opens_after_repeated_failures(self):
+        now = [0.0]
+        client = self._client(
+            max_retries=0, breaker=CircuitBreaker(threshold=2, reset_timeout=10, clock=lambda: now[0])
+        )
+        for _ in range(2):
+            with self.assertRaises(PaystackUnavailable):
+                client.verify_transaction("down")
+        self.assertTrue(client.breaker.is_open)
+
+        with self.assertRaises(PaystackUnavailable):
+            client.verify_transaction("paid-100")
+        self.assertEqual(len(self.server.hits), 2)
+
+        now[0] = 11
+        self.assertEqual(client.verify_transaction("paid-100")["amount"], 100)
+        self.assertFalse(client.breaker.is_open)
@@ -0,0 +1,140 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.models import Cart, CartItem, Category, MenuItem, Order, OrderItem
+from api.profiling import QueryProfile, QueryRecorder, fingerprint, get_query_budget, query_profile
+from api.tests.helpers import QueryCountMixin
+
+User = get_user_model()
+
+
+class FingerprintTest(SimpleTestCase):
+    def test_values_and_in_list_lengths_are_stripped(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id = 3 AND name = 'a''b' AND x IN (%s, %s)"),
+            fingerprint("SELECT  *  FROM t WHERE id = 41 AND name = 'c' AND x IN (%s)"),
+        )
+
+    def test_duplicates_count_repeated_statements(self):
+        recorder = QueryRecorder()
+        recorder.statements = [
+            "SELECT * FROM api_menuitem WHERE id = 1",
+            "SELECT * FROM api_menuitem WHERE id = 2",
+            "SELECT * FROM api_menuitem WHERE id = 3",
+            "SELECT * FROM api_cart",
+        ]
+        self.assertEqual(recorder.duplicates(), {"SELECT * FROM api_menuitem WHERE id = ?": 3})
+
+        profile = QueryProfile()
+        profile.record("GET", "cart-list", recorder)
+        profile.record("GET", "cart-list", recorder)
+        [view] = profile.snapshot()
+        self.assertEqual((view["method"], view["view"]), ("GET", "cart-list"))
+        self.assertEqual(view["requests"], 2)
+        self.assertEqual(view["queries"], 8)
+        self.assertEqual(view["max_queries"], 4)
+        self.assertEqual(
+            view["duplicates"], [{"sql": "SELECT * FROM api_menuitem WHERE id = ?", "redundant": 4}]
+        )
+
+    @override_settings(QUERY_BUDGETS={"order-list": 4, "POST order-list": 16})
+    def test_method_specific_budget_wins(self):
+        self.assertEqual(get_query_budget("order-list", "GET"), 4)
+        self.assertEqual(get_query_budget("order-list", "POST"), 16)
+        self.assertIsNone(get_query_budget("cart-list", "GET"))
+
+
+class QueryProfilerMiddlewareTest(QueryCountMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        query_profile.reset()
+        self.addCleanup(query_profile.reset)
+        self.client = APIClient()
+        self.customer = User.objects.create_user(
+            email="customer@example.com", password="pass", first_name="C", last_name="C"
+        )
+        self.admin = User.objects.create_user(
+            email="admin@example.com", password="pass", first_name="A", last_name="A",
+            is_staff=True,
+        )
+        self.client.force_authenticate(user=self.customer)
+        category = Category.objects.create(name="Mains")
+        cart = Cart.objects.create(customer=self.customer)
+        self.items = []
+        for n in range(5):
+            item = MenuItem.objects.create(name=f"Dish {n}", price=Decimal("5.00"), category=category)
+            CartItem.objects.create(cart=cart, menuitem=item, price=item.price)
+            self.items.append(item)
+
+    def _views(self):
+        return {(view["method"], view["view"]): view for view in query_profile.snapshot()}
+
+    def test_requests_are_recorded_by_view_name(self):
+        self.client.get(reverse("cart-list"))
+        self.client.get(reverse("cart-list"))
+        self.client.get(reverse("menuitem-list"))
+
+        views = self._views()
+        self.assertEqual(views["GET", "cart-list"]["requests"], 2)
+        self.assertGreater(views["GET", "cart-list"]["queries"], 0)
+        self.assertEqual(views["GET", "menuitem-list"]["requests"], 1)
+
+    @override_settings(QUERY_BUDGETS={"cart-list": 3, "POST cart-list": 10})
+    def test_methods_are_recorded_apart_with_their_budgets(self):
+        self.client.get(reverse("cart-list"))
+        self.client.post(reverse("cart-list"), {"menuitem": self.items[0].id}, format="json")
+
+        views = self._views()
+        self.assertEqual(views["GET", "cart-list"]["requests"], 1)
+        self.assertEqual(views["GET", "cart-list"]["budget"], 3)
+        self.assertEqual(views["POST", "cart-list"]["requests"], 1)
+        self.assertEqual(views["POST", "cart-list"]["budget"], 10)
+
+    @override_settings(QUERY_BUDGETS={"cart-list": 0})
+    def test_exceeding_the_budget_is_logged(self):
+        with self.assertLogs("api.queries", "WARNING") as logs:
+            self.client.get(reverse("cart-list"))
+        fields = logs.records[0].fields
+        self.assertEqual(fields["view"], "cart-list")
+        self.assertEqual(fields["budget"], 0)
+        self.assertEqual(self._views()["GET", "cart-list"]["over_budget"], 1)
+
+    def test_metrics_endpoint_is_admin_only(self):
+        self.client.get(reverse("cart-list"))
+        url = reverse("query-metrics")
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("cart-list", [view["view"] for view in response.data["views"]])
+
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertNotIn(("GET", "cart-list"), self._views())
+
+    def test_hot_endpoints_stay_within_budget(self):
+        order = Order.objects.create(
+            customer=self.customer, reference="REF-1", subtotal=10, tax=1, deliveryFee=0,
+            total=11, paymentMethod="card", delivery_type="pickup", contact_number="0200000000",
+        )
+        for item in self.items:
+            OrderItem.objects.create(order=order, menuitem=item, quantity=1, price=item.price)
+
+        self.assertWithinQueryBudget(reverse("cart-list"))
+        self.assertWithinQueryBudget(reverse("menuitem-list"))
+        self.assertWithinQueryBudget(reverse("order-list"))
+
+    @override_settings(QUERY_BUDGETS={"cart-list": 0})
+    def test_budget_assertion_fails_over_budget(self):
+        with self.assertRaisesMessage(AssertionError, "over its budget of 0"):
+            self.assertWithinQueryBudget(reverse("cart-list"))
+
+    @override_settings(QUERY_BUDGETS={})
+    def test_budget_assertion_requires_a_budget(self):
+        with self.assertRaisesMessage(AssertionError, "no query budget"):
+            self.assertWithinQueryBudget(reverse("cart-list"))
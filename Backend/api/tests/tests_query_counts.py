@@ -0,0 +1,111 @@
+from datetime import date, time
+from decimal import Decimal
+from itertools import count
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.models import (
+    Cart,
+    CartItem,
+    Category,
+    MenuItem,
+    Order,
+    OrderItem,
+    Table,
+    TableBooking,
+)
+from api.tests.helpers import QueryCountMixin
+
+User = get_user_model()
+
+
+class ListEndpointQueryCountTest(QueryCountMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.sequence = count()
+        manager_group = Group.objects.create(name="Managers")
+        self.manager = User.objects.create_user(
+            email="manager@example.com", password="pass", first_name="M", last_name="M",
+            is_staff=True,
+        )
+        self.manager.groups.add(manager_group)
+        self.client.force_authenticate(user=self.manager)
+        self.category = Category.objects.create(name="Mains")
+
+    def _menu_item(self):
+        n = next(self.sequence)
+        category = Category.objects.create(name=f"Category {n}")
+        return MenuItem.objects.create(name=f"Dish {n}", price=Decimal("5.00"), category=category)
+
+    def _user(self):
+        n = next(self.sequence)
+        return User.objects.create_user(
+            email=f"user{n}@example.com", password="pass", first_name="U", last_name=str(n)
+        )
+
+    def test_orders(self):
+        def add_orders(rows):
+            for _ in range(rows):
+                n = next(self.sequence)
+                order = Order.objects.create(
+                    customer=self._user(), reference=f"REF-{n}", subtotal=10, tax=1,
+                    deliveryFee=0, total=11, paymentMethod="card", delivery_type="pickup",
+                    contact_number="0200000000",
+                )
+                for _ in range(2):
+                    OrderItem.objects.create(
+                        order=order, menuitem=self._menu_item(), quantity=1, price=5
+                    )
+
+        self.assertQueryCountIsFlat(reverse("order-list"), add_orders)
+
+    def test_menu_items(self):
+        def add_menu_items(rows):
+            for _ in range(rows):
+                self._menu_item()
+            # Measure the uncached path
+            cache.clear()
+
+        self.assertQueryCountIsFlat(reverse("menuitem-list"), add_menu_items)
+
+    def test_categories(self):
+        def add_categories(rows):
+            for _ in range(rows):
+                Category.objects.create(name=f"Category {next(self.sequence)}")
+            cache.clear()
+
+        self.assertQueryCountIsFlat(reverse("category-list"), add_categories)
+
+    def test_users(self):
+        self.assertQueryCountIsFlat(
+            reverse("users-list"), lambda rows: [self._user() for _ in range(rows)]
+        )
+
+    def test_table_bookings(self):
+        def add_bookings(rows):
+            for _ in range(rows):
+                n = next(self.sequence)
+                table = Table.objects.create(table_number=n, capacity=4)
+                TableBooking.objects.create(
+                    customer=self._user(), table=table, booking_date=date(2024, 3, 20),
+                    booking_time=time(19, 0), number_of_guests=2,
+                )
+
+        self.assertQueryCountIsFlat(reverse("table-booking-list"), add_bookings)
+
+    def test_cart(self):
+        cart = Cart.objects.create(customer=self.manager)
+
+        def add_cart_items(rows):
+            for _ in range(rows):
+                CartItem.objects.create(cart=cart, menuitem=self._menu_item(), price=5)
+            # Measure the uncached path
+            cache.clear()
+
+        self.assertQueryCountIsFlat(reverse("cart-list"), add_cart_items)
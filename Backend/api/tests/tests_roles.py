@@ -0,0 +1,114 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.roles import get_group_names, get_role
+
+User = get_user_model()
+
+
+class RoleResolutionTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.manager_group = Group.objects.create(name="Managers")
+        self.crew_group = Group.objects.create(name="Crew")
+        self.user = User.objects.create_user(
+            email="user@example.com", password="pass", first_name="A", last_name="B"
+        )
+
+    def test_role_is_resolved_once_per_instance(self):
+        self.user.groups.add(self.manager_group)
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(user.role, "manager")
+            self.assertEqual(get_role(user), "manager")
+            self.assertIn("Managers", get_group_names(user))
+
+    def test_process_cache_is_shared_between_instances(self):
+        get_role(User.objects.get(pk=self.user.pk))
+        with self.assertNumQueries(0):
+            self.assertEqual(get_role(self.user), "customer")
+
+    def test_group_changes_invalidate_cache(self):
+        self.assertEqual(get_role(self.user), "customer")
+        self.user.groups.add(self.crew_group)
+        self.assertEqual(User.objects.get(pk=self.user.pk).role, "delivery")
+
+        self.crew_group.user_set.remove(self.user)
+        self.assertEqual(User.objects.get(pk=self.user.pk).role, "customer")
+
+        self.manager_group.user_set.add(self.user)
+        self.assertEqual(User.objects.get(pk=self.user.pk).role, "manager")
+
+        self.manager_group.user_set.clear()
+        self.assertEqual(User.objects.get(pk=self.user.pk).role, "customer")
+
+    def test_group_delete_invalidates_cache(self):
+        self.user.groups.add(self.crew_group)
+        self.assertEqual(User.objects.get(pk=self.user.pk).role, "delivery")
+
+        self.crew_group.delete()
+        self.assertEqual(User.objects.get(pk=self.user.pk).role, "customer")
+
+    def test_group_rename_invalidates_cache(self):
+        self.user.groups.add(self.crew_group)
+        self.assertEqual(User.objects.get(pk=self.user.pk).role, "delivery")
+
+        self.crew_group.name = "Former crew"
+        self.crew_group.save()
+        self.assertEqual(User.objects.get(pk=self.user.pk).role, "customer")
+
+    def test_user_delete_invalidates_cache(self):
+        key = f"user-groups:{self.user.pk}"
+        get_role(User.objects.get(pk=self.user.pk))
+        self.assertIsNotNone(cache.get(key))
+
+        self.user.delete()
+        self.assertIsNone(cache.get(key))
+
+
+class UserManagementRoleTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        manager_group = Group.objects.create(name="Managers")
+        self.manager = User.objects.create_user(
+            email="manager@example.com", password="pass", first_name="M", last_name="M"
+        )
+        self.manager.groups.add(manager_group)
+        self.client.force_authenticate(user=self.manager)
+
+    def _create_users(self, count, offset=0):
+        for i in range(offset, offset + count):
+            User.objects.create_user(
+                email=f"user{i}@example.com", password="pass", first_name="U", last_name=str(i)
+            )
+
+    def test_list_users_query_count_is_flat(self):
+        self._create_users(3)
+        cache.clear()
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("users-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self._create_users(10, offset=3)
+        cache.clear()
+        with self.assertNumQueries(3):
+            self.client.get(reverse("users-list"))
+
+    def test_update_role_is_visible_immediately(self):
+        self._create_users(1)
+        user = User.objects.get(email="user0@example.com")
+        self.assertEqual(get_role(user), "customer")
+
+        response = self.client.post(
+            reverse("users-update-role", kwargs={"pk": user.pk}),
+            {"role": "delivery"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(User.objects.get(pk=user.pk).role, "delivery")
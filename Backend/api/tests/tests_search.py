@@ -0,0 +1,66 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.models import Category, MenuItem, MenuItemSearchToken
+from api.search import tokenize
+
+User = get_user_model()
+
+
+class MenuSearchTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email="customer@example.com", password="pass", first_name="C", last_name="C"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.drinks = Category.objects.create(name="Drinks")
+        self.mains = Category.objects.create(name="Mains")
+        MenuItem.objects.create(
+            name="Jollof Rice", price=Decimal("8.00"), category=self.mains,
+            description="Smoky party rice",
+        )
+        MenuItem.objects.create(
+            name="Zobo", price=Decimal("2.00"), category=self.drinks,
+            description="Hibiscus drink with ginger",
+        )
+
+    def _search(self, query):
+        cache.clear()
+        response = self.client.get(
+            reverse("menuitem-list"), {"search": query}, HTTP_ACCEPT="application/json"
+        )
+        return sorted(item["name"] for item in response.json()["results"])
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("Crème Brûlée, 2 pcs"), ["creme", "brulee", "2", "pcs"])
+
+    def test_search_matches_name_description_and_category(self):
+        self.assertEqual(self._search("jollof"), ["Jollof Rice"])
+        self.assertEqual(self._search("ginger"), ["Zobo"])
+        self.assertEqual(self._search("drinks"), ["Zobo"])
+
+    def test_prefix_and_multi_token_search(self):
+        self.assertEqual(self._search("jol"), ["Jollof Rice"])
+        self.assertEqual(self._search("smoky ri"), ["Jollof Rice"])
+        self.assertEqual(self._search("smoky zo"), [])
+
+    def test_index_follows_edits(self):
+        item = MenuItem.objects.get(name="Zobo")
+        item.description = "Chilled sorrel"
+        item.save()
+        self.assertEqual(self._search("ginger"), [])
+        self.assertEqual(self._search("sorrel"), ["Zobo"])
+
+        self.drinks.name = "Beverages"
+        self.drinks.save()
+        self.assertEqual(self._search("bever"), ["Zobo"])
+
+        item.delete()
+        self.assertFalse(MenuItemSearchToken.objects.filter(token="sorrel").exists())
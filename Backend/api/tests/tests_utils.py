@@ -0,0 +1,72 @@
+import os
+import threading
+import unittest
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from api.utils import OrderReferenceAllocator, generate_unique_order_reference
+
+
+class OrderReferenceAllocatorTest(SimpleTestCase):
+    def test_reference_format(self):
+        reference = generate_unique_order_reference()
+        self.assertRegex(reference, r"^ORD-\d{17}-[0-9A-F]{10}$")
+
+    def test_references_are_unique_across_threads(self):
+        allocator = OrderReferenceAllocator()
+        results = []
+        lock = threading.Lock()
+
+        def worker():
+            refs = [allocator.allocate() for _ in range(2000)]
+            with lock:
+                results.extend(refs)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), len(set(results)))
+
+    def test_references_are_time_ordered_within_a_process(self):
+        allocator = OrderReferenceAllocator(node_id=1)
+        refs = [allocator.allocate() for _ in range(500)]
+        self.assertEqual(refs, sorted(refs))
+
+    def test_clock_moving_backwards_does_not_repeat(self):
+        allocator = OrderReferenceAllocator(node_id=1)
+        with mock.patch("api.utils.time.time_ns", return_value=2_000_000_000_000_000_000):
+            first = allocator.allocate()
+        with mock.patch("api.utils.time.time_ns", return_value=1_000_000_000_000_000_000):
+            second = allocator.allocate()
+        self.assertNotEqual(first, second)
+        self.assertLess(first, second)
+
+    @unittest.skipUnless(hasattr(os, "fork"), "needs fork")
+    def test_forked_workers_with_a_fixed_node_id_do_not_collide(self):
+        allocator = OrderReferenceAllocator(node_id=1)
+        allocator.allocate()
+        children = []
+        # Freeze the clock so both workers mint in the same millisecond
+        with mock.patch("api.utils.time.time_ns", return_value=1_700_000_000_000_000_000):
+            for _ in range(2):
+                read_fd, write_fd = os.pipe()
+                pid = os.fork()
+                if pid == 0:
+                    os.close(read_fd)
+                    refs = [allocator.allocate() for _ in range(100)]
+                    os.write(write_fd, "\n".join(refs).encode())
+                    os._exit(0)
+                os.close(write_fd)
+                children.append((pid, read_fd))
+
+        results = []
+        for pid, read_fd in children:
+            with os.fdopen(read_fd) as pipe:
+                results.append(set(pipe.read().split("\n")))
+            os.waitpid(pid, 0)
+        self.assertEqual(len(results[0]), 100)
+        self.assertFalse(results[0] & results[1])
@@ -14,7 +14,12 @@ from .views import (
     DeliveryOrderViewSet,
     UserManagementViewSet,
     logout_view,
+    CookieTokenObtainPairView,
+    CookieTokenRefreshView,
     verify_payment,
+    paystack_webhook,
+    query_metrics,
+    metrics_view,
     PasswordResetView,
     PasswordResetConfirmView,
 )
@@ -50,7 +55,12 @@ urlpatterns = [
     path("cart/", cart_list, name="cart-list"),
     path("cart/<int:pk>/", cart_detail, name="cart-detail"),
     path("auth/jwt/logout/", logout_view, name="auth-logout"),
+    path("auth/cookie/login/", CookieTokenObtainPairView.as_view(), name="auth-cookie-login"),
+    path("auth/cookie/refresh/", CookieTokenRefreshView.as_view(), name="auth-cookie-refresh"),
     path('payments/verify/<int:order_id>/', verify_payment, name='verify-payment'),
+    path('payments/webhook/', paystack_webhook, name='paystack-webhook'),
+    path('metrics/', metrics_view, name='metrics'),
+    path('metrics/queries/', query_metrics, name='query-metrics'),
     path('auth/password/reset/', PasswordResetView.as_view(), name='password-reset'),
     path('auth/password/reset/confirm/', PasswordResetConfirmView.as_view(), name='password-reset-confirm'),
     # Catch-all route for React
@@ -1,14 +1,81 @@
-from django.db import transaction
-import uuid
-from django.utils import timezone
-from datetime import datetime
+import os
+import threading
+import time
+from datetime import datetime, timezone
 
+from django.conf import settings
 
-def generate_unique_order_reference():
-    """Generate a unique order reference combining timestamp and UUID"""
-    timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-    unique_id = str(uuid.uuid4().hex)[:8]
 
-    res = f"ORD-{timestamp}-{unique_id}"
-    print(res)
-    return res
\ No newline at end of file
+class OrderReferenceAllocator:
+    """
+    Allocate time-ordered order references that are unique by construction.
+
+    A reference is ``ORD-<utc timestamp with ms>-<node><sequence>``. The
+    node id identifies the process and the sequence separates references
+    minted within the same millisecond, so no database probe is needed;
+    the unique index on ``Order.reference`` remains the safety net.
+
+    The node id is re-derived after a fork. Without ``node_id`` it is
+    random; with one (``ORDER_REFERENCE_NODE_ID``, unique per host) it
+    keeps the low 16 bits of the setting and adds the low byte of the pid,
+    so forked workers of one host differ as long as their pids do modulo
+    256.
+    """
+
+    SEQUENCE_BITS = 16
+    NODE_BITS = 24
+    PID_BITS = 8
+
+    def __init__(self, node_id=None):
+        self._lock = threading.Lock()
+        self._fixed_node_id = node_id
+        self._pid = None
+        self._node_id = None
+        self._last_ms = 0
+        self._sequence = 0
+
+    def _ensure_node(self):
+        pid = os.getpid()
+        if pid != self._pid:
+            self._pid = pid
+            if self._fixed_node_id is not None:
+                fixed = self._fixed_node_id % (1 << (self.NODE_BITS - self.PID_BITS))
+                self._node_id = fixed << self.PID_BITS | pid % (1 << self.PID_BITS)
+            else:
+                self._node_id = int.from_bytes(os.urandom(3), "big")
+            self._last_ms = 0
+            self._sequence = 0
+
+    def _next(self):
+        with self._lock:
+            self._ensure_node()
+            now_ms = time.time_ns() // 1_000_000
+            # Never go backwards if the wall clock does
+            if now_ms <= self._last_ms:
+                now_ms = self._last_ms
+                self._sequence = (self._sequence + 1) % (1 << self.SEQUENCE_BITS)
+                if self._sequence == 0:
+                    # Sequence exhausted for this millisecond, borrow the next one
+                    now_ms += 1
+            else:
+                self._sequence = 0
+            self._last_ms = now_ms
+            return now_ms, self._node_id, self._sequence
+
+    def allocate(self):
+        now_ms, node_id, sequence = self._next()
+        stamp = datetime.fromtimestamp(now_ms / 1000, tz=timezone.utc)
+        return (
+            f"ORD-{stamp:%Y%m%d%H%M%S}{now_ms % 1000:03d}-"
+            f"{node_id:06X}{sequence:04X}"
+        )
+
+
+_allocator = OrderReferenceAllocator(
+    node_id=getattr(settings, "ORDER_REFERENCE_NODE_ID", None)
+)
+
+
+def generate_unique_order_reference():
+    """Generate a unique, time-ordered order reference"""
+    return _allocator.allocate()
@@ -1,44 +1,83 @@
 from django.shortcuts import render
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse
 from rest_framework.response import Response
 from django.core.exceptions import ValidationError
-from decimal import Decimal
 
 from .models import MenuItem, Cart, CartItem, Order, OrderItem, Category, Table, TableBooking
-from .utils import generate_unique_order_reference
 from .serializers import (
     CategorySerializer,
     MenuItemSerializer,
     CartItemSerializer,
-    CartSerializer,
     OrderItemSerializer,
     OrderSerializer,
     UserSerializer,
     CustomOrderSerializer,
     TableSerializer,
     TableBookingSerializer,
+    AvailabilityQuerySerializer,
 )
-from rest_framework import viewsets, status, filters, permissions
+from rest_framework import viewsets, status, filters, permissions, exceptions
 from rest_framework.permissions import (
     IsAuthenticated,
     IsAuthenticatedOrReadOnly,
     IsAdminUser,
 )
 from django.shortcuts import get_object_or_404
-from .permissions import IsManager, IsDeliveryCrew
+from .permissions import CanScrapeMetrics, IsManager, IsDeliveryCrew, IsKitchenStaff
+from .pagination import CreatedCursorPagination, MenuPagination, StandardPageNumberPagination
+from .roles import forget_user_roles, is_staff_member
+from .catalog import CatalogCacheMixin
+from .search import MenuSearchFilter
+from .availability import DayAvailability
+from .idempotency import idempotent
+from .kitchen import InvalidCursor, kitchen_queue
+from .dispatch import dispatch_ready_orders
+from .lifecycle import (
+    InvalidTransition,
+    TransitionConflict,
+    TransitionNotAllowed,
+    record_creation,
+    transition,
+)
+from .authentication import (
+    ACCESS_COOKIE,
+    REFRESH_COOKIE,
+    EventTicketAuthentication,
+    StatelessJWTAuthentication,
+    EVENT_TICKET_MAX_AGE,
+    delete_auth_cookies,
+    issue_event_ticket,
+    set_auth_cookies,
+)
+from .denylist import revoke
+from .events import EventStreamRenderer, event_stream_response, publish_order_status, topics_for_user
+from .payments import (
+    ReferenceInUse,
+    attach_reference,
+    enqueue_verification,
+    order_id_from_metadata,
+    valid_webhook_signature,
+)
+from .carts import bump_cart_version, cart_etag, get_cart_version, priced_cart_snapshot
+from .profiling import query_profile
+from .metrics import BOOKING_CONFLICTS, CART_MUTATIONS, CONTENT_TYPE, ORDERS_CREATED, registry
 from django.contrib.auth.models import User, Group
 from django.db.models import Q
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.decorators import action
 from datetime import datetime, timedelta
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 from datetime import datetime, timezone
 from django.views.decorators.csrf import csrf_protect
 from django.utils.decorators import method_decorator
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from django.views.decorators.csrf import ensure_csrf_cookie
 from rest_framework.views import APIView
+from rest_framework.renderers import JSONRenderer
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
 from rest_framework.permissions import AllowAny
 from django.utils.http import urlsafe_base64_encode
@@ -46,12 +85,13 @@ from django.utils.http import urlsafe_base64_decode
 from django.utils.encoding import force_bytes
 from djoser.views import UserViewSet
 from django.contrib.auth import get_user_model
+import json
 import logging
-import requests
-from django.conf import settings
 from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
 
 User = get_user_model()  # Get the custom User model
 
@@ -74,6 +114,7 @@ class PasswordResetView(APIView):
         uid = urlsafe_base64_encode(force_bytes(user.pk))
 
         reset_link = f"https://frontend-restaurant-orcin.vercel.app/reset-password/{uid}/{token}"
+        # Queued in the outbox, see api/mail.py
         send_mail(
             'Password Reset',
             f'Click the link to reset your password: {reset_link}',
@@ -94,11 +135,6 @@ class PasswordResetConfirmView(APIView):
         new_password = request.data.get('new_password')
         re_new_password = request.data.get('re_new_password')
 
-        print("Received UID:", uid)
-        print("Received Token:", token)
-        print("New Password:", new_password)
-        print("Re-New Password:", re_new_password)
-
         if not all([uid, token, new_password, re_new_password]):
             return Response({'error': 'All fields are required.'}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -118,7 +154,7 @@ class PasswordResetConfirmView(APIView):
         return Response({'message': 'Password has been reset successfully.'}, status=status.HTTP_200_OK)
     
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(CatalogCacheMixin, viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [IsManager]
@@ -127,20 +163,24 @@ class CategoryViewSet(viewsets.ModelViewSet):
         filters.SearchFilter,
         filters.OrderingFilter,
     ]
+    catalog_cache_params = ("search", "ordering")
 
 
-class MenuItemViewSet(viewsets.ModelViewSet):
-    queryset = MenuItem.objects.all()
+class MenuItemViewSet(CatalogCacheMixin, viewsets.ModelViewSet):
+    queryset = MenuItem.objects.select_related("category")
     serializer_class = MenuItemSerializer
     permission_classes = [IsManager]
+    pagination_class = MenuPagination
     filter_backends = [
         DjangoFilterBackend,
-        filters.SearchFilter,
+        MenuSearchFilter,
         filters.OrderingFilter,
     ]
     filterset_fields = ["category", "featured"]
-    search_fields = ["title"]
+    # Served from the MenuItemSearchToken index, see api/search.py
+    search_fields = ["name", "description", "category__name"]
     ordering_fields = ["price"]
+    catalog_cache_params = ("category", "featured", "search", "ordering", "page", "page_size")
 
 
 class CartViewSet(viewsets.ViewSet):
@@ -148,17 +188,33 @@ class CartViewSet(viewsets.ViewSet):
 
     def list(self, request):
         """
-        List all cart items
+        List all cart items with server-computed totals.
+
+        Clients poll this endpoint, so it carries an ETag derived from the
+        cart version; a matching If-None-Match is answered with 304 from the
+        cache without touching the cart tables.
         """
-        cart, created = Cart.objects.get_or_create(customer=request.user)
-        serializer = CartSerializer(cart)
-        return Response(serializer.data)
+        delivery_type = request.query_params.get('delivery_type')
+        version = get_cart_version(request.user.pk)
+        etag = cart_etag(request.user.pk, version, delivery_type)
+
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(priced_cart_snapshot(request.user, delivery_type, version))
+
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        patch_vary_headers(response, ('Authorization', 'Cookie'))
+        return response
 
     def retrieve(self, request, pk=None):
         """
         Get a specific cart item
         """
-        cart_item = get_object_or_404(CartItem, cart__customer=request.user, pk=pk)
+        cart_item = get_object_or_404(
+            CartItem.objects.select_related('menuitem'), cart__customer=request.user, pk=pk
+        )
         serializer = CartItemSerializer(cart_item)
         return Response(serializer.data)
 
@@ -179,13 +235,12 @@ class CartViewSet(viewsets.ViewSet):
                     )
                 
                 cart_item.quantity = quantity
-                cart_item.save()
+                cart_item.save(update_fields=['quantity'])
+                bump_cart_version(request.user.pk)
+                CART_MUTATIONS.inc('update')
                 
                 # Return the updated cart
-                cart = cart_item.cart
-                print("Cart item saved:", cart)
-                cart_serializer = CartSerializer(cart)
-                return Response(cart_serializer.data)
+                return Response(priced_cart_snapshot(request.user))
             
             return Response(
                 {"detail": "Quantity is required"},
@@ -209,6 +264,8 @@ class CartViewSet(viewsets.ViewSet):
         """
         cart_item = get_object_or_404(CartItem, cart__customer=request.user, pk=pk)
         cart_item.delete()
+        bump_cart_version(request.user.pk)
+        CART_MUTATIONS.inc('remove')
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     def add_to_cart(self, request):
@@ -216,8 +273,6 @@ class CartViewSet(viewsets.ViewSet):
         Add an item to cart
         """
         try:
-            print("Received data:", request.data)
-            
             cart, created = Cart.objects.get_or_create(customer=request.user)
 
             item_id = request.data.get("menuitem")
@@ -267,13 +322,14 @@ class CartViewSet(viewsets.ViewSet):
                 cart_item.image = menuitem.image
 
             cart_item.save()
+            bump_cart_version(request.user.pk)
+            CART_MUTATIONS.inc('add')
             
             # Return the updated cart
-            cart_serializer = CartSerializer(cart)
-            return Response(cart_serializer.data, status=status.HTTP_201_CREATED)
+            return Response(priced_cart_snapshot(request.user), status=status.HTTP_201_CREATED)
             
         except Exception as e:
-            print("Error in add_to_cart:", str(e))
+            logger.exception("Error adding menu item to cart")
             return Response(
                 {
                     "detail": "Error adding to cart",
@@ -284,18 +340,47 @@ class CartViewSet(viewsets.ViewSet):
             )
 
 
+class StatusConflict(exceptions.APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'The order status changed, reload it and try again.'
+    default_code = 'status_conflict'
+
+
+class BookingConflict(exceptions.APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Table is already booked at this time.'
+    default_code = 'booking_conflict'
+
+
+def change_order_status(order, target, user):
+    """Apply a lifecycle transition, surfacing failures as API errors"""
+    try:
+        return transition(order, target, actor=user)
+    except TransitionConflict as exc:
+        raise StatusConflict({'status': [str(exc)], 'current': exc.current})
+    except TransitionNotAllowed as exc:
+        raise exceptions.PermissionDenied(str(exc))
+    except InvalidTransition as exc:
+        raise exceptions.ValidationError({'status': [str(exc)]})
+
+
 class OrderViewSet(viewsets.ModelViewSet):
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
-    queryset = Order.objects.all()
+    queryset = Order.objects.with_details()
+    pagination_class = CreatedCursorPagination
+
+    def get_queryset(self):
+        # Customers see their own orders and crew the ones they deliver
+        user = self.request.user
+        queryset = super().get_queryset()
+        if is_staff_member(user):
+            return queryset
+        return queryset.filter(Q(customer=user) | Q(delivery_crew=user))
 
-    @transaction.atomic
+    @idempotent('order-create')
     def create(self, request, *args, **kwargs):
         try:
-            print(f"Incoming order data: {request.data}")
-
-            print(f"request.user.id: {request.user.id}")
-            
             # Validate delivery type
             delivery_data = request.data.get('delivery', {})
             delivery_type = delivery_data.get('type')
@@ -306,13 +391,6 @@ class OrderViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Generate unique reference with lock
-            with transaction.atomic():
-                reference = generate_unique_order_reference()
-                # Double-check if reference exists
-                while Order.objects.filter(reference=reference).exists():
-                    reference = generate_unique_order_reference()
-
             # Validate delivery data based on type
             if delivery_type == 'delivery':
                 required_fields = ['address', 'contactNumber']
@@ -331,16 +409,13 @@ class OrderViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Prepare order data
+            # Prepare order data; the customer is always the requesting
+            # user and is passed to save() rather than looked up again.
+            # Prices and totals are computed by the serializer, never taken
+            # from the request
             order_data = {
-                'customer': request.user.id,  # Changed from userId to customer
-                'reference': reference,
                 'items': request.data.get('items', []),
                 'status': 'pending',
-                'subtotal': request.data.get('subtotal'),
-                'tax': request.data.get('tax'),
-                'deliveryFee': request.data.get('deliveryFee', 0),
-                'total': request.data.get('total'),
                 'paymentMethod': request.data.get('paymentMethod'),
                 'delivery': delivery_data
             }
@@ -349,41 +424,42 @@ class OrderViewSet(viewsets.ModelViewSet):
             serializer = self.get_serializer(data=order_data)
             
             if not serializer.is_valid():
-                logger.error(f"Serializer validation errors: {serializer.errors}")
+                logger.warning("Order rejected: %s", serializer.errors)
                 return Response(
                     {"error": "Invalid order data", "details": serializer.errors},
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
             try:
+                # Order, items and cart clear commit together
                 with transaction.atomic():
-                    order = serializer.save()
-                    print(f"Serialized order data: {OrderSerializer(order).data}")
-                    print(f"Order created successfully: {order.reference}")
-                    print(order)
-                    
-                    # Clear the user's cart
+                    order = serializer.save(customer=request.user)
+                    record_creation(order, request.user)
                     CartItem.objects.filter(cart__customer=request.user).delete()
-
-                    # Serialize the created order
-                    
-
-                    return Response(
-                        {
-                            "message": "Order created successfully",
-                            "order": OrderSerializer(order).data
-                        },
-                        status=status.HTTP_201_CREATED
+                    publish_order_status(order)
+                    transaction.on_commit(
+                        lambda: bump_cart_version(request.user.pk)
                     )
             except Exception as e:
-                logger.error(f"Error saving order: {str(e)}")
+                # The basket was valid, so this is worth retrying
+                logger.exception("Error saving order")
                 return Response(
                     {"error": f"Error saving order: {str(e)}"},
-                    status=status.HTTP_400_BAD_REQUEST
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE
                 )
 
+            ORDERS_CREATED.inc(order.delivery_type)
+            logger.info("Order created", extra={"fields": {"order": order.pk, "reference": order.reference}})
+            return Response(
+                {
+                    "message": "Order created successfully",
+                    "order": serializer.data
+                },
+                status=status.HTTP_201_CREATED
+            )
+
         except Exception as e:
-            logger.error(f"Error in create: {str(e)}")
+            logger.exception("Error creating order")
             return Response(
                 {
                     "error": "Failed to create order",
@@ -392,12 +468,69 @@ class OrderViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @action(
+        detail=False,
+        methods=['GET'],
+        permission_classes=[IsAuthenticated, IsKitchenStaff],
+        pagination_class=None,
+    )
+    def kitchen(self, request):
+        """
+        Kitchen display queue; pass the returned ``cursor`` back as
+        ``?since=`` to receive only orders changed after it.
+        """
+        try:
+            orders, cursor = kitchen_queue(request.query_params.get('since') or None)
+        except InvalidCursor:
+            return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'orders': orders, 'cursor': cursor})
+
+    def perform_update(self, serializer):
+        # The serializer writes everything but status, which is a transition
+        target = serializer.validated_data.get('status')
+        with transaction.atomic():
+            order = serializer.save()
+            if target is not None and target != order.status:
+                change_order_status(order, target, self.request.user)
+
+    @action(
+        detail=False,
+        methods=['GET'],
+        authentication_classes=[EventTicketAuthentication],
+        renderer_classes=[EventStreamRenderer, JSONRenderer],
+        pagination_class=None,
+    )
+    def events(self, request):
+        """
+        Server-Sent Events stream of order status changes visible to the user.
+
+        ``EventSource`` clients pass a ticket from ``events/ticket/`` as
+        ``?ticket=``. Streams hold their connection open, so they are only
+        served under ASGI; a WSGI worker answers 503 rather than being tied
+        up until the client goes away.
+        """
+        if not isinstance(request._request, ASGIRequest):
+            return Response(
+                {'error': 'Order events are not available on this server'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+        return event_stream_response(topics_for_user(request.user))
+
+    @action(detail=False, methods=['POST'], url_path='events/ticket')
+    def events_ticket(self, request):
+        """A ticket for opening the event stream, valid for a minute"""
+        return Response({
+            'ticket': issue_event_ticket(request.user),
+            'expires_in': EVENT_TICKET_MAX_AGE,
+        })
+
+
 class ManagerViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated, IsAdminUser]
     serializer_class = UserSerializer
 
     def get_queryset(self):
-        return User.objects.filter(groups__name="Managers")
+        return User.objects.filter(groups__name="Managers").prefetch_related("groups")
 
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
@@ -446,7 +579,7 @@ class DeliveryCrewViewSet(viewsets.ViewSet):
     serializer_class = UserSerializer
 
     def get_queryset(self):
-        return User.objects.filter(groups__name="Crew")
+        return User.objects.filter(groups__name="Crew").prefetch_related("groups")
 
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
@@ -504,6 +637,7 @@ class TableViewSet(viewsets.ModelViewSet):
 class TableBookingViewSet(viewsets.ModelViewSet):
     serializer_class = TableBookingSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CreatedCursorPagination
 
     def get_queryset(self):
         user = self.request.user
@@ -512,113 +646,145 @@ class TableBookingViewSet(viewsets.ModelViewSet):
         return TableBooking.objects.filter(customer=user)
 
     def perform_create(self, serializer):
-        serializer.save(customer=self.request.user)
+        self._save_booking(serializer, customer=self.request.user)
+
+    def perform_update(self, serializer):
+        self._save_booking(serializer)
+
+    def _save_booking(self, serializer, **kwargs):
+        data = serializer.validated_data
+        table = data.get('table', serializer.instance.table if serializer.instance else None)
+        try:
+            with transaction.atomic():
+                # Validation checked the slot without a lock. Holding the
+                # table row makes overlapping bookings of one table check
+                # and save one at a time
+                Table.objects.select_for_update().get(pk=table.pk)
+                if serializer.slot_taken(data):
+                    raise BookingConflict()
+                serializer.save(**kwargs)
+        except (BookingConflict, IntegrityError):
+            # A concurrent request took the slot after validation; the
+            # unique_booking constraint is the last line of defence
+            BOOKING_CONFLICTS.inc()
+            raise BookingConflict()
+
+    def _day_availability(self, request, require_time=False):
+        query = AvailabilityQuerySerializer(
+            data=request.query_params, context={'require_time': require_time}
+        )
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        return DayAvailability(params['date']), params
 
     @action(detail=False, methods=['GET'])
     def available_tables(self, request):
-        date = request.query_params.get('date')
-        time = request.query_params.get('time')
-        guests = request.query_params.get('guests', 1)
-
-        if not all([date, time]):
+        """Tables free for a party arriving at ``time`` on ``date``"""
+        if not all([request.query_params.get('date'), request.query_params.get('time')]):
             return Response(
                 {"error": "Date and time are required"},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Find available tables logic here
-        booked_tables = TableBooking.objects.filter(
-            booking_date=date,
-            booking_time=time,
-            status__in=['pending', 'confirmed']
-        ).values_list('table_id', flat=True)
-
-        available_tables = Table.objects.filter(
-            capacity__gte=guests,
-            is_active=True
-        ).exclude(id__in=booked_tables)
-
-        serializer = TableSerializer(available_tables, many=True)
+        availability, params = self._day_availability(request, require_time=True)
+        tables = availability.free_tables(params['time'], params['guests'])
+        serializer = TableSerializer(tables, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['GET'])
+    def availability(self, request):
+        """Free tables for every seating slot of ``date``"""
+        availability, params = self._day_availability(request)
+        slot_options = {}
+        if 'interval' in params:
+            slot_options['interval'] = params['interval']
+        grid = availability.grid(params['guests'], **slot_options)
+        return Response({
+            'date': params['date'],
+            'seating_minutes': availability.seating_minutes,
+            'slots': [
+                {'time': slot.strftime('%H:%M'), 'tables': tables}
+                for slot, tables in grid
+            ],
+        })
+
 
 class CookieTokenObtainPairView(TokenObtainPairView):
+    """Log in with email and password; tokens are set as HTTP-only cookies"""
+
     def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
         try:
-            response = super().post(request, *args, **kwargs)
-            
-            if response.status_code == 200:
-                # Set tokens in HTTP-only cookies
-                response.set_cookie(
-                    'access_token',
-                    response.data['access'],
-                    httponly=True,
-                    secure=True,
-                    samesite='Lax',
-                    max_age=60 * 15  # 15 minutes
-                )
-                response.set_cookie(
-                    'refresh_token',
-                    response.data['refresh'],
-                    httponly=True,
-                    secure=True,
-                    samesite='Lax',
-                    max_age=60 * 60 * 24  # 1 day
-                )
-                
-                # Remove tokens from response body
-                response.data = {"detail": "Login successful"}
-            
-            return response
-            
-        except Exception as e:
+            serializer.is_valid(raise_exception=True)
+        except (exceptions.AuthenticationFailed, exceptions.ValidationError, TokenError):
             return Response(
                 {"detail": "Login failed"},
                 status=status.HTTP_401_UNAUTHORIZED
             )
 
+        response = Response({"detail": "Login successful"})
+        return set_auth_cookies(
+            response,
+            serializer.validated_data['access'],
+            serializer.validated_data['refresh'],
+        )
+
 
 class CookieTokenRefreshView(TokenRefreshView):
+    """Exchange the refresh cookie for a new access (and refresh) cookie"""
+
     def post(self, request, *args, **kwargs):
-        refresh_token = request.COOKIES.get('refresh_token')
-        
-        if refresh_token:
-            request.data['refresh'] = refresh_token
-        
-        try:
-            response = super().post(request, *args, **kwargs)
-            
-            if response.status_code == 200:
-                response.set_cookie(
-                    'access_token',
-                    response.data['access'],
-                    httponly=True,
-                    secure=True,
-                    samesite='Lax',
-                    max_age=60 * 15
-                )
-                
-                # Remove token from response body
-                response.data = {"detail": "Token refresh successful"}
-            
-            return response
-            
-        except (InvalidToken, TokenError) as e:
+        refresh_token = request.COOKIES.get(REFRESH_COOKIE) or request.data.get('refresh')
+        if not refresh_token:
             return Response(
-                {"detail": "Invalid refresh token"},
+                {"detail": "Refresh token missing"},
                 status=status.HTTP_401_UNAUTHORIZED
             )
 
+        serializer = self.get_serializer(data={'refresh': refresh_token})
+        try:
+            serializer.is_valid(raise_exception=True)
+        except (InvalidToken, TokenError):
+            return delete_auth_cookies(Response(
+                {"detail": "Invalid refresh token"},
+                status=status.HTTP_401_UNAUTHORIZED
+            ))
+
+        response = Response({"detail": "Token refresh successful"})
+        return set_auth_cookies(
+            response,
+            serializer.validated_data['access'],
+            serializer.validated_data.get('refresh'),
+        )
+
 
 @api_view(['POST'])
-# @permission_classes([IsAuthenticated])
+@authentication_classes([])
+@permission_classes([AllowAny])
 @ensure_csrf_cookie
 def logout_view(request):
-        # Delete the user's tokens here if you're storing them
-        response = Response({"detail": "Successfully logged out"})
-        response.delete_cookie('access_token')
-        response.delete_cookie('refresh_token')
-        return response
+    """
+    Revoke the caller's access and refresh tokens and clear the cookies.
+
+    Tokens are read from the auth cookies, the Authorization header and a
+    ``refresh`` field in the body, whichever were sent.
+    """
+    authenticator = StatelessJWTAuthentication()
+    header = authenticator.get_header(request)
+    raw_tokens = [
+        (AccessToken, request.COOKIES.get(ACCESS_COOKIE)),
+        (AccessToken, authenticator.get_raw_token(header) if header else None),
+        (RefreshToken, request.COOKIES.get(REFRESH_COOKIE) or request.data.get('refresh')),
+    ]
+    for token_class, raw_token in raw_tokens:
+        if not raw_token:
+            continue
+        try:
+            revoke(token_class(raw_token))
+        except TokenError:
+            # Expired or malformed tokens need no revoking
+            pass
+    return delete_auth_cookies(Response({"detail": "Successfully logged out"}))
 
 
 
@@ -629,27 +795,44 @@ class CustomUserViewSet(UserViewSet):
         user.groups.add(customer_group)
 
 
-class DeliveryOrderViewSet(viewsets.ModelViewSet):
+class DeliveryOrderViewSet(viewsets.ReadOnlyModelViewSet):
+    # Crew change status through update_status only
     permission_classes = [IsAuthenticated, IsDeliveryCrew]
     serializer_class = OrderSerializer
+    pagination_class = CreatedCursorPagination
 
     def get_queryset(self):
-        return Order.objects.filter(
+        return Order.objects.with_details().filter(
             delivery_crew=self.request.user,
             delivery_type='delivery'
         ).order_by('-created')
 
+    @action(
+        detail=False,
+        methods=['POST'],
+        url_path='dispatch',
+        permission_classes=[IsAuthenticated, IsKitchenStaff],
+    )
+    def dispatch_ready(self, request):
+        """Assign ready delivery orders to the least loaded crew"""
+        assigned = dispatch_ready_orders()
+        return Response({
+            'assigned': [
+                {'order': order.id, 'delivery_crew': order.delivery_crew_id}
+                for order in assigned
+            ]
+        })
+
     @action(detail=True, methods=['PATCH'])
     def update_status(self, request, pk=None):
         order = self.get_object()
         new_status = request.data.get('status')
-        if new_status not in ['pending', 'in_transit', 'delivered']:
+        if new_status not in ['in_transit', 'delivered']:
             return Response(
                 {'error': 'Invalid status'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        order.status = new_status
-        order.save()
+        change_order_status(order, new_status, request.user)
         return Response(self.get_serializer(order).data)
 
 
@@ -657,6 +840,7 @@ class UserManagementViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated, IsManager]
     serializer_class = UserSerializer
     queryset = User.objects.all()
+    pagination_class = StandardPageNumberPagination
 
     @action(detail=True, methods=['POST'])
     def update_role(self, request, pk=None):
@@ -689,6 +873,7 @@ class UserManagementViewSet(viewsets.ModelViewSet):
             
             group = Group.objects.get_or_create(name=group_name)[0]
             user.groups.add(group)
+            forget_user_roles(user)
             
             return Response({
                 'status': 'success',
@@ -703,84 +888,106 @@ class UserManagementViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Override to exclude superusers from the list"""
-        return User.objects.filter(is_superuser=False)
+        return User.objects.filter(is_superuser=False).prefetch_related('groups').order_by('id')
 
 
 @api_view(['POST'])
+@idempotent('verify-payment')
 def verify_payment(request, order_id):
-    try:
-        # Get the order first
-        order = Order.objects.get(id=order_id)
-        
-        # Get the Paystack reference from the request body
-        paystack_ref = request.data.get('paystackRef')
-        if not paystack_ref:
-            return Response({
-                'status': 'failed', 
-                'error': 'Paystack reference is required'
-            }, status=400)
-
-        order.paystack_reference = paystack_ref
-        order.save()
-
-        url = f'https://api.paystack.co/transaction/verify/{paystack_ref}'
-        headers = {
-            'Authorization': f'Bearer {settings.PAYSTACK_SECRET_KEY}',
-            'Content-Type': 'application/json',
-        }
-        
-        logger.info(f"Verifying payment for order {order_id} with reference {paystack_ref}")
-        response = requests.get(url, headers=headers)
-        logger.debug(f"Paystack response: {response.content}")
-        
-        if response.status_code != 200:
-            return Response({
-                'status': 'failed', 
-                'error': 'Failed to verify payment with Paystack'
-            }, status=response.status_code)
-        
-        data = response.json()
-        
-        if data.get('status') and data['data'].get('status') == 'success':
-            amount_paid = Decimal(str(data['data'].get('amount', 0))) / Decimal('100')
-            order_total = Decimal(str(order.total))
-
-            if abs(amount_paid - order_total) > Decimal('0.01'):
-                logger.error(f"Amount mismatch: paid={amount_paid}, order={order_total}")
-                return Response({
-                    'status': 'failed',
-                    'error': 'Payment amount does not match order amount'
-                }, status=400)
-
-            order.status = 'confirmed'
-            order.paid = True
-            order.save()
-            
-            logger.info(f"Payment verified successfully for order {order_id}")
-            return Response({'status': 'success'})
-            
+    """
+    Queue verification of a Paystack payment for an order.
+
+    Verification happens in the payment worker; the client polls the order
+    until ``paid`` flips.
+    """
+    paystack_ref = request.data.get('paystackRef')
+    if not paystack_ref:
         return Response({
-            'status': 'failed', 
-            'error': 'Payment verification failed'
-        })
-        
-    except Order.DoesNotExist:
+            'status': 'failed',
+            'error': 'Paystack reference is required'
+        }, status=400)
+
+    orders = Order.objects.filter(id=order_id)
+    if not request.user.is_staff:
+        orders = orders.filter(customer=request.user)
+    paid = orders.values_list('paid', flat=True).first()
+    if paid is None:
         return Response({
-            'status': 'failed', 
+            'status': 'failed',
             'error': 'Order not found'
         }, status=404)
-    except Exception as e:
-        logger.error(f"Error in verify_payment: {str(e)}")
+    if paid:
+        return Response({'status': 'success'})
+
+    try:
+        attach_reference(order_id, paystack_ref)
+    except ReferenceInUse:
         return Response({
-            'status': 'failed', 
-            'error': str(e)
-        }, status=500)
+            'status': 'failed',
+            'error': 'This payment reference belongs to another order'
+        }, status=status.HTTP_409_CONFLICT)
+    enqueue_verification(paystack_ref)
+    logger.info(
+        "Queued payment verification",
+        extra={"fields": {"order": order_id, "reference": paystack_ref}},
+    )
+    return Response({'status': 'pending', 'order': order_id}, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(['POST'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def paystack_webhook(request):
+    """Accept Paystack events and queue ``charge.success`` for verification"""
+    body = request.body
+    if not valid_webhook_signature(body, request.headers.get('X-Paystack-Signature')):
+        return Response({'error': 'Invalid signature'}, status=status.HTTP_401_UNAUTHORIZED)
+    try:
+        event = json.loads(body)
+    except ValueError:
+        event = None
+    if not isinstance(event, dict) or not isinstance(event.get('data') or {}, dict):
+        return Response({'error': 'Invalid payload'}, status=status.HTTP_400_BAD_REQUEST)
+
+    data = event.get('data') or {}
+    reference = data.get('reference')
+    if event.get('event') == 'charge.success' and reference:
+        order_id = order_id_from_metadata(data.get('metadata'))
+        if order_id is not None:
+            try:
+                attach_reference(order_id, reference)
+            except ReferenceInUse:
+                # The order holding it gets verified; this one stays unpaid
+                logger.warning(
+                    "Webhook reference already attached to another order",
+                    extra={"fields": {"order": order_id, "reference": reference}},
+                )
+        enqueue_verification(reference)
+    return Response(status=status.HTTP_200_OK)
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAdminUser])
+def query_metrics(request):
+    """
+    Query counts, SQL time and duplicated statements per view for this
+    worker process; ``DELETE`` starts the counts over.
+    """
+    if request.method == 'DELETE':
+        query_profile.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response({'views': query_profile.snapshot()})
+
+
+@api_view(['GET'])
+@permission_classes([CanScrapeMetrics])
+def metrics_view(request):
+    """Request, cart, order, payment and booking metrics in the Prometheus text format"""
+    return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
 
 
 @api_view(['POST'])
 def create_order(request):
-    print("Incoming order data:", request.data)  # Debug print
-    
     serializer = OrderSerializer(data=request.data)
     if serializer.is_valid():
         try:
@@ -795,7 +1002,6 @@ def create_order(request):
                 'message': str(e)
             }, status=status.HTTP_400_BAD_REQUEST)
     
-    print("Validation errors:", serializer.errors)  # Debug print
     return Response({
         'status': 'error',
         'errors': serializer.errors
@@ -5,6 +5,11 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
+
+The order event stream (``/api/v1/orders/events/``) holds connections open
+and needs ASGI, e.g.:
+
+    gunicorn restaurant.asgi:application -k uvicorn.workers.UvicornWorker
 """
 
 import os
@@ -15,6 +15,7 @@ import os
 import dj_database_url
 from dotenv import load_dotenv
 from decouple import config
+from corsheaders.defaults import default_headers
 
 load_dotenv()
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -53,6 +54,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so request latency covers the whole stack
+    "api.metrics.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     'whitenoise.middleware.WhiteNoiseMiddleware',
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -62,6 +65,9 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "api.profiling.QueryProfilerMiddleware",
+    # Last, so traces time the view only
+    "api.instrumentation.RequestTraceMiddleware",
 ]
 
 ROOT_URLCONF = "restaurant.urls"
@@ -106,6 +112,42 @@ DATABASES = {
 }
 
 
+# Caches. "default" is per process and holds what each worker may keep to
+# itself: renderings such as menu pages and cart snapshots, keyed by a
+# version that lives in "shared". "shared" is for state every worker has to see, like those
+# versions, revoked tokens and idempotency keys; it falls back to a
+# per-process cache when REDIS_URL is unset, which is only right for a
+# single worker.
+REDIS_URL = config("REDIS_URL", default="")
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "shared": (
+        {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+        if REDIS_URL
+        else {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "shared",
+        }
+    ),
+}
+
+TOKEN_DENYLIST_CACHE = "shared"
+IDEMPOTENCY_CACHE = "shared"
+
+# Order status streams. The in-process broker only reaches clients of the
+# process that made the change, so the payment worker's confirmations need
+# Redis to reach anyone
+ORDER_EVENTS_BROKER = (
+    "api.events.RedisBroker" if REDIS_URL else "api.events.InProcessBroker"
+)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -159,7 +201,8 @@ REST_FRAMEWORK = {
     ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication',
+        'api.authentication.CookieJWTAuthentication',
     ),
 
 }
@@ -169,8 +212,10 @@ from datetime import timedelta
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
-    'ROTATE_REFRESH_TOKENS': False,
-    'BLACKLIST_AFTER_ROTATION': True,
+    # Rotated and logged-out tokens go on the cache-backed denylist in
+    # api/denylist.py rather than simplejwt's token_blacklist tables
+    'ROTATE_REFRESH_TOKENS': True,
+    'BLACKLIST_AFTER_ROTATION': False,
     'UPDATE_LAST_LOGIN': False,
 
     'ALGORITHM': 'HS256',
@@ -189,6 +234,10 @@ SIMPLE_JWT = {
     'TOKEN_TYPE_CLAIM': 'token_type',
 
     'JTI_CLAIM': 'jti',
+
+    # Tokens carry the user's roles, see api/authentication.py
+    'TOKEN_OBTAIN_SERIALIZER': 'api.serializers.ClaimsTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'api.serializers.ClaimsTokenRefreshSerializer',
 }
 AUTH_USER_MODEL = 'api.User'
 
@@ -257,34 +306,75 @@ CORS_ALLOW_METHODS = [
     'DELETE',
     'OPTIONS'
 ]
-CORS_EXPOSE_HEADERS = ["Content-Type", "X-CSRFToken"]
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key")
+CORS_EXPOSE_HEADERS = ["Content-Type", "X-CSRFToken", "ETag", "Idempotent-Replayed"]
 
 # # Email settings for development (console backend)
 # EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 # DOMAIN = 'localhost:5173'
 # SITE_NAME = 'Restaurant App'
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+
+# Mail is written to the outbox table and delivered by `send_queued_mail`
+EMAIL_BACKEND = 'api.mail.OutboxEmailBackend'
+OUTBOX_DELIVERY_BACKEND = config(
+    'OUTBOX_DELIVERY_BACKEND', default='django.core.mail.backends.smtp.EmailBackend'
+)
 EMAIL_HOST = config('EMAIL_HOST')
 EMAIL_PORT = config('EMAIL_PORT', cast=int)
 EMAIL_USE_TLS = config('EMAIL_USE_TLS', cast=bool)
 EMAIL_HOST_USER = config('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD')
 
+# Share of requests traced with view/serializer/DB timings (0 to 1);
+# untraced requests are still logged when slower than REQUEST_TRACE_SLOW_MS
+REQUEST_TRACE_SAMPLE_RATE = config("REQUEST_TRACE_SAMPLE_RATE", default=0.01, cast=float)
+REQUEST_TRACE_SLOW_MS = config("REQUEST_TRACE_SLOW_MS", default=1000, cast=int)
+
+# Lets a scraper read /api/v1/metrics/ by sending it as X-Metrics-Token
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
+
+# Per-view query counts, served at /api/v1/metrics/queries/ to admins
+QUERY_PROFILER_ENABLED = config("QUERY_PROFILER_ENABLED", default=DEBUG, cast=bool)
+# Most queries a request to a view may issue, by URL name, optionally
+# prefixed with the method. Exceeding one is logged, and fails
+# QueryCountMixin.assertWithinQueryBudget in tests
+QUERY_BUDGETS = {
+    "category-list": 3,
+    "menuitem-list": 4,
+    "menuitem-detail": 3,
+    "cart-list": 3,
+    "POST cart-list": 10,
+    "cart-detail": 6,
+    "order-list": 4,
+    "POST order-list": 16,
+    "order-detail": 6,
+    "order-kitchen": 4,
+    "table-booking-list": 3,
+    "table-booking-available-tables": 4,
+    "table-booking-availability": 4,
+    "delivery-orders-list": 4,
+}
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'formatters': {
+        'json': {
+            '()': 'api.instrumentation.JsonFormatter',
+        },
+    },
     'handlers': {
-        'file': {
-            'level': 'DEBUG',
-            'class': 'logging.FileHandler',
-            'filename': 'debug.log',
+        # Formats on the request thread, writes from a background thread
+        'queue': {
+            'class': 'api.instrumentation.QueueLogHandler',
+            'formatter': 'json',
         },
     },
     'loggers': {
-        'trashapi': {
-            'handlers': ['file'],
-            'level': 'DEBUG',
-            'propagate': True,
+        'api': {
+            'handlers': ['queue'],
+            'level': config('API_LOG_LEVEL', default='INFO'),
+            'propagate': False,
         },
     },
 }
@@ -2,12 +2,12 @@
 import { useQuery } from '@tanstack/react-query';
 import { Heart, ShoppingCart } from 'lucide-react';
 import { toast } from 'react-hot-toast';
-import axiosInstance from '../../utils/axios';
 import { MenuItem } from '../../types/menu';
 // import { useCartStore } from '../../store/cartStore';
 import cartService from '../../services/cartService';
 import { CartItem } from '../../types/cart';
 import { useCartStore } from '../../store/cartStore';
+import { fetchAllResults } from '../../utils/pagination';
 
 interface MenuGridProps {
   selectedCategory: string | null;
@@ -22,8 +22,7 @@ export default function MenuGrid({ selectedCategory, searchQuery, sortBy }: Menu
   const { data: menuItems = [] } = useQuery({
     queryKey: ['menuItems'],
     queryFn: async () => {
-      const response = await axiosInstance.get('api/v1/menu-items/');
-      return response.data.map((item: MenuItem) => ({
+      return (await fetchAllResults<MenuItem>('api/v1/menu-items/')).map((item: MenuItem) => ({
         ...item,
         price: parseFloat(item.price.toString()),
       }));
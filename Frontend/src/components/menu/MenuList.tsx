@@ -2,9 +2,9 @@ import React from 'react';
 import { useQuery } from '@tanstack/react-query';
 import { Heart, ShoppingCart } from 'lucide-react';
 import { toast } from 'react-hot-toast';
-import axiosInstance from '../../utils/axios';
 import { MenuItem } from '../../types/menu';
 import cartService from '../../services/cartService';
+import { fetchAllResults } from '../../utils/pagination';
 
 interface MenuListProps {
   selectedCategory: string | null;
@@ -16,8 +16,7 @@ export default function MenuList({ selectedCategory, searchQuery, sortBy }: Menu
   const { data: menuItems = [] } = useQuery({
     queryKey: ['menuItems'],
     queryFn: async () => {
-      const response = await axiosInstance.get('api/v1/menu-items/');
-      return response.data;
+      return await fetchAllResults<MenuItem>('api/v1/menu-items/');
     },
   });
 
@@ -3,6 +3,7 @@ import { DeliveryStatus } from '../types/delivery';
 import deliveryService from '../services/deliveryService';
 import { useAuthStore } from '../store/authStore';
 import { toast } from 'react-hot-toast';
+import { useOrderEvents } from './useOrderEvents';
 
 export function useDelivery() {
   const queryClient = useQueryClient();
@@ -13,6 +14,7 @@ export function useDelivery() {
     queryFn: () => deliveryService.getActiveDeliveries(user?.role === 'delivery' ? user.id : undefined),
     enabled: !!user?.id,
   });
+  useOrderEvents(!!user?.id);
 
   const { data: deliveryZones } = useQuery({
     queryKey: ['delivery-zones'],
@@ -3,6 +3,7 @@ import { CreateOrder, OrderStatus } from '../types/order';
 import orderService from '../services/orderService';
 import { useAuthStore } from '../store/authStore';
 import { toast } from 'react-hot-toast';
+import { useOrderEvents } from './useOrderEvents';
 
 export function useOrder() {
   const queryClient = useQueryClient();
@@ -13,6 +14,7 @@ export function useOrder() {
     queryFn: () => orderService.getOrders(),
     enabled: !!user?.id,
   });
+  useOrderEvents(!!user?.id);
 
   // const createOrder = useMutation({
   //   mutationFn: (orderData: Omit<Order, 'id' | 'createdAt' | 'updatedAt'>) =>
@@ -0,0 +1,50 @@
+import { useEffect } from 'react';
+import { useQueryClient } from '@tanstack/react-query';
+import axiosInstance, { API_URL } from '../utils/axios';
+
+// The stream needs the API to run under ASGI; enable it with VITE_ORDER_EVENTS=true
+const ORDER_EVENTS_ENABLED = import.meta.env.VITE_ORDER_EVENTS === 'true';
+const RECONNECT_DELAY_MS = 5000;
+
+// Refresh order and delivery queries when the server pushes a status change
+export function useOrderEvents(enabled: boolean) {
+  const queryClient = useQueryClient();
+
+  useEffect(() => {
+    if (!ORDER_EVENTS_ENABLED || !enabled) return;
+
+    let source: EventSource | null = null;
+    let retry: ReturnType<typeof setTimeout> | undefined;
+    let closed = false;
+
+    const connect = async () => {
+      try {
+        // Tickets are short-lived and only open this stream, so the access
+        // token never ends up in a URL
+        const { data } = await axiosInstance.post('api/v1/orders/events/ticket/');
+        if (closed) return;
+        source = new EventSource(
+          `${API_URL}api/v1/orders/events/?ticket=${encodeURIComponent(data.ticket)}`
+        );
+        source.addEventListener('order.status', () => {
+          queryClient.invalidateQueries({ queryKey: ['orders'] });
+          queryClient.invalidateQueries({ queryKey: ['deliveries'] });
+        });
+        // Reconnecting would reuse an expired ticket; fetch a new one instead
+        source.onerror = () => {
+          source?.close();
+          if (!closed) retry = setTimeout(connect, RECONNECT_DELAY_MS);
+        };
+      } catch {
+        if (!closed) retry = setTimeout(connect, RECONNECT_DELAY_MS);
+      }
+    };
+
+    connect();
+    return () => {
+      closed = true;
+      clearTimeout(retry);
+      source?.close();
+    };
+  }, [enabled, queryClient]);
+}
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { toast } from 'react-hot-toast';
 import { MapPin, Clock, CreditCard, Truck, Store, } from 'lucide-react';
@@ -11,7 +11,7 @@ import CartService from '../services/cartService';
 import PaystackPop from '@paystack/inline-js';
 import { PaystackConfig, PaystackResponse } from '../types/payment';
 // import { PaystackResponse } from '../types/payment';
-// import { v4 as uuidv4 } from 'uuid';
+import { v4 as uuidv4 } from 'uuid';
 
 // const generateUniqueReference = (prefix: string = '') => {
 //   const timestamp = Date.now();
@@ -34,6 +34,9 @@ export default function Checkout() {
   const [contactNumber, setContactNumber] = useState('');
   const [instructions, setInstructions] = useState('');
   const [preferredTime, setPreferredTime] = useState('');
+  // One Idempotency-Key per checkout attempt: resubmitting the same order
+  // (a timeout, a double click) reuses it, changing the order starts a new one
+  const checkoutAttempt = useRef<{ key: string; payload: string } | null>(null);
 
   useEffect(() => {
     const loadCart = async () => {
@@ -120,6 +123,14 @@ export default function Checkout() {
     return orderData;
   };
 
+  const idempotencyKeyFor = (orderData: CreateOrder) => {
+    const payload = JSON.stringify(orderData);
+    if (checkoutAttempt.current?.payload !== payload) {
+      checkoutAttempt.current = { key: uuidv4(), payload };
+    }
+    return checkoutAttempt.current.key;
+  };
+
   const handleSubmit = async (e: React.FormEvent) => {
     e.preventDefault();
 
@@ -143,7 +154,7 @@ export default function Checkout() {
       const orderData = createOrderData();
       if (!orderData) return;
 
-      const response = await createOrder(orderData);
+      const response = await createOrder(orderData, idempotencyKeyFor(orderData));
       console.log('API Response:', response);
       const createdOrder = response.order;
 
@@ -158,7 +169,8 @@ export default function Checkout() {
         const paystackConfig: PaystackConfig = {
           key: import.meta.env.VITE_PAYSTACK_PUBLIC_KEY!,
           email: user.email,
-          amount: Math.round(parseFloat(orderData.total.toString()) * 100),
+          // Charge the total the server priced the order at
+          amount: Math.round(parseFloat(createdOrder.total.toString()) * 100),
           currency: 'KES',
           ref: `PST-${Date.now()}`,
           metadata: {
@@ -183,10 +195,12 @@ export default function Checkout() {
                   method: 'POST',
                   headers: {
                     'Content-Type': 'application/json',
+                    // Retries of the same payment are answered from the first attempt
+                    'Idempotency-Key': `verify-${response.reference}`,
                   },
                   body: JSON.stringify({
                     paystackRef: response.reference,
-                    amount: Math.round(parseFloat(orderData.total.toString()) * 100),
+                    amount: Math.round(parseFloat(createdOrder.total.toString()) * 100),
                     email: user.email
                   })
                 }
@@ -203,6 +217,11 @@ export default function Checkout() {
                 clearCart();
                 toast.success('Order placed and payment successful!');
                 navigate('/orders');
+              } else if (verifyData.status === 'pending') {
+                // Verified in the background; the orders page shows it once paid
+                clearCart();
+                toast.success('Order placed! Confirming your payment...');
+                navigate('/orders');
               } else {
                 toast.error(verifyData.error || 'Payment verification failed');
                 console.error('Payment verification failed:', verifyData.error);
@@ -214,6 +233,8 @@ export default function Checkout() {
           },
           onClose: () => {
             toast.error('Payment was cancelled');
+            // The order is cancelled below, so paying again needs a new one
+            checkoutAttempt.current = null;
             // You might want to cancel the order here
             useOrderStore.getState().cancelOrder(createdOrder.id);
             return 'cancelled';
@@ -2,6 +2,7 @@ import React from 'react';
 import { useQuery } from '@tanstack/react-query';
 import { Loader } from '../components/ui/Loader';
 import axiosInstance from '../utils/axios';
+import { fetchAllResults } from '../utils/pagination';
 
 interface DeliveryOrder {
   id: number;
@@ -9,15 +10,14 @@ interface DeliveryOrder {
     first_name: string;
     last_name: string;
   };
-  status: 'pending' | 'in_transit' | 'delivered';
+  status: 'ready' | 'in_transit' | 'delivered';
   created: string;
   delivery_address: string;
   total: number;
 }
 
 const fetchDeliveryOrders = async () => {
-  const response = await axiosInstance.get('/api/v1/delivery-orders/');
-  return response.data;
+  return await fetchAllResults<DeliveryOrder>('/api/v1/delivery-orders/');
 };
 
 export default function DeliveryDashboard() {
@@ -75,7 +75,7 @@ export default function DeliveryDashboard() {
             </div>
             
             <div className="flex gap-2">
-              {order.status === 'pending' && (
+              {order.status === 'ready' && (
                 <button
                   onClick={() => handleStatusUpdate(order.id, 'in_transit')}
                   className="bg-blue-600 text-white px-4 py-2 rounded hover:bg-blue-700"
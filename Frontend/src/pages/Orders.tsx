@@ -11,13 +11,14 @@ const StatusBadge = ({ status }: { status: OrderStatus }) => {
     confirmed: 'bg-blue-100 text-blue-800',
     preparing: 'bg-purple-100 text-purple-800',
     ready: 'bg-green-100 text-green-800',
+    in_transit: 'bg-indigo-100 text-indigo-800',
     delivered: 'bg-gray-100 text-gray-800',
     cancelled: 'bg-red-100 text-red-800',
   };
 
   return (
     <span className={`px-3 py-1 rounded-full text-sm font-medium ${colors[status]}`}>
-      {status.charAt(0).toUpperCase() + status.slice(1)}
+      {status.charAt(0).toUpperCase() + status.slice(1).replace('_', ' ')}
     </span>
   );
 };
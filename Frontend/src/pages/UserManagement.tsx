@@ -3,6 +3,7 @@ import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
 import { Loader } from '../components/ui/Loader';
 import axiosInstance from '../utils/axios';
 import toast from 'react-hot-toast';
+import { fetchAllResults } from '../utils/pagination';
 
 interface User {
   id: number;
@@ -13,8 +14,7 @@ interface User {
 }
 
 const fetchUsers = async () => {
-  const response = await axiosInstance.get('/api/v1/users/');
-  return response.data;
+  return await fetchAllResults<User>('/api/v1/users/');
 };
 
 export default function UserManagement() {
@@ -1,5 +1,6 @@
 import axiosInstance from '../utils/axios';
 import { TableBooking, BookingStatus, Table, BookingFormData } from '../types/booking';
+import { fetchAllResults } from '../utils/pagination';
 
 class BookingService {
   private static instance: BookingService;
@@ -52,8 +53,7 @@ class BookingService {
   // Get all bookings
   async getBookings(): Promise<TableBooking[]> {
     try {
-      const response = await axiosInstance.get(`${this.baseUrl}/table-bookings/`);
-      return response.data;
+      return await fetchAllResults<TableBooking>(`${this.baseUrl}/table-bookings/`);
     } catch (error) {
       console.error('Error fetching bookings:', error);
       throw new Error('Failed to fetch bookings');
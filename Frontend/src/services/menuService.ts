@@ -1,4 +1,5 @@
 import axiosInstance from '../utils/axios';
+import { fetchAllResults } from '../utils/pagination';
 
 export interface Category {
     id: number;
@@ -32,8 +33,7 @@ export interface CreateMenuItemDTO {
 export const menuService = {
     // Get all menu items
     getMenuItems: async (): Promise<MenuItem[]> => {
-        const response = await axiosInstance.get('/api/v1/menu-items/');
-        return response.data.map((item: MenuItem) => ({
+        return (await fetchAllResults<MenuItem>('/api/v1/menu-items/')).map((item: MenuItem) => ({
             ...item,
             available: item.available ?? true,
         }));
@@ -1,5 +1,6 @@
 import axiosInstance from '../utils/axios';
 import { Order, OrderStatus, CreateOrder, OrderResponse } from '../types/order';
+import { fetchAllResults } from '../utils/pagination';
 
 class OrderService {
   private static instance: OrderService;
@@ -14,9 +15,13 @@ class OrderService {
   }
   
 
-  async createOrder(orderData: CreateOrder): Promise<OrderResponse> {
+  // Retries sent with the same idempotency key get the first order back
+  // instead of placing another one
+  async createOrder(orderData: CreateOrder, idempotencyKey?: string): Promise<OrderResponse> {
     try {
-      const response = await axiosInstance.post('api/v1/orders/', orderData);
+      const response = await axiosInstance.post('api/v1/orders/', orderData, {
+        headers: idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : undefined,
+      });
       const createdOrder = response.data;  // Access the `order` key
       console.log("from oderservice: ", createdOrder)
       return createdOrder;
@@ -29,9 +34,7 @@ class OrderService {
 
   async getOrders(): Promise<Order[]> {
     try {
-      const response = await axiosInstance.get('api/v1/orders/');
-      console.log('Orders response:', response.data);
-      return response.data;
+      return await fetchAllResults<Order>('api/v1/orders/');
     } catch (error) {
       console.error('Error fetching orders:', error);
       throw new Error('Failed to fetch orders');
@@ -9,11 +9,11 @@ export const useOrderStore = create<OrderStore>((set) => ({
   isLoading: false,
   error: null,
 
-  createOrder: async (orderData: CreateOrder) => {
+  createOrder: async (orderData: CreateOrder, idempotencyKey?: string) => {
     try {
       set({ isLoading: true, error: null });
       // const createdOrder = await orderService.createOrder(orderData);
-      const { order } = await orderService.createOrder(orderData);
+      const { order } = await orderService.createOrder(orderData, idempotencyKey);
       set((state) => ({
         orders: [order, ...state.orders],
         currentOrder: order,
@@ -1,4 +1,4 @@
-export type OrderStatus = 'pending' | 'confirmed' | 'preparing' | 'ready' | 'delivered' | 'cancelled';
+export type OrderStatus = 'pending' | 'confirmed' | 'preparing' | 'ready' | 'in_transit' | 'delivered' | 'cancelled';
 export type PaymentMethod = 'card' | 'cash' | 'wallet';
 export type DeliveryType = 'delivery' | 'pickup' | 'dine-in';
 
@@ -72,7 +72,7 @@ export interface OrderStore {
   currentOrder: Order | null;
   isLoading: boolean;
   error: string | null;
-  createOrder: (order: CreateOrder) => Promise<OrderResponse>;
+  createOrder: (order: CreateOrder, idempotencyKey?: string) => Promise<OrderResponse>;
   fetchOrders: () => Promise<void>;
   cancelOrder: (orderId: string) => Promise<void>;
 }
\ No newline at end of file
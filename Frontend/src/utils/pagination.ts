@@ -0,0 +1,33 @@
+import axiosInstance from './axios';
+
+export interface Paginated<T> {
+  results: T[];
+  next: string | null;
+  previous: string | null;
+  count?: number;
+}
+
+// List endpoints return a page object; unwrap it to the array of results
+export const unwrapResults = <T>(data: T[] | Paginated<T>): T[] => {
+  return Array.isArray(data) ? data : data.results;
+};
+
+const pathOf = (link: string) => {
+  const { pathname, search } = new URL(link);
+  return `${pathname}${search}`;
+};
+
+// Fetch every page of a list endpoint by following `next` links, for
+// screens that show the whole list rather than paging through it
+export const fetchAllResults = async <T>(url: string): Promise<T[]> => {
+  const results: T[] = [];
+  let nextUrl: string | null = url;
+  while (nextUrl) {
+    const response: { data: T[] | Paginated<T> } = await axiosInstance.get(nextUrl);
+    const { data } = response;
+    results.push(...unwrapResults<T>(data));
+    // Keep only the path: behind a TLS proxy the API may build http:// links
+    nextUrl = Array.isArray(data) || !data.next ? null : pathOf(data.next);
+  }
+  return results;
+};